@@ -0,0 +1,289 @@
+"""
+Cost of turning one modem update into metrics: a `CollectorRegistry` with `Gauge` and
+`Info` objects per update (before) versus the long-lived `ModemCollector` that yields
+metric families from the snapshot of the update (after).
+
+The payload is the fake modem with 32 SC-QAM and one OFDM downstream channel. Run from
+the repository root:
+
+    python -m benchmarks.collector
+"""
+
+import asyncio
+import time
+import tracemalloc
+from typing import Callable
+
+import aiohttp
+import click
+from aiohttp.test_utils import TestServer
+from prometheus_client import CollectorRegistry, Gauge, Info, generate_latest
+
+from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from sagemcom_f3896_client.collector import ModemCollector, ModemMetricsSnapshot
+from sagemcom_f3896_client.exporter import Exporter
+from sagemcom_f3896_client.log_parser import DownstreamProfileMessage
+from tests.fake_modem import FakeModem
+
+
+def legacy_registry(snapshot: ModemMetricsSnapshot) -> CollectorRegistry:
+    """The metrics of an update as the exporter built them before `ModemCollector`."""
+    registry = CollectorRegistry()
+    channel = ["channel", "channel_type"]
+
+    Info("modem", "Modem information", registry=registry).info(
+        {
+            "mac": snapshot.state.mac_address,
+            "serial": snapshot.state.serial_number,
+            "software_version": snapshot.system_info.software_version,
+            "hardware_version": snapshot.system_info.hardware_version,
+            "boot_file_name": snapshot.state.boot_file_name,
+        }
+    )
+    Gauge("modem_uptime", "Uptime", registry=registry).set(snapshot.state.up_time)
+    Gauge("node_boot_time_seconds", "Node boot time", registry=registry).set(
+        snapshot.boot_time
+    )
+    source_age = Gauge("modem_source_age_seconds", "", ["source"], registry=registry)
+    for source, age in snapshot.source_ages.items():
+        source_age.labels(source).set(age)
+
+    ds_frequency = Gauge("modem_downstream_frequency", "", channel, registry=registry)
+    ds_rx_mer = Gauge("modem_downstream_rx_mer", "", channel, registry=registry)
+    ds_power = Gauge("modem_downstream_power", "", channel, registry=registry)
+    ds_locked = Gauge("modem_downstream_locked", "", channel, registry=registry)
+    ds_errors = Gauge(
+        "modem_downstream_errors_total",
+        "",
+        channel + ["error_type"],
+        registry=registry,
+    )
+    ds_qam_snr = Gauge("modem_downstream_qam_snr", "", channel, registry=registry)
+    ds_qam_info = Info("modem_downstream_qam", "", channel, registry=registry)
+    ds_ofdm_info = Info("modem_downstream_ofdm", "", channel, registry=registry)
+    for ch in snapshot.downstreams:
+        labels = {"channel": ch.channel_id, "channel_type": ch.channel_type}
+        ds_frequency.labels(**labels).set(ch.frequency)
+        ds_rx_mer.labels(**labels).set(ch.rx_mer)
+        ds_power.labels(**labels).set(ch.power)
+        ds_locked.labels(**labels).set(ch.lock_status)
+        ds_errors.labels(**labels, error_type="corrected").set(ch.corrected_errors)
+        ds_errors.labels(**labels, error_type="uncorrected").set(ch.uncorrected_errors)
+        if ch.channel_type == "sc_qam":
+            ds_qam_snr.labels(**labels).set(ch.snr)
+            ds_qam_info.labels(**labels).info(
+                {
+                    "modulation": ch.modulation,
+                    "primary": str(
+                        ch.channel_id == snapshot.primary_downstream_channel_id
+                    ).lower(),
+                }
+            )
+        else:
+            ds_ofdm_info.labels(**labels).info(
+                {
+                    "modulation": ch.modulation,
+                    "channel_width_hz": str(ch.channel_width),
+                    "fft_type": ch.fft_type,
+                    "number_of_active_subcarriers": str(
+                        ch.number_of_active_subcarriers
+                    ),
+                }
+            )
+
+    us_frequency = Gauge("modem_upstream_frequency", "", channel, registry=registry)
+    us_locked = Gauge("modem_upstream_locked", "", channel, registry=registry)
+    us_power = Gauge("modem_upstream_power", "", channel, registry=registry)
+    us_timeouts = Gauge(
+        "modem_upstream_timeout_total",
+        "",
+        channel + ["timeout_type"],
+        registry=registry,
+    )
+    us_atdma_info = Info("modem_upstream_atdma", "", channel, registry=registry)
+    us_ofdma_info = Info("modem_upstream_ofdma", "", channel, registry=registry)
+    for ch in snapshot.upstreams:
+        labels = {"channel": ch.channel_id, "channel_type": ch.channel_type}
+        us_frequency.labels(**labels).set(ch.frequency)
+        us_locked.labels(**labels).set(1 if ch.lock_status else 0)
+        us_power.labels(**labels).set(ch.power)
+        us_timeouts.labels(**labels, timeout_type="t3").set(ch.t3_timeouts)
+        us_timeouts.labels(**labels, timeout_type="t4").set(ch.t4_timeouts)
+        if ch.channel_type == "atdma":
+            us_atdma_info.labels(**labels).info(
+                {"modulation": ch.modulation, "symbol_rate": str(ch.symbol_rate)}
+            )
+            us_timeouts.labels(**labels, timeout_type="t1").set(ch.t1_timeouts)
+            us_timeouts.labels(**labels, timeout_type="t2").set(ch.t2_timeouts)
+        else:
+            us_ofdma_info.labels(**labels).info(
+                {
+                    "modulation": ch.modulation,
+                    "channel_width_hz": str(ch.channel_width),
+                    "fft_type": ch.fft_type,
+                    "number_of_active_subcarriers": str(
+                        ch.number_of_active_subcarriers
+                    ),
+                }
+            )
+
+    channel_profile = Gauge(
+        "modem_channel_profile",
+        "",
+        ["direction", "channel_id", "slot"],
+        registry=registry,
+    )
+    for message in snapshot.profile_messages:
+        direction = (
+            "downstream"
+            if isinstance(message, DownstreamProfileMessage)
+            else "upstream"
+        )
+        for idx, profile in enumerate(message.profile):
+            channel_profile.labels(
+                direction=direction, channel_id=message.channel_id, slot=str(idx + 1)
+            ).set(profile)
+    ofdm_profile_failure = Gauge(
+        "modem_cmstatus_info",
+        "",
+        ["channel_id", "profile", "type"],
+        registry=registry,
+    )
+    for (channel_id, profile), value in snapshot.ofdm_profile_failures.items():
+        ofdm_profile_failure.labels(
+            channel_id=channel_id, profile=profile, type="ofdm_profile_failure"
+        ).set(value)
+    Gauge("modem_reboot_count", "", registry=registry).set(snapshot.reboot_count)
+    by_priority = Gauge("modem_log_count", "", ["priority"], registry=registry)
+    for priority, count in snapshot.log_priority_counts.items():
+        by_priority.labels(priority=priority).set(count)
+    events = Gauge(
+        "modem_log_event_count", "", ["event", "channel_id"], registry=registry
+    )
+    for (event, channel_id), count in snapshot.log_event_counts.items():
+        events.labels(event=event, channel_id=channel_id).set(count)
+
+    for name, rate_name, counters, counter_label in (
+        (
+            "modem_downstream_channel_errors_total",
+            "modem_downstream_channel_error_rate",
+            snapshot.downstream_counters,
+            "error_type",
+        ),
+        (
+            "modem_upstream_channel_timeouts_total",
+            "modem_upstream_channel_timeout_rate",
+            snapshot.upstream_counters,
+            "timeout_type",
+        ),
+    ):
+        total = Gauge(name, "", channel + [counter_label], registry=registry)
+        rate = Gauge(rate_name, "", channel + [counter_label], registry=registry)
+        for key, (value, per_second) in counters.items():
+            total.labels(*key).set(value)
+            if per_second is not None:
+                rate.labels(*key).set(per_second)
+    resets = Gauge(
+        "modem_channel_counter_resets_total", "", ["reason"], registry=registry
+    )
+    for reason, count in snapshot.counter_resets.items():
+        resets.labels(reason).set(count)
+
+    session = snapshot.session
+    Gauge("modem_session_login_count", "", registry=registry).set(session.login_count)
+    reauth = Gauge(
+        "modem_session_reauthentication_count", "", ["type"], registry=registry
+    )
+    reauth.labels(type="refresh").set(session.token_refresh_count)
+    reauth.labels(type="rejected").set(session.reauth_count)
+    Gauge("modem_session_reauthentication_seconds", "", registry=registry).set(
+        session.last_reauth_duration or 0
+    )
+    Gauge("modem_session_token_age_seconds", "", registry=registry).set(
+        session.token_age if session.token_age is not None else float("nan")
+    )
+    connections = Gauge(
+        "modem_client_connection_count", "", ["state"], registry=registry
+    )
+    connections.labels(state="created").set(session.connections_created)
+    connections.labels(state="reused").set(session.connections_reused)
+    Gauge("modem_client_connection_reuse_ratio", "", registry=registry).set(
+        session.connection_reuse_ratio or 0
+    )
+    Gauge("modem_client_stale_connection_retry_count", "", registry=registry).set(
+        session.stale_connection_retries
+    )
+    cache = Gauge("modem_client_cache_request_count", "", ["result"], registry=registry)
+    cache.labels("hit").set(session.cache_hits)
+    cache.labels("miss").set(session.cache_misses)
+    cache.labels("coalesced").set(session.cache_coalesced)
+    return registry
+
+
+def samples(exposition: bytes) -> set[str]:
+    return set(
+        line
+        for line in exposition.decode("utf-8").splitlines()
+        if not line.startswith("#")
+    )
+
+
+def measure(name: str, update: Callable[[], bytes], iterations: int) -> None:
+    update()
+
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        update()
+    duration = (time.perf_counter() - t0) / iterations
+
+    # peak memory allocated while building and rendering the metrics of one update
+    tracemalloc.start()
+    update()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    click.echo(f"{name:>10} {duration * 1_000_000:>12.1f} {peak / 1024:>14.1f}")
+
+
+async def snapshot_of_update() -> ModemMetricsSnapshot:
+    modem = FakeModem(qam_channels=32, ofdm_channels=1, log_lines=200)
+    async with (
+        TestServer(modem.app) as server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        await exporter.update_metrics()
+        return exporter.collector.snapshot
+
+
+@click.command()
+@click.option("--iterations", default=2000)
+def main(iterations: int):
+    snapshot = asyncio.run(snapshot_of_update())
+    collector = ModemCollector()
+    collector.snapshot = snapshot
+
+    def before() -> bytes:
+        return generate_latest(legacy_registry(snapshot))
+
+    def after() -> bytes:
+        # an update only replaces the snapshot of the long-lived collector
+        collector.snapshot = snapshot
+        return generate_latest(collector)
+
+    assert samples(before()) == samples(after()), "expositions differ"
+
+    click.echo(
+        f"{len(snapshot.downstreams)} downstream, {len(snapshot.upstreams)} upstream channels"
+    )
+    click.echo(f"{'':>10} {'us/update':>12} {'peak KiB':>14}")
+    measure("registry", before, iterations)
+    measure("collector", after, iterations)
+
+
+if __name__ == "__main__":
+    main()
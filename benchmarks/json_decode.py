@@ -0,0 +1,100 @@
+"""
+Time to decode the downstream, upstream and event log responses, with each
+available JSON decoder, with and without building the models.
+
+Uses the payloads in `tests/fixtures`. Run from the repository root:
+
+    python -m benchmarks.json_decode
+"""
+
+import json
+import pathlib
+import time
+from typing import Any, Callable, Dict, List
+
+import click
+
+from sagemcom_f3896_client.client import DEFAULT_JSON_LOADS
+from sagemcom_f3896_client.models import (
+    EventLogItem,
+    ModemATDMAUpstreamChannelResult,
+    ModemOFDMAUpstreamChannelResult,
+    ModemOFDMDownstreamChannelResult,
+    ModemQAMDownstreamChannelResult,
+)
+
+FIXTURES = pathlib.Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def build_downstream(body: Dict) -> List:
+    return [
+        (
+            ModemQAMDownstreamChannelResult.build(e)
+            if e["channelType"] == "sc_qam"
+            else ModemOFDMDownstreamChannelResult.build(e)
+        )
+        for e in body["downstream"]["channels"]
+    ]
+
+
+def build_upstream(body: Dict) -> List:
+    return [
+        (
+            ModemATDMAUpstreamChannelResult.build(e)
+            if e["channelType"] == "atdma"
+            else ModemOFDMAUpstreamChannelResult.build(e)
+        )
+        for e in body["upstream"]["channels"]
+    ]
+
+
+def build_eventlog(body: Dict) -> List:
+    return sorted((EventLogItem.build(e) for e in body["eventlog"]), reverse=True)
+
+
+PAYLOADS = {
+    "downstream": build_downstream,
+    "upstream": build_upstream,
+    "eventlog": build_eventlog,
+}
+
+
+def decoders() -> Dict[str, Callable[[bytes], Any]]:
+    res = {"json": json.loads}
+    try:
+        import orjson
+
+        res["orjson"] = orjson.loads
+    except ImportError:
+        click.echo("orjson is not installed")
+    return res
+
+
+def per_call(fn: Callable[[], Any], iterations: int) -> float:
+    """Mean duration of a call in microseconds."""
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - t0) / iterations * 1_000_000
+
+
+@click.command()
+@click.option("--iterations", default=2000)
+def main(iterations: int):
+    click.echo(f"default decoder: {DEFAULT_JSON_LOADS.__module__}.loads")
+    click.echo(
+        f"{'payload':>10} {'bytes':>7} {'decoder':>8} {'decode (us)':>12} {'+build (us)':>12}"
+    )
+    for name, build in PAYLOADS.items():
+        body = (FIXTURES / f"{name}.json").read_bytes()
+        for decoder_name, loads in decoders().items():
+            decode = per_call(lambda: loads(body), iterations)
+            decode_build = per_call(lambda: build(loads(body)), iterations)
+            click.echo(
+                f"{name:>10} {len(body):>7} {decoder_name:>8} {decode:>12.1f} {decode_build:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Per-scrape latency with and without keep-alive connections.
+
+The fake modem adds `--connect-latency` to the first request on every connection, to
+mimic the slow connection setup of the embedded web server. Run from the repository
+root:
+
+    python -m benchmarks.keep_alive --connect-latency 0.02
+"""
+
+import asyncio
+import statistics
+import time
+
+import click
+from aiohttp.test_utils import TestServer
+
+from sagemcom_f3896_client.client import SagemcomModemSessionClient, build_session
+from tests.fake_modem import FakeModem
+
+
+async def scrape(client: SagemcomModemSessionClient) -> None:
+    """The requests of one exporter update."""
+    await asyncio.gather(
+        client.system_state(),
+        client.system_info(),
+        client.modem_downstreams(),
+        client.modem_primary_downstream(),
+        client.modem_upstreams(),
+        client.modem_event_log(),
+    )
+
+
+async def run(scrapes: int, connect_latency: float, latency: float) -> None:
+    modem = FakeModem(connect_latency=connect_latency, latency=latency)
+
+    async with TestServer(modem.app) as server:
+        click.echo(
+            f"{'mode':>12} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'reuse':>6}"
+        )
+        for keep_alive in (False, True):
+            async with build_session(15, keep_alive=keep_alive) as session:
+                client = SagemcomModemSessionClient(
+                    session, str(server.make_url("/")), "pw"
+                )
+                # log in outside of the measurement
+                await client.system_info()
+
+                durations = []
+                for _ in range(scrapes):
+                    t0 = time.perf_counter()
+                    await scrape(client)
+                    durations.append((time.perf_counter() - t0) * 1000)
+
+                p95 = statistics.quantiles(durations, n=20)[-1]
+                click.echo(
+                    f"{'keep-alive' if keep_alive else 'force-close':>12} "
+                    f"{statistics.mean(durations):>10.2f} "
+                    f"{statistics.median(durations):>10.2f} {p95:>10.2f} "
+                    f"{client.connection_reuse_ratio:>6.2f}"
+                )
+
+
+@click.command()
+@click.option("--scrapes", default=50)
+@click.option(
+    "--connect-latency", default=0.02, help="Simulated connection setup time (s)"
+)
+@click.option("--latency", default=0.0, help="Simulated response time (s)")
+def main(scrapes: int, connect_latency: float, latency: float):
+    asyncio.run(run(scrapes, connect_latency, latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Time to parse the messages of an event log (without the parse cache): the message
+type table with prefix dispatch (after) versus the chain of the four regular
+expressions the parser had before the table (before). The table also parses four
+more message types, so it is compared on the whole log and on the messages that both
+parsers parse to the same type.
+
+Uses the event log in `tests/fixtures`. Exits with status 1 when the table is slower
+than `--threshold` times the chain on the common messages. Run from the repository
+root:
+
+    python -m benchmarks.log_parser
+"""
+
+import json
+import pathlib
+import sys
+import time
+from typing import Callable, List, Optional
+
+import click
+
+from sagemcom_f3896_client import log_parser
+from sagemcom_f3896_client.log_parser import (
+    CM_STATUS_OFDM_RE,
+    DS_PROFILE_RE,
+    REBOOT_RE,
+    US_PROFILE_RE,
+    CMStatusMessageOFDM,
+    DownstreamProfileMessage,
+    ParsedMessage,
+    RebootMessage,
+    UpstreamProfileMessage,
+)
+
+FIXTURES = pathlib.Path(__file__).parent.parent / "tests" / "fixtures"
+
+
+def legacy_parse_message(message: str) -> Optional[ParsedMessage]:
+    """The parser before the message type table."""
+    match = CM_STATUS_OFDM_RE.match(message)
+    if match:
+        ds_id = match.group("ds_id")
+
+        return CMStatusMessageOFDM(
+            channel_id=int(match.group("channel_id")),
+            ds_id=int(ds_id) if ds_id != "N/A" else None,
+            event_code=int(match.group("event_code")),
+            profile=int(match.group("profile")),
+        )
+    match = DS_PROFILE_RE.match(message)
+    if match:
+        return DownstreamProfileMessage(
+            channel_id=int(match.group("channel_id")),
+            previous_profile=(
+                tuple(map(int, match.group("previous_profile").split()))
+                if match.group("previous_profile")
+                else None
+            ),
+            profile=tuple(map(int, match.group("profile").split())),
+        )
+
+    match = US_PROFILE_RE.match(message)
+    if match:
+        return UpstreamProfileMessage(
+            channel_id=int(match.group("channel_id")),
+            previous_profile=(
+                tuple(map(int, match.group("previous_profile").split()))
+                if match.group("previous_profile")
+                else None
+            ),
+            profile=tuple(map(int, match.group("profile").split())),
+        )
+
+    match = REBOOT_RE.match(message)
+    if match:
+        return RebootMessage(reason=match.group("message"))
+    return None
+
+
+def measure(
+    parsers: List[Callable[[str], object]], messages: List[str], runs: int
+) -> List[float]:
+    """
+    Best time of 5 repeats of parsing all messages `runs` times, per parser. The
+    repeats of the parsers are interleaved so that they see the same load.
+    """
+    timings: List[List[float]] = [[] for _ in parsers]
+    for _ in range(5):
+        for parse, parser_timings in zip(parsers, timings):
+            t0 = time.perf_counter()
+            for _ in range(runs):
+                for message in messages:
+                    parse(message)
+            parser_timings.append(time.perf_counter() - t0)
+    return [min(parser_timings) for parser_timings in timings]
+
+
+@click.command()
+@click.option("--runs", default=200, help="Passes over the event log per repeat")
+@click.option("--threshold", default=1.1, help="Slowdown that counts as a regression")
+def main(runs: int, threshold: float):
+    with open(FIXTURES / "eventlog.json") as f:
+        messages = [entry["message"] for entry in json.load(f)["eventlog"]]
+
+    common = [
+        message
+        for message in messages
+        if type(legacy_parse_message(message))
+        is type(log_parser._parse_message(message))
+    ]
+
+    parsers = [legacy_parse_message, log_parser._parse_message]
+    click.echo(f"{'':>8} {'messages':>8} {'chain':>8} {'table':>8}")
+    for name, subset in (("all", messages), ("common", common)):
+        before, after = measure(parsers, subset, runs)
+        click.echo(
+            f"{name:>8} {len(subset):>8} {before:>7.3f}s {after:>7.3f}s "
+            f"{after / before:>6.2f}x"
+        )
+
+    if after > before * threshold:
+        click.echo("REGRESSION")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
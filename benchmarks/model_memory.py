@@ -0,0 +1,94 @@
+"""
+Memory used per channel result and per event log entry by the (slotted) models,
+compared with the same dataclasses without `__slots__` (an instance `__dict__`).
+
+Only the instances are measured: the attribute values are shared between both
+variants. Run from the repository root:
+
+    python -m benchmarks.model_memory
+"""
+
+import dataclasses
+import gc
+import tracemalloc
+from typing import Callable, Dict, List
+
+import click
+
+from sagemcom_f3896_client.models import (
+    EventLogItem,
+    ModemATDMAUpstreamChannelResult,
+    ModemOFDMAUpstreamChannelResult,
+    ModemOFDMDownstreamChannelResult,
+    ModemQAMDownstreamChannelResult,
+)
+from tests.fake_modem import downstream_channels, event_log, upstream_channels
+
+
+def unslotted(cls: type) -> type:
+    """A dataclass with the fields of `cls`, but with an instance `__dict__`."""
+    params = cls.__dataclass_params__
+    return dataclasses.make_dataclass(
+        f"Unslotted{cls.__name__}",
+        [(field.name, field.type, field) for field in dataclasses.fields(cls)],
+        kw_only=True,
+        frozen=params.frozen,
+        order=params.order,
+    )
+
+
+def bytes_per_instance(
+    build: Callable[[Dict], object], elems: List[Dict], copies: int
+) -> float:
+    """Memory allocated per instance while keeping `copies` instances of every element alive."""
+    gc.collect()
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    instances = [build(elem) for _ in range(copies) for elem in elems]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    count = len(instances)
+    del instances
+    return (end - start) / count
+
+
+def kwargs_of(instance: object) -> Dict:
+    return {
+        field.name: getattr(instance, field.name)
+        for field in dataclasses.fields(instance)
+    }
+
+
+@click.command()
+@click.option("--copies", default=1000, help="Instances of every element")
+def main(copies: int):
+    channels = [
+        (
+            ModemQAMDownstreamChannelResult.build(e)
+            if e["channelType"] == "sc_qam"
+            else ModemOFDMDownstreamChannelResult.build(e)
+        )
+        for e in downstream_channels(qam_channels=32, ofdm_channels=2)
+    ] + [
+        (
+            ModemATDMAUpstreamChannelResult.build(e)
+            if e["channelType"] == "atdma"
+            else ModemOFDMAUpstreamChannelResult.build(e)
+        )
+        for e in upstream_channels(atdma_channels=4, ofdma_channels=2)
+    ]
+    log_entries = [EventLogItem.build(e) for e in event_log(100)]
+
+    click.echo(f"{'':>12} {'slots':>10} {'__dict__':>10}")
+    for name, instances in (("channel", channels), ("log entry", log_entries)):
+        elems = [(type(instance), kwargs_of(instance)) for instance in instances]
+        plain = {cls: unslotted(cls) for cls, _ in elems}
+
+        slotted_bytes = bytes_per_instance(lambda e: e[0](**e[1]), elems, copies)
+        plain_bytes = bytes_per_instance(lambda e: plain[e[0]](**e[1]), elems, copies)
+        click.echo(f"{name:>12} {slotted_bytes:>10.1f} {plain_bytes:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
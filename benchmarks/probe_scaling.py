@@ -0,0 +1,87 @@
+"""
+Scrapes per second of the `/probe?target=` endpoint as the number of targets grows.
+
+Every target is a path on one local fake modem server. Run from the repository root:
+
+    python -m benchmarks.probe_scaling --latency 0.05
+"""
+
+import asyncio
+import time
+
+import aiohttp
+import click
+from aiohttp.test_utils import TestServer
+
+from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from sagemcom_f3896_client.exporter import Exporter, ProbeTargetPool
+from tests.fake_modem import FakeModem
+
+
+async def scrape_round(
+    http: aiohttp.ClientSession, exporter_url: str, targets: list[str]
+) -> None:
+    async def scrape(target: str) -> None:
+        async with http.get(exporter_url, params={"target": target}) as resp:
+            body = await resp.text()
+            # a failed scrape makes the timings meaningless
+            if resp.status != 200 or "probe_success 1.0" not in body:
+                raise click.ClickException(
+                    f"Probe of {target} failed (HTTP {resp.status}): {body[:200]}"
+                )
+
+    await asyncio.gather(*(scrape(target) for target in targets))
+
+
+async def run(target_counts: list[int], rounds: int, latency: float) -> None:
+    modem = FakeModem(latency=latency)
+    pool = ProbeTargetPool("password", ["127.0.0.1"])
+
+    try:
+        async with (
+            TestServer(modem.app) as modem_server,
+            aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=0)) as http,
+        ):
+            exporter = Exporter(
+                SagemcomModemSessionClient(http, str(modem_server.make_url("/")), "pw"),
+                port=0,
+                probe_targets=pool,
+            )
+            async with TestServer(exporter.app) as exporter_server:
+                exporter_url = str(exporter_server.make_url("/probe"))
+
+                click.echo(
+                    f"{'targets':>8} {'scrapes':>8} {'seconds':>8} {'scrapes/s':>10}"
+                )
+                for count in target_counts:
+                    targets = [
+                        str(modem_server.make_url(f"/modem{idx}"))
+                        for idx in range(count)
+                    ]
+                    # warm up: create the per-target state
+                    await scrape_round(http, exporter_url, targets)
+
+                    t0 = time.perf_counter()
+                    for _ in range(rounds):
+                        await scrape_round(http, exporter_url, targets)
+                    duration = time.perf_counter() - t0
+
+                    scrapes = count * rounds
+                    click.echo(
+                        f"{count:>8} {scrapes:>8} {duration:>8.3f} {scrapes / duration:>10.1f}"
+                    )
+
+    finally:
+        await pool.close()
+
+
+@click.command()
+@click.option("--targets", "-t", multiple=True, type=int, default=[1, 10, 50, 100, 250])
+@click.option("--rounds", default=5, help="Scrapes per target")
+@click.option("--latency", default=0.05, help="Simulated modem response time (s)")
+def main(targets: list[int], rounds: int, latency: float):
+    asyncio.run(run(list(targets), rounds, latency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Time to apply the profile messages of an update to the `ProfileMessageStore` of every
+modem: the keyed store versus the previous set-based store (kept here as baseline).
+
+Every update adds a profile message for every channel and removes the channels that
+are gone. Run from the repository root:
+
+    python -m benchmarks.profile_store --modems 100 --channels 40
+"""
+
+import time
+from typing import List, Set
+
+import click
+
+from sagemcom_f3896_client.log_parser import (
+    DownstreamProfileMessage,
+    UpstreamProfileMessage,
+)
+from sagemcom_f3896_client.profile_messages import ProfileMessageStore
+
+
+class SetProfileMessageStore:
+    """The store before it was keyed by (direction, channel_id)."""
+
+    _messages: Set[DownstreamProfileMessage | UpstreamProfileMessage]
+
+    def __init__(self):
+        self._messages = set()
+
+    def update_for_channels(self, ds_channel_ids, us_channel_ids) -> int:
+        ds_channel_ids = frozenset(ds_channel_ids)
+        us_channel_ids = frozenset(us_channel_ids)
+
+        removed = []
+        for message in list(self._messages):
+            match message:
+                case DownstreamProfileMessage(
+                    channel_id=channel_id
+                ) if channel_id not in ds_channel_ids:
+                    removed.append(message)
+                case UpstreamProfileMessage(
+                    channel_id=channel_id
+                ) if channel_id not in us_channel_ids:
+                    removed.append(message)
+
+        for message in removed:
+            self._messages.remove(message)
+        return len(removed)
+
+    def add(self, message: DownstreamProfileMessage | UpstreamProfileMessage):
+        for existing in list(self._messages):
+            if existing.channel_id == message.channel_id and isinstance(
+                message, type(existing)
+            ):
+                self._messages.remove(existing)
+
+        return self._messages.add(message)
+
+
+def messages_of_update(
+    update: int, channels: int
+) -> List[DownstreamProfileMessage | UpstreamProfileMessage]:
+    profile = (update % 4 + 1, 5)
+    return [
+        DownstreamProfileMessage(channel_id=idx, previous_profile=None, profile=profile)
+        for idx in range(channels)
+    ] + [
+        UpstreamProfileMessage(channel_id=idx, previous_profile=None, profile=profile)
+        for idx in range(channels // 8 + 1)
+    ]
+
+
+def run_set(modems: int, channels: int, updates: int) -> float:
+    stores = [SetProfileMessageStore() for _ in range(modems)]
+    t0 = time.perf_counter()
+    for update in range(updates):
+        messages = messages_of_update(update, channels)
+        for store in stores:
+            for message in messages:
+                store.add(message)
+            store.update_for_channels(range(channels), range(channels // 8 + 1))
+    return time.perf_counter() - t0
+
+
+def run_keyed(modems: int, channels: int, updates: int) -> float:
+    stores = [ProfileMessageStore() for _ in range(modems)]
+    t0 = time.perf_counter()
+    for update in range(updates):
+        messages = messages_of_update(update, channels)
+        for store in stores:
+            store.add_many(messages)
+            store.retain_channels(range(channels), range(channels // 8 + 1))
+    return time.perf_counter() - t0
+
+
+@click.command()
+@click.option("--modems", "-m", multiple=True, type=int, default=[1, 10, 100])
+@click.option("--channels", "-c", multiple=True, type=int, default=[40, 400, 4000])
+@click.option("--updates", default=5)
+def main(modems: List[int], channels: List[int], updates: int):
+    click.echo(
+        f"{'modems':>7} {'channels':>9} {'set (ms/update)':>16} {'keyed (ms/update)':>18}"
+    )
+    for modem_count in modems:
+        for channel_count in channels:
+            if modem_count * channel_count > 40_000:
+                # the set-based store takes minutes
+                continue
+            set_store = run_set(modem_count, channel_count, updates) / updates
+            keyed = run_keyed(modem_count, channel_count, updates) / updates
+            click.echo(
+                f"{modem_count:>7} {channel_count:>9} {set_store * 1000:>16.2f} {keyed * 1000:>18.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
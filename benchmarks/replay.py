@@ -0,0 +1,70 @@
+"""
+Time (and optionally profile) `Exporter.update_metrics` on journals captured from real
+modems with `--capture-journal`. The responses are replayed without delay, so only the
+CPU cost of the exporter is measured. Run from the repository root:
+
+    python -m benchmarks.replay -j modem1.jsonl.gz -j modem2.jsonl.gz --profile replay.prof
+"""
+
+import asyncio
+import cProfile
+import pstats
+import time
+from typing import List, Optional
+
+import click
+
+from sagemcom_f3896_client.capture import ReplaySession, read_journal
+from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from sagemcom_f3896_client.exporter import Exporter
+
+
+async def replay(path: str, updates: int) -> float:
+    """Mean duration of an update, after the first update."""
+    session = ReplaySession(read_journal(path), speed=0)
+    exporter = Exporter(
+        SagemcomModemSessionClient(session, "http://replay", "replay"),
+        port=0,
+        persistent_session=True,
+    )
+    await exporter.update_metrics()
+
+    t0 = time.perf_counter()
+    for _ in range(updates):
+        await exporter.update_metrics()
+    return (time.perf_counter() - t0) / updates
+
+
+@click.command()
+@click.option(
+    "--journal",
+    "-j",
+    "journals",
+    multiple=True,
+    required=True,
+    type=click.Path(exists=True, dir_okay=False),
+)
+@click.option("--updates", default=100)
+@click.option(
+    "--profile",
+    type=click.Path(dir_okay=False),
+    help="Write cProfile statistics of all updates to this file",
+)
+def main(journals: List[str], updates: int, profile: Optional[str]):
+    profiler = cProfile.Profile() if profile else None
+    click.echo(f"{'journal':>40} {'ms/update':>10}")
+    for path in journals:
+        if profiler:
+            profiler.enable()
+        duration = asyncio.run(replay(path, updates))
+        if profiler:
+            profiler.disable()
+        click.echo(f"{path[-40:]:>40} {duration * 1000:>10.2f}")
+
+    if profiler:
+        profiler.dump_stats(profile)
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(15)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+CPU cost of the steps of a scrape, for small, typical and worst-case modems:
+
+  * `parse`: `parse_message` for every line of an event log (cached and uncached),
+  * `build`: the `build()` of the channel and event log models from decoded JSON,
+  * `update`: `Exporter.update_metrics` against the fake modem (includes the HTTP
+    round trips and the fake modem serializing its responses),
+  * `exposition`: rendering the metrics of an update (text, gzip and OpenMetrics).
+
+Event logs have 100, 1k and 100k lines. Results are written as JSON with `--output`
+and compared with earlier results with `--compare` (exits with status 1 when a case
+is slower than `--threshold` times the baseline). Run from the repository root:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --compare results.json --benchmark parse
+"""
+
+import asyncio
+import datetime
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+import click
+from aiohttp.test_utils import TestServer
+from prometheus_client.exposition import CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE,
+)
+from prometheus_client.openmetrics.exposition import (
+    generate_latest as generate_openmetrics,
+)
+
+from sagemcom_f3896_client import log_parser
+from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from sagemcom_f3896_client.exporter import Exporter
+from sagemcom_f3896_client.exposition import CachedExposition
+from sagemcom_f3896_client.models import (
+    EventLogItem,
+    ModemATDMAUpstreamChannelResult,
+    ModemOFDMAUpstreamChannelResult,
+    ModemOFDMDownstreamChannelResult,
+    ModemQAMDownstreamChannelResult,
+)
+from tests.fake_modem import (
+    FakeModem,
+    downstream_channels,
+    event_log,
+    upstream_channels,
+)
+
+"""Channel counts (SC-QAM, OFDM, ATDMA, OFDMA) per modem size."""
+MODEM_SIZES: Dict[str, Dict[str, int]] = {
+    "small": dict(qam_channels=8, ofdm_channels=1, atdma_channels=2, ofdma_channels=1),
+    "typical": dict(
+        qam_channels=31, ofdm_channels=1, atdma_channels=4, ofdma_channels=1
+    ),
+    # the most channels a DOCSIS 3.1 modem bonds
+    "worst": dict(qam_channels=32, ofdm_channels=2, atdma_channels=8, ofdma_channels=2),
+}
+LOG_LINES = (100, 1_000, 100_000)
+BENCHMARKS = ("parse", "build", "update", "exposition")
+
+
+@dataclass
+class Result:
+    benchmark: str
+    case: str
+    params: Dict[str, int]
+    """Calls per repeat and the duration of a call in each repeat (seconds)."""
+    iterations: int
+    timings: List[float] = field(repr=False)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    def to_json(self) -> Dict:
+        return {
+            **asdict(self),
+            "median": self.median,
+            "min": min(self.timings),
+        }
+
+
+def iterations_for(duration: float, min_time: float) -> int:
+    return max(1, int(min_time / max(duration, 1e-9)))
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> tuple:
+    """Duration of a call per repeat, with enough calls per repeat to take `min_time`."""
+    t0 = time.perf_counter()
+    fn()
+    iterations = iterations_for(time.perf_counter() - t0, min_time)
+
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        timings.append((time.perf_counter() - t0) / iterations)
+    return iterations, timings
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[object]], min_time: float, repeat: int
+) -> tuple:
+    t0 = time.perf_counter()
+    await fn()
+    iterations = iterations_for(time.perf_counter() - t0, min_time)
+
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        timings.append((time.perf_counter() - t0) / iterations)
+    return iterations, timings
+
+
+def bench_parse(log_lines: List[int], min_time: float, repeat: int) -> List[Result]:
+    results = []
+    for lines in log_lines:
+        messages = [entry["message"] for entry in event_log(lines)]
+
+        def uncached():
+            for message in messages:
+                log_parser._parse_message(message)
+
+        def cached():
+            for message in messages:
+                log_parser.parse_message(message)
+
+        for case, fn in (("uncached", uncached), ("cached", cached)):
+            results.append(
+                Result(
+                    "parse", case, {"log_lines": lines}, *measure(fn, min_time, repeat)
+                )
+            )
+    return results
+
+
+def bench_build(log_lines: List[int], min_time: float, repeat: int) -> List[Result]:
+    results = []
+    for size, counts in MODEM_SIZES.items():
+        downstreams = downstream_channels(
+            counts["qam_channels"], counts["ofdm_channels"]
+        )
+        upstreams = upstream_channels(
+            counts["atdma_channels"], counts["ofdma_channels"]
+        )
+
+        def build_channels():
+            for e in downstreams:
+                if e["channelType"] == "sc_qam":
+                    ModemQAMDownstreamChannelResult.build(e)
+                else:
+                    ModemOFDMDownstreamChannelResult.build(e)
+            for e in upstreams:
+                if e["channelType"] == "atdma":
+                    ModemATDMAUpstreamChannelResult.build(e)
+                else:
+                    ModemOFDMAUpstreamChannelResult.build(e)
+
+        results.append(
+            Result(
+                "build",
+                f"channels_{size}",
+                {"channels": len(downstreams) + len(upstreams)},
+                *measure(build_channels, min_time, repeat),
+            )
+        )
+
+    for lines in log_lines:
+        entries = event_log(lines)
+
+        def build_log():
+            sorted((EventLogItem.build(e) for e in entries), reverse=True)
+
+        results.append(
+            Result(
+                "build",
+                "event_log",
+                {"log_lines": lines},
+                *measure(build_log, min_time, repeat),
+            )
+        )
+    return results
+
+
+async def with_exporter(
+    counts: Dict[str, int],
+    lines: int,
+    run: Callable[[Exporter], Awaitable[List[Result]]],
+) -> List[Result]:
+    modem = FakeModem(**counts, log_lines=lines)
+    async with (
+        TestServer(modem.app) as server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        # the first update parses the whole event log
+        await exporter.update_metrics()
+        return await run(exporter)
+
+
+def bench_update(log_lines: List[int], min_time: float, repeat: int) -> List[Result]:
+    results = []
+    for size, counts in MODEM_SIZES.items():
+        for lines in log_lines:
+
+            async def run(exporter: Exporter) -> List[Result]:
+                return [
+                    Result(
+                        "update",
+                        f"modem_{size}",
+                        {**counts, "log_lines": lines},
+                        *await measure_async(exporter.update_metrics, min_time, repeat),
+                    )
+                ]
+
+            results.extend(asyncio.run(with_exporter(counts, lines, run)))
+    return results
+
+
+def bench_exposition(
+    log_lines: List[int], min_time: float, repeat: int
+) -> List[Result]:
+    formats = {
+        "text": (generate_latest, CONTENT_TYPE_LATEST, False),
+        "text_gzip": (generate_latest, CONTENT_TYPE_LATEST, True),
+        "openmetrics": (generate_openmetrics, OPENMETRICS_CONTENT_TYPE, False),
+    }
+
+    results = []
+    for size, counts in MODEM_SIZES.items():
+
+        async def run(exporter: Exporter) -> List[Result]:
+            res = []
+            for name, (encoder, content_type, gzipped) in formats.items():
+
+                def render():
+                    # a new exposition per update, rendered on the first scrape
+                    CachedExposition(exporter.registry).render(
+                        encoder, content_type, gzipped
+                    )
+
+                res.append(
+                    Result(
+                        "exposition",
+                        f"{name}_{size}",
+                        counts,
+                        *measure(render, min_time, repeat),
+                    )
+                )
+            return res
+
+        # the log only changes the number of log based series a little
+        results.extend(asyncio.run(with_exporter(counts, min(log_lines), run)))
+    return results
+
+
+RUNNERS = {
+    "parse": bench_parse,
+    "build": bench_build,
+    "update": bench_update,
+    "exposition": bench_exposition,
+}
+
+
+def environment() -> Dict[str, Optional[str]]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "time": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def key(result: Dict) -> tuple:
+    return (
+        result["benchmark"],
+        result["case"],
+        json.dumps(result["params"], sort_keys=True),
+    )
+
+
+def compare(results: List[Dict], baseline: Dict, threshold: float) -> bool:
+    """Print the change per case. Returns whether no case regressed."""
+    previous = {key(r): r for r in baseline["results"]}
+    ok = True
+    click.echo(
+        f"baseline: {baseline['environment'].get('commit')} ({baseline['environment']['time']})"
+    )
+    for result in results:
+        before = previous.get(key(result))
+        if not before:
+            continue
+        ratio = result["median"] / before["median"]
+        regressed = ratio > threshold
+        ok = ok and not regressed
+        click.echo(
+            f"{result['benchmark']:>10} {result['case']:>20} {format_params(result['params']):>28} "
+            f"{ratio:>6.2f}x{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def format_params(params: Dict[str, int]) -> str:
+    if "log_lines" in params and len(params) == 1:
+        return f"{params['log_lines']} lines"
+    channels = sum(v for k, v in params.items() if k.endswith("_channels"))
+    if "log_lines" in params:
+        return f"{channels} ch, {params['log_lines']} lines"
+    if "channels" in params:
+        return f"{params['channels']} ch"
+    return f"{channels} ch"
+
+
+@click.command()
+@click.option(
+    "--benchmark",
+    "-b",
+    multiple=True,
+    type=click.Choice(BENCHMARKS),
+    default=BENCHMARKS,
+)
+@click.option("--log-lines", "-l", multiple=True, type=int, default=LOG_LINES)
+@click.option("--min-time", default=0.2, help="Minimum duration of a repeat (seconds)")
+@click.option("--repeat", default=5)
+@click.option(
+    "--output", "-o", type=click.Path(dir_okay=False), help="Write JSON results"
+)
+@click.option(
+    "--compare",
+    "baseline_path",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare with earlier JSON results",
+)
+@click.option("--threshold", default=1.25, help="Slowdown that counts as a regression")
+def main(
+    benchmark: List[str],
+    log_lines: List[int],
+    min_time: float,
+    repeat: int,
+    output: Optional[str],
+    baseline_path: Optional[str],
+    threshold: float,
+):
+    results = []
+    click.echo(
+        f"{'benchmark':>10} {'case':>20} {'size':>28} {'median (us)':>12} {'min (us)':>10}"
+    )
+    for name in benchmark:
+        for result in RUNNERS[name](sorted(log_lines), min_time, repeat):
+            click.echo(
+                f"{result.benchmark:>10} {result.case:>20} {format_params(result.params):>28} "
+                f"{result.median * 1e6:>12.1f} {min(result.timings) * 1e6:>10.1f}"
+            )
+            results.append(result.to_json())
+
+    document = {"environment": environment(), "results": results}
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2)
+        click.echo(f"Wrote {len(results)} results to {output}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+from typing import Iterable, List, Optional, Sequence
+
+from sagemcom_f3896_client.models import EventLogItem
+
+LOG = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS event_log (
+    id INTEGER PRIMARY KEY,
+    -- unix time, for ordering and range queries
+    time REAL NOT NULL,
+    -- time as reported by the modem (including the UTC offset)
+    time_text TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS event_log_time_message
+    ON event_log (time, message, priority);
+CREATE INDEX IF NOT EXISTS event_log_priority_time ON event_log (priority, time);
+"""
+
+
+class EventLogArchive:
+    """
+    Append-only SQLite archive of event log entries.
+
+    The modem only keeps its most recent entries. Entries are stored once: entries
+    that are already present (same time, message and priority) are ignored. The
+    methods block, call them with `asyncio.to_thread` from async code.
+    """
+
+    path: str
+    __connection: sqlite3.Connection
+    __lock: threading.Lock
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = str(path)
+        self.__connection = sqlite3.connect(self.path, check_same_thread=False)
+        self.__lock = threading.Lock()
+
+        with self.__lock, self.__connection:
+            self.__connection.execute("PRAGMA journal_mode=WAL")
+            self.__connection.executescript(SCHEMA)
+
+    def add(self, entries: Iterable[EventLogItem]) -> List[EventLogItem]:
+        """Store the entries in one transaction. Returns the entries that were not archived before."""
+        added = []
+        with self.__lock, self.__connection:
+            for entry in entries:
+                cursor = self.__connection.execute(
+                    "INSERT OR IGNORE INTO event_log (time, time_text, priority, message) VALUES (?, ?, ?, ?)",
+                    (
+                        entry.time.timestamp(),
+                        entry.time.isoformat(),
+                        entry.priority,
+                        entry.message,
+                    ),
+                )
+                if cursor.rowcount:
+                    added.append(entry)
+
+        if added:
+            LOG.debug("Archived %d event log entries", len(added))
+        return added
+
+    def query(
+        self,
+        since: Optional[datetime.datetime] = None,
+        until: Optional[datetime.datetime] = None,
+        priorities: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[EventLogItem]:
+        """Entries in [since, until) with one of the priorities, newest first (like `modem_event_log`)."""
+        conditions = []
+        params: list = []
+        if since:
+            conditions.append("time >= ?")
+            params.append(since.timestamp())
+        if until:
+            conditions.append("time < ?")
+            params.append(until.timestamp())
+        if priorities:
+            conditions.append(f"priority IN ({', '.join('?' * len(priorities))})")
+            params.extend(priorities)
+
+        sql = "SELECT time_text, priority, message FROM event_log"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY time DESC, priority DESC, message DESC LIMIT ? OFFSET ?"
+        params.extend([limit if limit is not None else -1, offset])
+
+        with self.__lock:
+            rows = self.__connection.execute(sql, params).fetchall()
+
+        return [
+            EventLogItem(
+                time=datetime.datetime.fromisoformat(time_text),
+                priority=priority,
+                message=message,
+            )
+            for time_text, priority, message in rows
+        ]
+
+    def __len__(self) -> int:
+        with self.__lock:
+            return self.__connection.execute(
+                "SELECT COUNT(*) FROM event_log"
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
@@ -0,0 +1,236 @@
+"""
+Record the requests of a session client to a journal and replay them.
+
+The journal has one JSON document per line (gzip compressed when the path ends in
+`.gz`): a header, followed by an entry per request with the time since the start of
+the capture, the request and response bodies, the status and the duration. Passwords
+and tokens are redacted, also from the paths of token requests.
+
+`ReplaySession` takes the place of the `aiohttp.ClientSession` of a
+`SagemcomModemSessionClient` and answers with the recorded responses.
+"""
+
+import asyncio
+import collections
+import datetime
+import gzip
+import json
+import logging
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import IO, Any, AsyncGenerator, Deque, Dict, Iterable, List, Optional
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+LOG = logging.getLogger(__name__)
+
+JOURNAL_VERSION = 1
+REDACTED = "<redacted>"
+"""Keys of request and response bodies with credentials."""
+REDACTED_KEYS = frozenset(["password", "newPassword", "token"])
+
+
+def redact(value: Any) -> Any:
+    """A copy of a JSON document with the values of `REDACTED_KEYS` replaced."""
+    if isinstance(value, dict):
+        return {
+            k: REDACTED if k in REDACTED_KEYS else redact(v) for k, v in value.items()
+        }
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class CaptureJournal:
+    """Writes the requests of session clients to a journal file."""
+
+    path: str
+    """Requests that were written."""
+    count: int = 0
+
+    __file: IO[str]
+    __start: float
+
+    def __init__(self, path: str | os.PathLike) -> None:
+        self.path = str(path)
+        self.__file = _open(self.path, "w")
+        self.__start = time.perf_counter()
+        self.__write(
+            {
+                "version": JOURNAL_VERSION,
+                "started": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            }
+        )
+
+    def __write(self, document: Dict) -> None:
+        self.__file.write(json.dumps(document, separators=(",", ":")) + "\n")
+
+    def record(
+        self,
+        method: str,
+        endpoint: str,
+        request: Optional[object],
+        status: int,
+        body: bytes,
+        duration: float,
+    ) -> None:
+        """
+        Write a request. `endpoint` is the path with placeholders for ids and tokens,
+        `body` the raw response body.
+        """
+        try:
+            response = json.loads(body) if body.strip() else None
+        except ValueError:
+            response = body.decode("utf-8", errors="replace")
+
+        self.__write(
+            {
+                "t": round(time.perf_counter() - self.__start - duration, 6),
+                "method": method,
+                "endpoint": endpoint,
+                "status": status,
+                "duration": round(duration, 6),
+                "request": redact(request),
+                "response": redact(response),
+            }
+        )
+        self.count += 1
+
+    def close(self) -> None:
+        self.__file.close()
+
+
+def read_journal(path: str | os.PathLike) -> List[Dict]:
+    """The entries of a journal."""
+    with _open(str(path), "r") as f:
+        header = json.loads(f.readline())
+        if header.get("version") != JOURNAL_VERSION:
+            raise ValueError(f"Unsupported journal version: {header.get('version')}")
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class ReplayResponse:
+    """The parts of `aiohttp.ClientResponse` that the session client uses."""
+
+    method: str
+    url: URL
+    status: int
+    reason: str
+    __body: bytes
+
+    def __init__(self, method: str, url: URL, status: int, body: bytes) -> None:
+        self.method = method
+        self.url = url
+        self.status = status
+        self.reason = "Replayed"
+        self.__body = body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    async def read(self) -> bytes:
+        return self.__body
+
+    def raise_for_status(self) -> None:
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                aiohttp.RequestInfo(
+                    self.url, self.method, CIMultiDictProxy(CIMultiDict()), self.url
+                ),
+                (),
+                status=self.status,
+                message=self.reason,
+            )
+
+
+class ReplaySession:
+    """
+    Answers requests with the responses of a journal, for a `SagemcomModemSessionClient`.
+
+    The requests for an endpoint get the recorded responses for that endpoint in order,
+    starting over when they run out. A response takes the recorded duration divided by
+    `speed` (0: answer immediately).
+    """
+
+    speed: float
+    """Requests that were answered."""
+    count: int = 0
+
+    __responses: Dict[tuple, Deque[Dict]]
+    __recorded: Dict[tuple, List[Dict]]
+    __endpoints: List[tuple]
+
+    def __init__(self, entries: Iterable[Dict], speed: float = 1.0) -> None:
+        self.speed = speed
+        self.__recorded = collections.defaultdict(list)
+        for entry in entries:
+            self.__recorded[(entry["method"], entry["endpoint"])].append(entry)
+        self.__responses = {
+            key: collections.deque(recorded)
+            for key, recorded in self.__recorded.items()
+        }
+        # placeholders (e.g. `{token}`) match one path segment
+        self.__endpoints = [
+            (
+                method,
+                endpoint,
+                re.compile(
+                    re.sub(r"\\\{\w+\\\}", "[^/]+", re.escape(endpoint.lstrip("/")))
+                    + "$"
+                ),
+            )
+            for method, endpoint in self.__recorded
+        ]
+
+    @staticmethod
+    def from_journal(path: str | os.PathLike, speed: float = 1.0) -> "ReplaySession":
+        return ReplaySession(read_journal(path), speed=speed)
+
+    def __entry(self, method: str, url: URL) -> Dict:
+        for endpoint_method, endpoint, pattern in self.__endpoints:
+            if endpoint_method == method and pattern.search(url.path):
+                key = (method, endpoint)
+                if not self.__responses[key]:
+                    LOG.debug("Replaying %s %s from the start", method, endpoint)
+                    self.__responses[key].extend(self.__recorded[key])
+                return self.__responses[key].popleft()
+
+        raise aiohttp.ClientResponseError(
+            aiohttp.RequestInfo(url, method, CIMultiDictProxy(CIMultiDict()), url),
+            (),
+            status=404,
+            message=f"{method} {url.path} is not in the journal",
+        )
+
+    @asynccontextmanager
+    async def request(
+        self, method: str, url: str, **kwargs
+    ) -> AsyncGenerator[ReplayResponse, None]:
+        url = URL(url)
+        entry = self.__entry(method, url)
+        if self.speed:
+            await asyncio.sleep(entry["duration"] / self.speed)
+
+        self.count += 1
+        response = entry["response"]
+        if response is None:
+            body = b""
+        elif isinstance(response, str):
+            body = response.encode("utf-8")
+        else:
+            body = json.dumps(response).encode("utf-8")
+        yield ReplayResponse(method, url, entry["status"], body)
+
+    async def close(self) -> None:
+        pass
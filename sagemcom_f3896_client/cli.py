@@ -2,12 +2,21 @@ import asyncio
 import datetime
 import json
 import re
+import sys
 import time
+from typing import Dict, List, Optional, Sequence, Tuple
 
 import aiohttp
 import click
 
-from sagemcom_f3896_client.models import EventLogItem
+from sagemcom_f3896_client.archive import EventLogArchive
+from sagemcom_f3896_client.client import SNAPSHOT_CONCURRENCY
+from sagemcom_f3896_client.exception import LoginFailedException
+from sagemcom_f3896_client.models import (
+    EventLogItem,
+    ModemDownstreamChannelResult,
+    ModemUpstreamChannelResult,
+)
 from sagemcom_f3896_client.util import build_client
 
 RE_MAC_ADDRESS: re.Pattern = re.compile(
@@ -59,10 +68,44 @@ async def print_log(
     dump_bbcode: bool = False,
     limit: int = 10,
     remove_mac: bool = False,
+    archive_path: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    priorities: Sequence[str] = (),
+    fetch: bool = True,
 ):
-    """(pretty) print the modem log."""
+    """
+    (pretty) print the modem log.
+
+    With an archive, the entries of the modem are added to the archive and the
+    archived entries are printed.
+    """
     async with build_client() as client:
-        entries = await client.modem_event_log()
+        entries = await client.modem_event_log() if fetch else []
+
+        if archive_path:
+            archive = EventLogArchive(archive_path)
+            try:
+                added = await asyncio.to_thread(archive.add, entries)
+                if fetch:
+                    click.echo(f"Archived {len(added)} new entries", err=True)
+                entries = await asyncio.to_thread(
+                    archive.query,
+                    since=since,
+                    until=until,
+                    priorities=priorities,
+                    limit=limit if limit > 0 else None,
+                )
+            finally:
+                archive.close()
+        else:
+            entries = [
+                entry
+                for entry in entries
+                if (not since or entry.time >= since)
+                and (not until or entry.time < until)
+                and (not priorities or entry.priority in priorities)
+            ]
 
         def clean_message(entry: EventLogItem) -> str:
             return (
@@ -104,8 +147,9 @@ async def print_log(
 
 async def print_status():
     async with build_client() as client:
-        system_state = await client.system_state()
-        system_info = await client.system_info()
+        system_state, system_info = await asyncio.gather(
+            client.system_state(), client.system_info()
+        )
         click.echo("| ---------------- | ---------------------------- |")
         click.echo(f"| Model            | {system_info.model_name:>28} |")
         click.echo(f"| MAC address      | {system_state.mac_address:>28} |")
@@ -144,6 +188,183 @@ async def print_service_flows():
         )
 
 
+async def print_snapshots(
+    targets: Sequence[Optional[str]],
+    output_format: str = "json",
+    event_log: bool = False,
+    max_concurrency: int = SNAPSHOT_CONCURRENCY,
+) -> bool:
+    """
+    Print a snapshot of each modem (`None`: `MODEM_URL`), fetched concurrently. With
+    `ndjson` a line per modem is printed as soon as its snapshot is complete. A modem
+    that fails gets a document with an `error`. Returns whether all snapshots succeeded.
+    """
+
+    async def snapshot(target: Optional[str]) -> Dict:
+        client = build_client(base_url=target)
+        try:
+            async with client as session_client:
+                result = await session_client.snapshot(
+                    event_log=event_log, max_concurrency=max_concurrency
+                )
+            return {"url": client.base_url, **result.to_json()}
+        except (
+            aiohttp.ClientError,
+            asyncio.TimeoutError,
+            LoginFailedException,
+        ) as e:
+            return {"url": client.base_url, "error": str(e) or e.__class__.__name__}
+
+    documents = []
+    for task in asyncio.as_completed([snapshot(target) for target in targets]):
+        document = await task
+        documents.append(document)
+        if output_format == "ndjson":
+            click.echo(json.dumps(document, separators=(",", ":")))
+
+    if output_format == "json":
+        click.echo(
+            json.dumps(documents[0] if len(documents) == 1 else documents, indent=2)
+        )
+    return all("error" not in document for document in documents)
+
+
+def with_delta(
+    value: float, previous: Optional[float], width: int, counter: bool = False
+) -> str:
+    """
+    A value and its change since the previous refresh: red when a counter went up,
+    yellow for other changes.
+    """
+    text = f"{value:>{width}}"
+    if previous is None or value == previous:
+        return text + " " * 8
+    delta = value - previous
+    return text + click.style(
+        f" {round(delta, 1):>+7}", fg="red" if counter and delta > 0 else "yellow"
+    )
+
+
+def watch_lines(
+    downstreams: List[ModemDownstreamChannelResult],
+    upstreams: List[ModemUpstreamChannelResult],
+    previous: Dict[
+        Tuple[str, int], ModemDownstreamChannelResult | ModemUpstreamChannelResult
+    ],
+) -> List[str]:
+    """The lines of the channel tables of `watch`, with the changes since `previous`."""
+    lines = [
+        click.style(
+            f"{'type':<6} {'id':>3} {'frequency':>9} {'power':>13} {'rx mer':>12} {'lock':>8} {'corrected':>18} {'uncorrected':>18}",
+            bold=True,
+        )
+    ]
+    for ch in downstreams:
+        last = previous.get((ch.channel_type, ch.channel_id))
+        lock_status = "locked" if ch.lock_status else "unlocked"
+        lines.append(
+            f"{ch.channel_type:<6} {ch.channel_id:>3} {ch.frequency:>9} "
+            f"{with_delta(ch.power, last and last.power, 5)} "
+            f"{with_delta(ch.rx_mer, last and last.rx_mer, 4)} {lock_status:>8} "
+            f"{with_delta(ch.corrected_errors, last and last.corrected_errors, 10, True)} "
+            f"{with_delta(ch.uncorrected_errors, last and last.uncorrected_errors, 10, True)}"
+        )
+
+    lines.append(
+        click.style(
+            f"{'type':<6} {'id':>3} {'frequency':>9} {'power':>13} {'lock':>8} {'t3 timeouts':>18} {'t4 timeouts':>18}",
+            bold=True,
+        )
+    )
+    for ch in upstreams:
+        last = previous.get((ch.channel_type, ch.channel_id))
+        lock_status = "locked" if ch.lock_status else "unlocked"
+        lines.append(
+            f"{ch.channel_type:<6} {ch.channel_id:>3} {ch.frequency:>9} "
+            f"{with_delta(round(ch.power, 1), last and round(last.power, 1), 5)} {lock_status:>8} "
+            f"{with_delta(ch.t3_timeouts, last and last.t3_timeouts, 10, True)} "
+            f"{with_delta(ch.t4_timeouts, last and last.t4_timeouts, 10, True)}"
+        )
+    return lines
+
+
+class WatchScreen:
+    """
+    Draws the lines of `watch`. On a terminal only the lines that changed are
+    redrawn (all lines when the number of lines changed). Otherwise the changed
+    lines are printed below each other.
+    """
+
+    interactive: bool
+    __lines: List[str]
+
+    def __init__(self, interactive: bool) -> None:
+        self.interactive = interactive
+        self.__lines = []
+
+    def render(self, lines: List[str]) -> str:
+        """The output that turns the previous lines into `lines`."""
+        previous, self.__lines = self.__lines, lines
+        if not self.interactive:
+            return "".join(
+                f"{line}\n"
+                for idx, line in enumerate(lines)
+                if idx >= len(previous) or previous[idx] != line
+            )
+
+        if len(lines) != len(previous):
+            # move to the first line, clear the screen below it and draw all lines
+            clear = f"\x1b[{len(previous)}F\x1b[J" if previous else ""
+            return clear + "".join(f"{line}\n" for line in lines)
+
+        output = []
+        for idx, line in enumerate(lines):
+            if line != previous[idx]:
+                up = len(lines) - idx
+                # to the start of the line, clear it, draw it and move back down
+                output.append(f"\x1b[{up}F\x1b[2K{line}\x1b[{up}E")
+        return "".join(output)
+
+
+async def watch_channels(
+    interval: float, count: int = 0, interactive: Optional[bool] = None
+) -> None:
+    """
+    Refresh the channel tables every `interval` seconds (`count` times, 0: until
+    interrupted) with one client and session. Logs out when done.
+    """
+    screen = WatchScreen(sys.stdout.isatty() if interactive is None else interactive)
+    previous: Dict[
+        Tuple[str, int], ModemDownstreamChannelResult | ModemUpstreamChannelResult
+    ] = {}
+    refreshes = 0
+
+    # the channel endpoints do not require a login: re-use the connections
+    async with build_client(keep_alive=True, token_refresh_after=240) as client:
+        while True:
+            state, downstreams, upstreams = await asyncio.gather(
+                client.system_state(),
+                client.modem_downstreams(),
+                client.modem_upstreams(),
+            )
+            status = (
+                f"{datetime.datetime.now().strftime('%H:%M:%S')} {state.status}, "
+                f"up {datetime.timedelta(seconds=state.up_time)}, "
+                f"connections: {client.connections_created} (ctrl-c to quit)"
+            )
+            click.echo(
+                screen.render([status] + watch_lines(downstreams, upstreams, previous)),
+                nl=False,
+            )
+            previous = {(ch.channel_type, ch.channel_id): ch for ch in downstreams}
+            previous.update(((ch.channel_type, ch.channel_id), ch) for ch in upstreams)
+
+            refreshes += 1
+            if count and refreshes >= count:
+                break
+            await asyncio.sleep(interval)
+
+
 async def do_reboot():
     t0 = time.time()
     click.echo("Rebooting modem...", color="red")
@@ -187,19 +408,51 @@ def cli(verbose):
 @click.option("--dump-bbcode/--no-dump-bbcode", default=False)
 @click.option("--limit", default=999)
 @click.option("--remove-mac/--print-mac", default=True)
+@click.option(
+    "--archive",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Add the entries to this SQLite archive and print from the archive",
+)
+@click.option("--since", type=click.DateTime(), help="Only entries from this time")
+@click.option("--until", type=click.DateTime(), help="Only entries before this time")
+@click.option(
+    "--priority",
+    multiple=True,
+    type=click.Choice(["alert", "critical", "error", "warning", "notice"]),
+)
+@click.option(
+    "--fetch/--no-fetch",
+    default=True,
+    help="With --archive: fetch the modem log first",
+)
 @cli.command()
 def logs(
     dump_json: bool = False,
     dump_bbcode: bool = False,
     limit: int = 10,
     remove_mac: bool = False,
+    archive: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    priority: Sequence[str] = (),
+    fetch: bool = True,
 ):
+    if not fetch and not archive:
+        raise click.UsageError("--no-fetch requires --archive")
+
     asyncio.run(
         print_log(
             dump_json=dump_json,
             dump_bbcode=dump_bbcode,
             limit=limit,
             remove_mac=remove_mac,
+            archive_path=archive,
+            # local time
+            since=since.astimezone() if since else None,
+            until=until.astimezone() if until else None,
+            priorities=priority,
+            fetch=fetch,
         )
     )
 
@@ -229,5 +482,54 @@ def reboot():
     asyncio.run(do_reboot())
 
 
+@click.option(
+    "--target",
+    "-t",
+    "targets",
+    multiple=True,
+    help="URL of a modem (repeatable, default from MODEM_URL)",
+)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["json", "ndjson"]),
+    default="json",
+    help="json: one document (a list for several targets), ndjson: a line per modem",
+)
+@click.option("--event-log/--no-event-log", default=False)
+@click.option(
+    "--max-concurrency",
+    type=click.IntRange(min=1),
+    default=SNAPSHOT_CONCURRENCY,
+    help="Requests per modem at the same time",
+)
+@cli.command()
+def snapshot(
+    targets: Sequence[str], output_format: str, event_log: bool, max_concurrency: int
+):
+    """Print the state, channels, service flows and provisioning of modems as JSON."""
+    if not asyncio.run(
+        print_snapshots(
+            targets or [None],
+            output_format=output_format,
+            event_log=event_log,
+            max_concurrency=max_concurrency,
+        )
+    ):
+        sys.exit(1)
+
+
+@click.option("--interval", "-n", default=5.0, help="Seconds between refreshes")
+@click.option("--count", default=0, help="Stop after N refreshes (0: until ctrl-c)")
+@cli.command()
+def watch(interval: float, count: int):
+    """Refresh the channel tables with one session, highlighting the changes."""
+    try:
+        asyncio.run(watch_channels(interval, count))
+    except KeyboardInterrupt:
+        # the session was logged out when the task was cancelled
+        click.echo()
+
+
 if __name__ == "__main__":
     cli()
@@ -1,12 +1,24 @@
 import asyncio
+import datetime
+import json
 import logging
 import time
+import types
 from contextlib import asynccontextmanager
-from contextvars import ContextVar
-from typing import AsyncGenerator, Dict, List, Literal, Optional
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Dict,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+)
 
 import aiohttp
 
+from sagemcom_f3896_client.capture import CaptureJournal
 from sagemcom_f3896_client.exception import LoginFailedException
 
 from .models import (
@@ -16,6 +28,7 @@ from .models import (
     ModemOFDMDownstreamChannelResult,
     ModemQAMDownstreamChannelResult,
     ModemServiceFlowResult,
+    ModemSnapshot,
     ModemStateResult,
     SystemInfoResult,
     SystemProvisioningResponse,
@@ -25,6 +38,26 @@ from .models import (
 
 LOG = logging.getLogger(__name__)
 
+"""Decodes a JSON document from the bytes of a response body."""
+JsonLoads = Callable[[bytes], Any]
+
+try:
+    import orjson
+
+    DEFAULT_JSON_LOADS: JsonLoads = orjson.loads
+except ImportError:
+    DEFAULT_JSON_LOADS = json.loads
+
+"""
+Suggested cache TTLs (seconds) per GET path. The system info does not change while the
+modem runs. The event log is shared between consumers that read it shortly after
+each other (e.g. the exporter's index page and metrics).
+"""
+DEFAULT_CACHE_TTL: Dict[str, float] = {
+    "/rest/v1/system/info": 3600.0,
+    "/rest/v1/cablemodem/eventlog": 5.0,
+}
+
 
 UNAUTHORIZED_ENDPOINTS = set(
     [
@@ -45,26 +78,201 @@ for endpoint in UNAUTHORIZED_ENDPOINTS:
     assert not endpoint.startswith("/"), "URLs should be relative"
 
 
+# Seconds an idle connection is kept open in keep-alive mode.
+KEEPALIVE_TIMEOUT = 10
+"""Requests that `snapshot` sends to the modem at the same time."""
+SNAPSHOT_CONCURRENCY = 4
+
+
+class RequestHooks:
+    """
+    Instrumentation hooks of `SagemcomModemSessionClient`. The methods do nothing,
+    override the ones you need. Durations are measured with `time.perf_counter`.
+    """
+
+    def request_started(self, method: str, endpoint: str) -> None:
+        """A request is sent. `endpoint` is the path, with placeholders for ids and tokens."""
+
+    def request_finished(
+        self, method: str, endpoint: str, status: int | str, duration: float
+    ) -> None:
+        """
+        A request finished, after its body was read. `status` is the HTTP status, or
+        "timeout", "error" or "cancelled" when there is no (complete) response.
+        """
+
+    def login_finished(self, duration: float, success: bool) -> None:
+        """A login (including its request) finished."""
+
+
+class CombinedRequestHooks(RequestHooks):
+    """Calls the methods of several `RequestHooks`, in order."""
+
+    hooks: Tuple[RequestHooks, ...]
+
+    def __init__(self, *hooks: RequestHooks) -> None:
+        self.hooks = hooks
+
+    def request_started(self, method: str, endpoint: str) -> None:
+        for hooks in self.hooks:
+            hooks.request_started(method, endpoint)
+
+    def request_finished(
+        self, method: str, endpoint: str, status: int | str, duration: float
+    ) -> None:
+        for hooks in self.hooks:
+            hooks.request_finished(method, endpoint, status, duration)
+
+    def login_finished(self, duration: float, success: bool) -> None:
+        for hooks in self.hooks:
+            hooks.login_finished(duration, success)
+
+
 def requires_auth(path: str) -> bool:
     return path not in UNAUTHORIZED_ENDPOINTS
 
 
+async def _on_connection_create_end(session, context, params) -> None:
+    if isinstance(context.trace_request_ctx, SagemcomModemSessionClient):
+        context.trace_request_ctx.connections_created += 1
+
+
+async def _on_connection_reuseconn(session, context, params) -> None:
+    if isinstance(context.trace_request_ctx, SagemcomModemSessionClient):
+        context.trace_request_ctx.connections_reused += 1
+
+
+# Counts the connections that are created and re-used by each session client.
+CONNECTION_TRACE_CONFIG = aiohttp.TraceConfig()
+CONNECTION_TRACE_CONFIG.on_connection_create_end.append(_on_connection_create_end)
+CONNECTION_TRACE_CONFIG.on_connection_reuseconn.append(_on_connection_reuseconn)
+
+
+def build_session(
+    timeout: float,
+    keep_alive: bool = False,
+    pool_size: int = 4,
+    connector: Optional[aiohttp.BaseConnector] = None,
+) -> aiohttp.ClientSession:
+    """
+    Build a HTTP session for talking to modems.
+
+    By default every request uses a new connection. With `keep_alive`, at most
+    `pool_size` connections per modem are kept open and re-used. Sessions can share
+    a `connector` (see `build_connector`), which is not closed with the session.
+    """
+    return aiohttp.ClientSession(
+        timeout=aiohttp.ClientTimeout(total=timeout),
+        connector=connector or build_connector(keep_alive, pool_size),
+        connector_owner=connector is None,
+        trace_configs=[CONNECTION_TRACE_CONFIG],
+    )
+
+
+def build_connector(
+    keep_alive: bool = False, pool_size: int = 4
+) -> aiohttp.TCPConnector:
+    """The connector of `build_session`, to share between sessions."""
+    if keep_alive:
+        return aiohttp.TCPConnector(
+            limit_per_host=pool_size, keepalive_timeout=KEEPALIVE_TIMEOUT
+        )
+    return aiohttp.TCPConnector(limit_per_host=30, force_close=True)
+
+
 class SagemcomModemSessionClient:
     __session: aiohttp.ClientSession
     base_url: str
     password: str
     authorization: Optional[UserAuthorisationResult] = None
 
-    __login_semaphore = asyncio.Semaphore(1)
+    """Refresh the session token when it is older than this (seconds). Disabled when not set."""
+    token_refresh_after: Optional[float] = None
+    """Monotonic time at which the current session token was obtained."""
+    authorization_time: Optional[float] = None
+
+    """Number of logins, proactive token refreshes and re-logins after a rejected token."""
+    login_count: int = 0
+    token_refresh_count: int = 0
+    reauth_count: int = 0
+    """Duration of the last login and the last token refresh/re-login (seconds)."""
+    last_login_duration: Optional[float] = None
+    last_reauth_duration: Optional[float] = None
+
+    """Connections opened and re-used for requests (when the session uses `CONNECTION_TRACE_CONFIG`)."""
+    connections_created: int = 0
+    connections_reused: int = 0
+    """Requests that were retried because the modem closed a kept-alive connection."""
+    stale_connection_retries: int = 0
+
+    """Decoder for response bodies (orjson when installed, otherwise `json.loads`)."""
+    json_loads: JsonLoads
+    """Instrumentation of requests and logins."""
+    hooks: RequestHooks
+    """Journal that every request is written to (disabled when not set)."""
+    capture: Optional[CaptureJournal] = None
+
+    """
+    TTL (seconds) of cached responses per GET path. When set, concurrent identical GETs
+    share one request and paths with a TTL are served from the cache. Disabled when
+    not set.
+    """
+    cache_ttl: Optional[Dict[str, float]] = None
+    """GETs served from the cache, sent to the modem, and that waited for an identical request."""
+    cache_hits: int = 0
+    cache_misses: int = 0
+    cache_coalesced: int = 0
+
+    __login_semaphore: asyncio.Semaphore
+    """path -> (expiry (monotonic), decoded body)"""
+    __cache: Dict[str, Tuple[float, Any]]
+    __in_flight: Dict[str, asyncio.Task]
 
     def __init__(
-        self, session: aiohttp.ClientSession, base_url: str, password: str
+        self,
+        session: aiohttp.ClientSession,
+        base_url: str,
+        password: str,
+        token_refresh_after: Optional[float] = None,
+        json_loads: Optional[JsonLoads] = None,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        hooks: Optional[RequestHooks] = None,
+        capture: Optional[CaptureJournal] = None,
     ) -> None:
         assert session
         self.__session = session
+        # per instance: logins to different modems should not wait for each other
+        self.__login_semaphore = asyncio.Semaphore(1)
 
         self.base_url = base_url
         self.password = password
+        self.token_refresh_after = token_refresh_after
+        self.json_loads = json_loads or DEFAULT_JSON_LOADS
+        self.cache_ttl = cache_ttl
+        self.hooks = hooks or RequestHooks()
+        self.capture = capture
+        self.__cache = {}
+        self.__in_flight = {}
+
+    @property
+    def connection_reuse_ratio(self) -> Optional[float]:
+        """Fraction of requests that re-used a connection, None before the first request."""
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else None
+
+    @property
+    def token_age(self) -> Optional[float]:
+        """Age of the session token in seconds, None when not logged in."""
+        if not self.authorization or self.authorization_time is None:
+            return None
+        return time.monotonic() - self.authorization_time
+
+    def __token_expiring(self) -> bool:
+        return (
+            self.token_refresh_after is not None
+            and self.token_age is not None
+            and self.token_age > self.token_refresh_after
+        )
 
     def __headers(self) -> Dict[str, str]:
         return {
@@ -74,18 +282,70 @@ class SagemcomModemSessionClient:
         }
 
     async def _login(self) -> Dict[str, str]:
+        t0 = time.monotonic()
+        success = False
         try:
             async with self.__request(
                 "POST", "/rest/v1/user/login", {"password": self.password}
             ) as res:
                 assert res.status == 201
 
-                body = await res.json()
+                body = await self.__json(res)
                 self.authorization = UserAuthorisationResult.build(body)
+                self.authorization_time = time.monotonic()
+                self.login_count += 1
+                self.last_login_duration = self.authorization_time - t0
+                success = True
         except aiohttp.ClientResponseError as e:
             raise LoginFailedException(
                 "Failed to login to modem at %s" % self.base_url
             ) from e
+        finally:
+            self.hooks.login_finished(time.monotonic() - t0, success)
+
+    async def __refresh_token(self) -> None:
+        """Replace the session token before it expires, logging in again when that fails."""
+        t0 = time.monotonic()
+        try:
+            LOG.debug(
+                "Refreshing session token of age %.1fs for userId=%d",
+                self.token_age,
+                self.authorization.user_id,
+            )
+            user_id, old_token = self.authorization.user_id, self.authorization.token
+            await self.user_tokens(user_id, self.password)
+            self.authorization_time = time.monotonic()
+            self.token_refresh_count += 1
+        except (aiohttp.ClientResponseError, AssertionError):
+            LOG.info("Failed to refresh session token, logging in again", exc_info=True)
+            # the old token may still be a session on the modem
+            await self.__delete_replaced_token(user_id, old_token)
+            self.authorization = None
+            await self._login()
+        else:
+            # every token is a session on the modem: close the session of the old token
+            await self.__delete_replaced_token(user_id, old_token)
+        self.last_reauth_duration = time.monotonic() - t0
+
+    async def __delete_replaced_token(self, user_id: int, token: str) -> None:
+        """Close the session of a token that is no longer used (best effort)."""
+        try:
+            await self.delete_token(user_id, token)
+        except (aiohttp.ClientError, asyncio.TimeoutError, AssertionError):
+            LOG.debug("Failed to delete the replaced session token", exc_info=True)
+
+    async def __reauthenticate(self, rejected: UserAuthorisationResult) -> None:
+        """Log in again after the modem rejected the session token."""
+        async with self.__login_semaphore:
+            # re-check since a parallel request may already have logged in again. The
+            # session may also have been logged out (e.g. by a concurrent `_logout`).
+            if self.authorization is None or self.authorization is rejected:
+                LOG.info("Session token was rejected by the modem, logging in again")
+                t0 = time.monotonic()
+                self.authorization = None
+                await self._login()
+                self.reauth_count += 1
+                self.last_reauth_duration = time.monotonic() - t0
 
     async def user_tokens(self, user_id, password) -> UserTokenResult:
         async with self.__request(
@@ -93,9 +353,10 @@ class SagemcomModemSessionClient:
             f"/rest/v1/user/{user_id}/tokens",
             {"password": password},
             disable_auth=True,
+            endpoint="/rest/v1/user/{user_id}/tokens",
         ) as res:
             assert res.status == 201
-            result = UserTokenResult.build(await res.json())
+            result = UserTokenResult.build(await self.__json(res))
             # Update the token we use iff it got replaced
             if self.authorization and self.authorization.user_id == user_id:
                 self.authorization.token = result.token
@@ -103,8 +364,12 @@ class SagemcomModemSessionClient:
             return result
 
     async def delete_token(self, user_id, token) -> None:
+        # do not log in again: this is called during logout (with the login lock held)
         async with self.__request(
-            "DELETE", f"/rest/v1/user/{user_id}/token/{token}"
+            "DELETE",
+            f"/rest/v1/user/{user_id}/token/{token}",
+            reauthenticate=False,
+            endpoint="/rest/v1/user/{user_id}/token/{token}",
         ) as res:
             assert res.status == 204
 
@@ -140,14 +405,19 @@ class SagemcomModemSessionClient:
         json: Optional[object] = None,
         raise_for_status: bool = True,
         disable_auth: bool = False,
+        reauthenticate: bool = True,
+        endpoint: Optional[str] = None,
     ) -> AsyncGenerator[aiohttp.ClientResponse, None]:
+        """`endpoint` identifies the request in the hooks, the path when not set."""
+        endpoint = endpoint or path
         path = path[1:] if path.startswith("/") else path
         url = f"{self.base_url if not self.base_url.endswith('/') else self.base_url[:-1]}/{path}"
+        authenticated = not disable_auth and requires_auth(path)
 
         headers = self.__headers()
-        if not disable_auth and requires_auth(path):
+        if authenticated and reauthenticate:
             # log in because this endpoint requires authentication
-            if not self.authorization:
+            if not self.authorization or self.__token_expiring():
                 async with self.__login_semaphore:
                     # re-check since parallel thread that was also waiting may have logged in
                     if not self.authorization:
@@ -155,136 +425,353 @@ class SagemcomModemSessionClient:
                             "logging in because '%s' requires authentication", path
                         )
                         await self._login()
-            headers["Authorization"] = f"Bearer {self.authorization.token}"
+                    elif self.__token_expiring():
+                        await self.__refresh_token()
 
         if json:
             headers["Content-Type"] = "application/json"
 
-        t0 = time.time()
+        # the modem may have dropped the session (e.g. reboot, expiry): log in again once
+        retry_unauthorized = authenticated and reauthenticate
+        # a kept-alive connection may have been closed by the modem: retry GETs once
+        retry_disconnected = method == "GET"
+        yielded = False
+        while True:
+            authorization = self.authorization
+            if authenticated:
+                if authorization is None:
+                    # logged out while this request waited, e.g. by a concurrent
+                    # `_logout`: do not send the request without a token
+                    raise LoginFailedException(
+                        "Not logged in to modem at %s" % self.base_url
+                    )
+                headers["Authorization"] = f"Bearer {authorization.token}"
+
+            status: int | str = "error"
+            self.hooks.request_started(method, endpoint)
+            t0 = time.perf_counter()
+
+            try:
+                async with self.__session.request(
+                    method,
+                    url,
+                    headers=headers,
+                    json=json,
+                    trace_request_ctx=self,
+                ) as resp:
+                    status = resp.status
+                    LOG.debug(
+                        "%s %s %s %.3f %s",
+                        method,
+                        url,
+                        resp.status,
+                        time.perf_counter() - t0,
+                        resp.reason,
+                    )
+                    if resp.status == 401 and retry_unauthorized:
+                        await self.__capture(method, endpoint, json, resp, t0)
+                        retry_unauthorized = False
+                        await self.__reauthenticate(authorization)
+                        continue
+
+                    if raise_for_status and not resp.ok:
+                        await self.__capture(method, endpoint, json, resp, t0)
+                        resp.raise_for_status()
+                    yielded = True
+                    yield resp
+                    await self.__capture(method, endpoint, json, resp, t0)
+                    return
+            except (
+                aiohttp.ServerDisconnectedError,
+                aiohttp.ClientOSError,
+            ) as e:
+                # do not retry failures to connect or errors raised by the caller
+                if (
+                    yielded
+                    or not retry_disconnected
+                    or isinstance(e, aiohttp.ClientConnectorError)
+                ):
+                    raise
+                LOG.debug("%s %s: connection was closed (%s), retrying", method, url, e)
+                retry_disconnected = False
+                self.stale_connection_retries += 1
+            except asyncio.TimeoutError:
+                status = "timeout"
+                raise
+            except asyncio.CancelledError:
+                status = "cancelled"
+                raise
+            finally:
+                self.hooks.request_finished(
+                    method, endpoint, status, time.perf_counter() - t0
+                )
 
-        async with self.__session.request(
-            method,
-            url,
-            headers=headers,
-            json=json,
-            raise_for_status=raise_for_status,
-        ) as resp:
-            LOG.debug(
-                "%s %s %s %.3f %s",
+    async def __capture(
+        self,
+        method: str,
+        endpoint: str,
+        request: Optional[object],
+        resp: aiohttp.ClientResponse,
+        t0: float,
+    ) -> None:
+        """Write a request to the capture journal (the body is cached when the caller read it)."""
+        if self.capture is not None:
+            self.capture.record(
                 method,
-                url,
+                endpoint,
+                request,
                 resp.status,
-                time.time() - t0,
-                resp.reason,
+                await resp.read(),
+                time.perf_counter() - t0,
             )
-            yield resp
+
+    async def __json(self, resp: aiohttp.ClientResponse) -> Any:
+        """Decode the JSON body of a response (None when it is empty)."""
+        body = await resp.read()
+        if not body.strip():
+            return None
+        return self.json_loads(body)
+
+    async def __fetch_json(self, path: str) -> Any:
+        async with self.__request("GET", path) as resp:
+            body = await self.__json(resp)
+
+        ttl = self.cache_ttl.get(path) if self.cache_ttl else None
+        if ttl:
+            self.__cache[path] = (time.monotonic() + ttl, body)
+        return body
+
+    async def __get_json(self, path: str) -> Any:
+        """GET a JSON document, through the cache when it is enabled."""
+        if self.cache_ttl is None:
+            async with self.__request("GET", path) as resp:
+                return await self.__json(resp)
+
+        cached = self.__cache.get(path)
+        if cached and cached[0] > time.monotonic():
+            self.cache_hits += 1
+            return cached[1]
+
+        task = self.__in_flight.get(path)
+        if task:
+            self.cache_coalesced += 1
+        else:
+            self.cache_misses += 1
+            task = asyncio.create_task(self.__fetch_json(path))
+            self.__in_flight[path] = task
+            task.add_done_callback(self.__request_done)
+
+        # a cancelled caller does not cancel the request for the other callers
+        return await asyncio.shield(task)
+
+    def __request_done(self, task: asyncio.Task) -> None:
+        for path, in_flight in list(self.__in_flight.items()):
+            if in_flight is task:
+                del self.__in_flight[path]
+        # the callers may all be gone: retrieve the exception so it is not logged as unhandled.
+        if not task.cancelled():
+            task.exception()
+
+    def clear_cache(self) -> None:
+        """Drop all cached responses."""
+        self.__cache.clear()
 
     async def echo(self, body: object) -> object:
         async with self.__request("POST", "/rest/v1/echo", json=body) as resp:
-            return await resp.json()
+            return await self.__json(resp)
 
     async def modem_event_log(self) -> List[EventLogItem]:
-        async with self.__request("GET", "/rest/v1/cablemodem/eventlog") as resp:
-            res = await resp.json()
-            return sorted(
-                (EventLogItem.build(e) for e in res["eventlog"]), reverse=True
-            )
+        res = await self.__get_json("/rest/v1/cablemodem/eventlog")
+        return sorted((EventLogItem.build(e) for e in res["eventlog"]), reverse=True)
 
     async def modem_service_flows(self) -> List[ModemServiceFlowResult]:
-        async with self.__request("GET", "/rest/v1/cablemodem/serviceflows") as resp:
-            res = await resp.json()
-            return [ModemServiceFlowResult.build(e) for e in res["serviceFlows"]]
+        res = await self.__get_json("/rest/v1/cablemodem/serviceflows")
+        return [ModemServiceFlowResult.build(e) for e in res["serviceFlows"]]
 
     async def system_info(self) -> SystemInfoResult:
-        async with self.__request("GET", "/rest/v1/system/info") as resp:
-            return SystemInfoResult.build(await resp.json())
+        return SystemInfoResult.build(await self.__get_json("/rest/v1/system/info"))
 
     async def modem_primary_downstream(self) -> ModemQAMDownstreamChannelResult:
-        async with self.__request(
-            "GET", "/rest/v1/cablemodem/downstream/primary_"
-        ) as resp:
-            data = await resp.json()
-            return ModemQAMDownstreamChannelResult.build(data["channel"])
+        data = await self.__get_json("/rest/v1/cablemodem/downstream/primary_")
+        return ModemQAMDownstreamChannelResult.build(data["channel"])
 
     async def system_state(self) -> ModemStateResult:
-        async with self.__request("GET", "/rest/v1/cablemodem/state_") as resp:
-            return ModemStateResult.build(await resp.json())
+        return ModemStateResult.build(
+            await self.__get_json("/rest/v1/cablemodem/state_")
+        )
 
     async def system_reboot(self) -> bool:
         async with self.__request(
             "POST", "/rest/v1/system/reboot", json={"reboot": {"enable": True}}
         ) as resp:
-            body = await resp.json()
+            body = await self.__json(resp)
             if "accepted" in body:
                 # We are now no longer logged in after the reboot
                 self.authorization = None
+                self.clear_cache()
                 return True
             return False
 
     async def modem_downstreams(
         self,
     ) -> List[ModemQAMDownstreamChannelResult | ModemOFDMDownstreamChannelResult]:
-        async with self.__request("GET", "/rest/v1/cablemodem/downstream") as resp:
-            return [
-                (
-                    ModemQAMDownstreamChannelResult.build(e)
-                    if e["channelType"] == "sc_qam"
-                    else ModemOFDMDownstreamChannelResult.build(e)
-                )
-                for e in (await resp.json())["downstream"]["channels"]
-            ]
+        res = await self.__get_json("/rest/v1/cablemodem/downstream")
+        return [
+            (
+                ModemQAMDownstreamChannelResult.build(e)
+                if e["channelType"] == "sc_qam"
+                else ModemOFDMDownstreamChannelResult.build(e)
+            )
+            for e in res["downstream"]["channels"]
+        ]
 
     async def modem_upstreams(
         self,
     ) -> List[ModemATDMAUpstreamChannelResult | ModemOFDMAUpstreamChannelResult]:
-        async with self.__request("GET", "/rest/v1/cablemodem/upstream") as resp:
-            return [
-                (
-                    ModemATDMAUpstreamChannelResult.build(e)
-                    if e["channelType"] == "atdma"
-                    else ModemOFDMAUpstreamChannelResult.build(e)
-                )
-                for e in (await resp.json())["upstream"]["channels"]
-            ]
+        res = await self.__get_json("/rest/v1/cablemodem/upstream")
+        return [
+            (
+                ModemATDMAUpstreamChannelResult.build(e)
+                if e["channelType"] == "atdma"
+                else ModemOFDMAUpstreamChannelResult.build(e)
+            )
+            for e in res["upstream"]["channels"]
+        ]
 
     async def system_provisioning(self) -> SystemProvisioningResponse:
-        async with self.__request(
-            "GET", "/rest/v1/system/gateway/provisioning"
-        ) as resp:
-            return SystemProvisioningResponse.build(await resp.json())
+        return SystemProvisioningResponse.build(
+            await self.__get_json("/rest/v1/system/gateway/provisioning")
+        )
+
+    async def snapshot(
+        self, event_log: bool = False, max_concurrency: int = SNAPSHOT_CONCURRENCY
+    ) -> ModemSnapshot:
+        """
+        Fetch the state, info, channels, service flows, provisioning and (optionally)
+        the event log with at most `max_concurrency` requests at the same time.
+
+        The latency of a part is the duration of its request, without the time spent
+        waiting for a slot.
+        """
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be at least 1: {max_concurrency}")
+
+        parts: Dict[str, Callable[[], Any]] = {
+            "state": self.system_state,
+            "system_info": self.system_info,
+            "downstreams": self.modem_downstreams,
+            "primary_downstream": self.modem_primary_downstream,
+            "upstreams": self.modem_upstreams,
+            "service_flows": self.modem_service_flows,
+            "provisioning": self.system_provisioning,
+        }
+        if event_log:
+            parts["event_log"] = self.modem_event_log
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        latencies: Dict[str, float] = {}
+
+        async def fetch(name: str) -> Any:
+            async with semaphore:
+                t0 = time.perf_counter()
+                result = await parts[name]()
+                latencies[name] = time.perf_counter() - t0
+                return result
+
+        started = datetime.datetime.now(datetime.timezone.utc)
+        results = dict(
+            zip(parts, await asyncio.gather(*(fetch(name) for name in parts)))
+        )
+        return ModemSnapshot(
+            time=started,
+            state=results["state"],
+            system_info=results["system_info"],
+            downstreams=tuple(results["downstreams"]),
+            primary_downstream=results["primary_downstream"],
+            upstreams=tuple(results["upstreams"]),
+            service_flows=tuple(results["service_flows"]),
+            provisioning=results["provisioning"],
+            event_log=tuple(results["event_log"]) if event_log else None,
+            latencies=types.MappingProxyType({name: latencies[name] for name in parts}),
+        )
 
 
 class SagemcomModemClient:
     base_url: str
     password: str
     timeout: int
+    token_refresh_after: Optional[float]
+    keep_alive: bool
+    pool_size: int
+    json_loads: Optional[JsonLoads]
+    cache_ttl: Optional[Dict[str, float]]
+    hooks: Optional[RequestHooks]
+    capture: Optional[CaptureJournal]
+    """Connector shared with other clients (a connector per client when not set)."""
+    connector: Optional[aiohttp.BaseConnector]
+
+    """The session and client while the context manager is entered."""
+    session: Optional[aiohttp.ClientSession] = None
+    client: Optional[SagemcomModemSessionClient] = None
 
-    session: ContextVar[aiohttp.ClientSession] = ContextVar("session")
-    client: ContextVar[SagemcomModemSessionClient] = ContextVar("client")
-
-    def __init__(self, base_url: str, password: str, timeout: int = 15) -> None:
+    def __init__(
+        self,
+        base_url: str,
+        password: str,
+        timeout: int = 15,
+        token_refresh_after: Optional[float] = None,
+        keep_alive: bool = False,
+        pool_size: int = 4,
+        json_loads: Optional[JsonLoads] = None,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        hooks: Optional[RequestHooks] = None,
+        capture: Optional[CaptureJournal] = None,
+        connector: Optional[aiohttp.BaseConnector] = None,
+    ) -> None:
         self.base_url = base_url
         self.password = password
         self.timeout = timeout
+        self.token_refresh_after = token_refresh_after
+        self.keep_alive = keep_alive
+        self.pool_size = pool_size
+        self.json_loads = json_loads
+        self.cache_ttl = cache_ttl
+        self.hooks = hooks
+        self.capture = capture
+        self.connector = connector
 
     async def __aenter__(self) -> SagemcomModemSessionClient:
-        timeout = aiohttp.ClientTimeout(total=self.timeout)
-        conn = aiohttp.TCPConnector(limit_per_host=30, force_close=True)
-
-        self.session.set(aiohttp.ClientSession(timeout=timeout, connector=conn))
-        self.client.set(
-            SagemcomModemSessionClient(self.session.get(), self.base_url, self.password)
+        if self.client is not None:
+            raise RuntimeError("The client is already in use, create a client per task")
+
+        self.session = build_session(
+            self.timeout,
+            keep_alive=self.keep_alive,
+            pool_size=self.pool_size,
+            connector=self.connector,
         )
-        return self.client.get()
+        self.client = SagemcomModemSessionClient(
+            self.session,
+            self.base_url,
+            self.password,
+            token_refresh_after=self.token_refresh_after,
+            json_loads=self.json_loads,
+            cache_ttl=self.cache_ttl,
+            hooks=self.hooks,
+            capture=self.capture,
+        )
+        return self.client
 
     async def __aexit__(self, *args) -> None:
         try:
-            await self.client.get()._logout()
+            await self.client._logout()
         except (
             aiohttp.ClientResponseError,
             aiohttp.client_exceptions.ClientConnectorError,
             asyncio.TimeoutError,
         ):
             LOG.debug("HTTP error during logout", exc_info=True)
-
-        await self.session.get().close()
+        finally:
+            await self.session.close()
+            self.session = None
+            self.client = None
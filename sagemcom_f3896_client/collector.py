@@ -0,0 +1,452 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from prometheus_client.core import (
+    CounterMetricFamily,
+    GaugeMetricFamily,
+    InfoMetricFamily,
+    Metric,
+)
+from prometheus_client.registry import Collector
+
+from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from sagemcom_f3896_client.counters import CounterKey, CounterValue
+from sagemcom_f3896_client.log_parser import (
+    DownstreamProfileMessage,
+    UpstreamProfileMessage,
+)
+from sagemcom_f3896_client.models import (
+    ModemDownstreamChannelResult,
+    ModemStateResult,
+    ModemUpstreamChannelResult,
+    SystemInfoResult,
+)
+
+CHANNEL_LABELS = ["channel", "channel_type"]
+
+
+@dataclass(frozen=True)
+class SessionStatistics:
+    """Statistics of the modem session client at the time of an update."""
+
+    login_count: int
+    token_refresh_count: int
+    reauth_count: int
+    last_reauth_duration: Optional[float]
+    token_age: Optional[float]
+    connections_created: int
+    connections_reused: int
+    connection_reuse_ratio: Optional[float]
+    stale_connection_retries: int
+    cache_hits: int
+    cache_misses: int
+    cache_coalesced: int
+
+    @staticmethod
+    def build(client: SagemcomModemSessionClient) -> "SessionStatistics":
+        return SessionStatistics(
+            login_count=client.login_count,
+            token_refresh_count=client.token_refresh_count,
+            reauth_count=client.reauth_count,
+            last_reauth_duration=client.last_reauth_duration,
+            token_age=client.token_age,
+            connections_created=client.connections_created,
+            connections_reused=client.connections_reused,
+            connection_reuse_ratio=client.connection_reuse_ratio,
+            stale_connection_retries=client.stale_connection_retries,
+            cache_hits=client.cache_hits,
+            cache_misses=client.cache_misses,
+            cache_coalesced=client.cache_coalesced,
+        )
+
+
+@dataclass(frozen=True)
+class ModemMetricsSnapshot:
+    """
+    The results of one update. The snapshot is not changed after it is created: the
+    collections are copies of the exporter state.
+    """
+
+    state: ModemStateResult
+    system_info: SystemInfoResult
+    """Boot time (unix time), only updated when it shifts more than 10s."""
+    boot_time: float
+
+    downstreams: Tuple[ModemDownstreamChannelResult, ...]
+    primary_downstream_channel_id: int
+    upstreams: Tuple[ModemUpstreamChannelResult, ...]
+
+    log_priority_counts: Dict[str, int]
+    reboot_count: int
+    """(event, channel_id) -> number of log entries"""
+    log_event_counts: Dict[Tuple[str, str], int]
+    """(channel_id, profile) -> 1 when the profile is failing, 0 when it recovered."""
+    ofdm_profile_failures: Dict[Tuple[int, int], int]
+    profile_messages: Tuple[DownstreamProfileMessage | UpstreamProfileMessage, ...]
+
+    session: SessionStatistics
+    """(channel_id, channel_type, error_type) -> (total, rate), see `ChannelCounters`"""
+    downstream_counters: Dict[CounterKey, CounterValue]
+    """(channel_id, channel_type, timeout_type) -> (total, rate)"""
+    upstream_counters: Dict[CounterKey, CounterValue]
+    """reason -> number of counters that were reset"""
+    counter_resets: Dict[str, int]
+    """data source of the exporter -> seconds since it was fetched from the modem"""
+    source_ages: Dict[str, float]
+
+    def __post_init__(self) -> None:
+        for ds in self.downstreams:
+            if ds.channel_type not in ("sc_qam", "ofdm"):
+                raise ValueError("Unknown downstream type %s" % ds.channel_type)
+        for us in self.upstreams:
+            if us.channel_type not in ("atdma", "ofdma"):
+                raise ValueError(f"Unknown channel type: {us.channel_type}")
+
+
+class ModemCollector(Collector):
+    """
+    Metrics of the latest modem snapshot.
+
+    The collector lives as long as the exporter: an update only replaces the snapshot.
+    The metric families are built from the snapshot when the registry is collected.
+    Nothing is collected before the first update.
+    """
+
+    snapshot: Optional[ModemMetricsSnapshot] = None
+
+    def collect(self) -> Iterable[Metric]:
+        snapshot = self.snapshot
+        if snapshot is None:
+            return
+
+        yield from self.__modem_metrics(snapshot)
+        yield from self.__downstream_channel_metrics(snapshot)
+        yield from self.__upstream_channel_metrics(snapshot)
+        yield from self.__channel_counter_metrics(snapshot)
+        yield from self.__log_based_metrics(snapshot)
+        yield from self.__session_metrics(snapshot.session)
+
+    def __modem_metrics(self, snapshot: ModemMetricsSnapshot) -> Iterable[Metric]:
+        # note: _info will be postfixed
+        yield InfoMetricFamily(
+            "modem",
+            "Modem information",
+            value={
+                "mac": snapshot.state.mac_address,
+                "serial": snapshot.state.serial_number,
+                "software_version": snapshot.system_info.software_version,
+                "hardware_version": snapshot.system_info.hardware_version,
+                "boot_file_name": snapshot.state.boot_file_name,
+            },
+        )
+        yield GaugeMetricFamily("modem_uptime", "Uptime", value=snapshot.state.up_time)
+        yield GaugeMetricFamily(
+            "node_boot_time_seconds",
+            "Node boot time, in unixtime (shifts when clocks between host and modem skew more than 10s).",
+            value=snapshot.boot_time,
+        )
+        source_age = GaugeMetricFamily(
+            "modem_source_age_seconds",
+            "Age of the data from the modem at the time of the update, by data source",
+            labels=["source"],
+        )
+        for source, age in snapshot.source_ages.items():
+            source_age.add_metric([source], age)
+        yield source_age
+
+    def __downstream_channel_metrics(
+        self, snapshot: ModemMetricsSnapshot
+    ) -> Iterable[Metric]:
+        frequency = GaugeMetricFamily(
+            "modem_downstream_frequency", "Downstream frequency", labels=CHANNEL_LABELS
+        )
+        rx_mer = GaugeMetricFamily(
+            "modem_downstream_rx_mer", "Downstream RX MER", labels=CHANNEL_LABELS
+        )
+        power = GaugeMetricFamily(
+            "modem_downstream_power", "Downstream power", labels=CHANNEL_LABELS
+        )
+        locked = GaugeMetricFamily(
+            "modem_downstream_locked", "Downstream lock status", labels=CHANNEL_LABELS
+        )
+        # Technically a counter, but the values are read from the modem
+        errors = GaugeMetricFamily(
+            "modem_downstream_errors_total",
+            "Downstream errors",
+            labels=CHANNEL_LABELS + ["error_type"],
+        )
+        qam_snr = GaugeMetricFamily(
+            "modem_downstream_qam_snr", "Downstream SNR", labels=CHANNEL_LABELS
+        )
+        qam_info = InfoMetricFamily(
+            "modem_downstream_qam", "Downstream info", labels=CHANNEL_LABELS
+        )
+        ofdm_info = InfoMetricFamily(
+            "modem_downstream_ofdm", "Downstream info", labels=CHANNEL_LABELS
+        )
+
+        for ch in snapshot.downstreams:
+            labels = [str(ch.channel_id), ch.channel_type]
+            frequency.add_metric(labels, ch.frequency)
+            rx_mer.add_metric(labels, ch.rx_mer)
+            power.add_metric(labels, ch.power)
+            locked.add_metric(labels, float(ch.lock_status))
+            errors.add_metric(labels + ["corrected"], ch.corrected_errors)
+            errors.add_metric(labels + ["uncorrected"], ch.uncorrected_errors)
+
+            match ch.channel_type:
+                case "sc_qam":
+                    qam_snr.add_metric(labels, ch.snr)
+                    qam_info.add_metric(
+                        labels,
+                        {
+                            "modulation": ch.modulation,
+                            "primary": (
+                                "true"
+                                if ch.channel_id
+                                == snapshot.primary_downstream_channel_id
+                                else "false"
+                            ),
+                        },
+                    )
+                case "ofdm":
+                    ofdm_info.add_metric(
+                        labels,
+                        {
+                            "modulation": ch.modulation,
+                            "channel_width_hz": str(ch.channel_width),
+                            "fft_type": ch.fft_type,
+                            "number_of_active_subcarriers": str(
+                                ch.number_of_active_subcarriers
+                            ),
+                        },
+                    )
+
+        yield from (
+            frequency,
+            rx_mer,
+            power,
+            locked,
+            errors,
+            qam_snr,
+            qam_info,
+            ofdm_info,
+        )
+
+    def __upstream_channel_metrics(
+        self, snapshot: ModemMetricsSnapshot
+    ) -> Iterable[Metric]:
+        frequency = GaugeMetricFamily(
+            "modem_upstream_frequency", "Upstream frequency", labels=CHANNEL_LABELS
+        )
+        locked = GaugeMetricFamily(
+            "modem_upstream_locked", "Upstream locked", labels=CHANNEL_LABELS
+        )
+        power = GaugeMetricFamily(
+            "modem_upstream_power", "Upstream power", labels=CHANNEL_LABELS
+        )
+        # Technically a counter, but the values are read from the modem
+        timeouts = GaugeMetricFamily(
+            "modem_upstream_timeout_total",
+            "Upstream timeouts by type",
+            labels=CHANNEL_LABELS + ["timeout_type"],
+        )
+        atdma_info = InfoMetricFamily(
+            "modem_upstream_atdma",
+            "Information on ATDMA channel",
+            labels=CHANNEL_LABELS,
+        )
+        ofdma_info = InfoMetricFamily(
+            "modem_upstream_ofdma",
+            "Information on OFDMA channel",
+            labels=CHANNEL_LABELS,
+        )
+
+        for ch in snapshot.upstreams:
+            labels = [str(ch.channel_id), ch.channel_type]
+            frequency.add_metric(labels, ch.frequency)
+            locked.add_metric(labels, 1 if ch.lock_status else 0)
+            power.add_metric(labels, ch.power)
+            timeouts.add_metric(labels + ["t3"], ch.t3_timeouts)
+            timeouts.add_metric(labels + ["t4"], ch.t4_timeouts)
+
+            match ch.channel_type:
+                case "atdma":
+                    atdma_info.add_metric(
+                        labels,
+                        {
+                            "modulation": ch.modulation,
+                            "symbol_rate": str(ch.symbol_rate),
+                        },
+                    )
+                    timeouts.add_metric(labels + ["t1"], ch.t1_timeouts)
+                    timeouts.add_metric(labels + ["t2"], ch.t2_timeouts)
+                case "ofdma":
+                    ofdma_info.add_metric(
+                        labels,
+                        {
+                            "modulation": ch.modulation,
+                            "channel_width_hz": str(ch.channel_width),
+                            "fft_type": ch.fft_type,
+                            "number_of_active_subcarriers": str(
+                                ch.number_of_active_subcarriers
+                            ),
+                        },
+                    )
+
+        yield from (frequency, locked, power, timeouts, atdma_info, ofdma_info)
+
+    def __channel_counter_metrics(
+        self, snapshot: ModemMetricsSnapshot
+    ) -> Iterable[Metric]:
+        for name, rate_name, counters, counter_label, description in (
+            (
+                "modem_downstream_channel_errors",
+                "modem_downstream_channel_error_rate",
+                snapshot.downstream_counters,
+                "error_type",
+                "Downstream errors",
+            ),
+            (
+                "modem_upstream_channel_timeouts",
+                "modem_upstream_channel_timeout_rate",
+                snapshot.upstream_counters,
+                "timeout_type",
+                "Upstream timeouts",
+            ),
+        ):
+            labels = CHANNEL_LABELS + [counter_label]
+            total = CounterMetricFamily(
+                name,
+                f"{description}, counted across modem reboots and channel changes",
+                labels=labels,
+            )
+            rate = GaugeMetricFamily(
+                rate_name,
+                f"{description} per second since the previous update",
+                labels=labels,
+            )
+            for key, (value, per_second) in counters.items():
+                total.add_metric(list(key), value)
+                if per_second is not None:
+                    rate.add_metric(list(key), per_second)
+            yield total
+            yield rate
+
+        resets = CounterMetricFamily(
+            "modem_channel_counter_resets",
+            "Channel counters that were reset, by reason (reboot, channel_change: other frequency, decrease)",
+            labels=["reason"],
+        )
+        for reason, count in snapshot.counter_resets.items():
+            resets.add_metric([reason], count)
+        yield resets
+
+    def __log_based_metrics(self, snapshot: ModemMetricsSnapshot) -> Iterable[Metric]:
+        channel_profile = GaugeMetricFamily(
+            "modem_channel_profile",
+            "Profile assigned to channel",
+            labels=["direction", "channel_id", "slot"],
+        )
+        for message in snapshot.profile_messages:
+            direction = (
+                "downstream"
+                if isinstance(message, DownstreamProfileMessage)
+                else "upstream"
+            )
+            for idx, profile in enumerate(message.profile):
+                channel_profile.add_metric(
+                    [direction, str(message.channel_id), str(idx + 1)], profile
+                )
+        yield channel_profile
+
+        ofdm_profile_failure = GaugeMetricFamily(
+            "modem_cmstatus_info",
+            "FEC errors were over limit on one of the assigned downstream OFDM profiles of a channel",
+            labels=["channel_id", "profile", "type"],
+        )
+        for (channel_id, profile), value in snapshot.ofdm_profile_failures.items():
+            ofdm_profile_failure.add_metric(
+                [str(channel_id), str(profile), "ofdm_profile_failure"], value
+            )
+        yield ofdm_profile_failure
+
+        # Actually a Counter, but entries expire from the modem log.
+        yield GaugeMetricFamily(
+            "modem_reboot_count",
+            "Number of reboots in modem log",
+            value=snapshot.reboot_count,
+        )
+
+        by_priority = GaugeMetricFamily(
+            "modem_log_count", "Number of log messages", labels=["priority"]
+        )
+        for priority, count in snapshot.log_priority_counts.items():
+            by_priority.add_metric([priority], count)
+        yield by_priority
+
+        events = GaugeMetricFamily(
+            "modem_log_event_count",
+            "Number of T3 timeout, MDD timeout and ranging failure messages in modem log (channel_id is empty when the message has no channel)",
+            labels=["event", "channel_id"],
+        )
+        for (event, channel_id), count in snapshot.log_event_counts.items():
+            events.add_metric([event, channel_id], count)
+        yield events
+
+    def __session_metrics(self, session: SessionStatistics) -> Iterable[Metric]:
+        # Technically counters, but the values are read from the client
+        yield GaugeMetricFamily(
+            "modem_session_login_count",
+            "Number of logins to the modem",
+            value=session.login_count,
+        )
+        reauth = GaugeMetricFamily(
+            "modem_session_reauthentication_count",
+            "Number of times the session token was replaced by type (refresh: before it expired, rejected: after the modem rejected it)",
+            labels=["type"],
+        )
+        reauth.add_metric(["refresh"], session.token_refresh_count)
+        reauth.add_metric(["rejected"], session.reauth_count)
+        yield reauth
+        yield GaugeMetricFamily(
+            "modem_session_reauthentication_seconds",
+            "Duration of the last token refresh or re-login",
+            value=session.last_reauth_duration or 0,
+        )
+        yield GaugeMetricFamily(
+            "modem_session_token_age_seconds",
+            "Age of the session token (NaN when not logged in)",
+            value=(
+                session.token_age if session.token_age is not None else float("nan")
+            ),
+        )
+
+        connections = GaugeMetricFamily(
+            "modem_client_connection_count",
+            "Number of requests to the modem by connection state (created: new connection, reused: kept-alive connection)",
+            labels=["state"],
+        )
+        connections.add_metric(["created"], session.connections_created)
+        connections.add_metric(["reused"], session.connections_reused)
+        yield connections
+        yield GaugeMetricFamily(
+            "modem_client_connection_reuse_ratio",
+            "Fraction of requests to the modem that re-used a kept-alive connection",
+            value=session.connection_reuse_ratio or 0,
+        )
+        yield GaugeMetricFamily(
+            "modem_client_stale_connection_retry_count",
+            "Number of requests retried because the modem closed a kept-alive connection",
+            value=session.stale_connection_retries,
+        )
+
+        cache = GaugeMetricFamily(
+            "modem_client_cache_request_count",
+            "GET requests by cache result (hit: served from the cache, miss: sent to the modem, coalesced: waited for an identical request)",
+            labels=["result"],
+        )
+        cache.add_metric(["hit"], session.cache_hits)
+        cache.add_metric(["miss"], session.cache_misses)
+        cache.add_metric(["coalesced"], session.cache_coalesced)
+        yield cache
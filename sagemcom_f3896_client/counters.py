@@ -0,0 +1,140 @@
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from sagemcom_f3896_client.models import (
+    ModemDownstreamChannelResult,
+    ModemUpstreamChannelResult,
+)
+
+LOG = logging.getLogger(__name__)
+
+"""(channel_id, channel_type, counter type, e.g. `corrected` or `t3`)"""
+CounterKey = Tuple[str, str, str]
+"""(monotonic total, per-second rate since the previous update or None)"""
+CounterValue = Tuple[float, Optional[float]]
+
+
+def downstream_counters(
+    channels: Iterable[ModemDownstreamChannelResult],
+) -> Iterator[Tuple[CounterKey, int, int]]:
+    """(key, frequency, value) of the error counters of downstream channels."""
+    for ch in channels:
+        labels = (str(ch.channel_id), ch.channel_type)
+        yield labels + ("corrected",), ch.frequency, ch.corrected_errors
+        yield labels + ("uncorrected",), ch.frequency, ch.uncorrected_errors
+
+
+def upstream_counters(
+    channels: Iterable[ModemUpstreamChannelResult],
+) -> Iterator[Tuple[CounterKey, int, int]]:
+    """(key, frequency, value) of the timeout counters of upstream channels."""
+    for ch in channels:
+        labels = (str(ch.channel_id), ch.channel_type)
+        if ch.channel_type == "atdma":
+            yield labels + ("t1",), ch.frequency, ch.t1_timeouts
+            yield labels + ("t2",), ch.frequency, ch.t2_timeouts
+        yield labels + ("t3",), ch.frequency, ch.t3_timeouts
+        yield labels + ("t4",), ch.frequency, ch.t4_timeouts
+
+
+class ChannelCounters:
+    """
+    Monotonic counters and per-second rates derived from the counters of the channels.
+
+    The modem resets its counters when it reboots, and a channel id can be assigned to
+    another frequency. The previous value of every counter is kept: when a counter
+    was reset (after a reboot, when the frequency of the channel changed, or when the
+    value went down) its current value is counted from zero. The totals only increase
+    while the exporter runs.
+
+    Channels that are no longer present are not reported, but their totals and last
+    values are kept for `grace_period` seconds (or until a reboot): a channel that
+    comes back continues its counters.
+    """
+
+    """Key -> monotonic total"""
+    totals: Dict[CounterKey, float]
+    """Key -> increase per second between the last two updates"""
+    rates: Dict[CounterKey, float]
+    """reason (`reboot`, `channel_change`, `decrease`) -> number of counters reset"""
+    resets: Dict[str, int]
+    """Seconds to keep the counters of a channel that is no longer present."""
+    grace_period: float
+
+    """Key -> (frequency, value, monotonic time) of the last update with the counter"""
+    __previous: Dict[CounterKey, Tuple[int, int, float]]
+    """Keys of the counters of the last update, in the order of the update"""
+    __present: List[CounterKey]
+    """Monotonic time of the last reboot that was not applied to the counters yet."""
+    __reboot_at: Optional[float] = None
+
+    def __init__(self, grace_period: float = 900) -> None:
+        self.totals = {}
+        self.rates = {}
+        self.resets = {"reboot": 0, "channel_change": 0, "decrease": 0}
+        self.grace_period = grace_period
+        self.__previous = {}
+        self.__present = []
+
+    def reboot(self, boot_time: float) -> None:
+        """The modem booted at `boot_time` (monotonic): all counters restart from zero."""
+        self.__reboot_at = boot_time
+
+    def update(
+        self, now: float, counters: Iterable[Tuple[CounterKey, int, int]]
+    ) -> None:
+        """Add the values of the counters read from the modem at `now` (monotonic)."""
+        reboot_at = self.__reboot_at
+        if reboot_at is not None:
+            # the counters of missing channels were reset, the channels can come back
+            # with other ids
+            for key in self.__previous.keys() - set(self.__present):
+                self.__drop(key)
+
+        self.rates = {}
+        self.__present = []
+        for key, frequency, value in counters:
+            self.__present.append(key)
+            last = self.__previous.get(key)
+            self.__previous[key] = (frequency, value, now)
+            if last is None:
+                # a new channel: counts before the first update have no rate
+                self.totals[key] = value
+                continue
+
+            last_frequency, last_value, last_update = last
+            reason = None
+            if reboot_at is not None:
+                reason = "reboot"
+                # only the counts since the boot happened in this interval
+                last_update = max(last_update, reboot_at)
+            elif frequency != last_frequency:
+                reason = "channel_change"
+            elif value < last_value:
+                reason = "decrease"
+
+            if reason:
+                self.resets[reason] += 1
+                increase = value
+            else:
+                increase = value - last_value
+
+            self.totals[key] += increase
+            elapsed = now - last_update
+            if elapsed > 0:
+                self.rates[key] = increase / elapsed
+
+        for key, (_, _, last_update) in list(self.__previous.items()):
+            if now - last_update > self.grace_period:
+                self.__drop(key)
+
+        self.__reboot_at = None
+
+    def __drop(self, key: CounterKey) -> None:
+        LOG.debug("Dropping counter of no longer present channel %s", key)
+        del self.__previous[key]
+        del self.totals[key]
+
+    def values(self) -> Dict[CounterKey, CounterValue]:
+        """Key -> (total, rate) of the counters of the last update."""
+        return {key: (self.totals[key], self.rates.get(key)) for key in self.__present}
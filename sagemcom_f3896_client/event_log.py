@@ -0,0 +1,198 @@
+import collections
+import logging
+from typing import Counter, Deque, Dict, List, Optional, Set, Tuple
+
+from sagemcom_f3896_client.log_parser import (
+    CMStatusMessageOFDM,
+    ConsecutiveT3TimeoutsMessage,
+    DownstreamProfileMessage,
+    MDDTimeoutMessage,
+    ParsedMessage,
+    RangingFailureMessage,
+    RebootMessage,
+    T3TimeoutMessage,
+    UpstreamProfileMessage,
+)
+from sagemcom_f3896_client.models import EventLogItem
+from sagemcom_f3896_client.profile_messages import profile_key
+
+LOG = logging.getLogger(__name__)
+
+
+def log_event(message: Optional[ParsedMessage]) -> Optional[Tuple[str, str]]:
+    """The (event, channel_id) a message is counted as. The channel is empty when the message has none."""
+    match message:
+        case T3TimeoutMessage(ranging=ranging):
+            return (f"t3_timeout_{ranging}", "")
+        case ConsecutiveT3TimeoutsMessage(channel_id=channel_id):
+            return ("consecutive_t3_timeouts", str(channel_id))
+        case MDDTimeoutMessage():
+            return ("mdd_timeout", "")
+        case RangingFailureMessage():
+            return ("ranging_failure", "")
+    return None
+
+
+class EventLogIngester:
+    """
+    Keep the state derived from the modem event log, processing only new entries.
+
+    The modem returns its whole event log on every request. Entries up to the newest
+    entry that was processed before (the high-water mark) are skipped. Entries that
+    are no longer present (the modem expires old entries) are removed from the
+    state, so the state always describes the entries currently in the modem log:
+      * the number of entries per priority,
+      * the number of reboots,
+      * the number of T3, MDD and ranging events (per channel when known),
+      * the OFDM profile failure state and the latest profile message per channel,
+        for the messages after the last reboot.
+    """
+
+    priority_counts: Counter[str]
+    reboot_count: int
+    """The newest reboot entry that was processed (also when it expired from the log)."""
+    last_reboot: Optional[EventLogItem] = None
+    """(event, channel_id) -> number of entries, see `log_event`."""
+    event_counts: Counter[Tuple[str, str]]
+    """(channel_id, profile) -> 1 when the profile is failing, 0 when it recovered."""
+    ofdm_profile_failures: Dict[Tuple[int, int], int]
+
+    """Entries currently in the modem log (chronological) with their parsed message."""
+    __entries: Deque[Tuple[EventLogItem, Optional[ParsedMessage]]]
+    __high_water_mark: Optional[EventLogItem]
+    """Entries at the time of the high-water mark: entries at that time may arrive later."""
+    __at_high_water_mark: Set[EventLogItem]
+
+    """Entry that set the value of each key of the state derived from entries since the last reboot."""
+    __ofdm_profile_failure_entries: Dict[Tuple[int, int], EventLogItem]
+    __profile_messages: Dict[
+        Tuple[str, int],
+        Tuple[DownstreamProfileMessage | UpstreamProfileMessage, EventLogItem],
+    ]
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        self.priority_counts = collections.Counter()
+        self.reboot_count = 0
+        self.event_counts = collections.Counter()
+        self.ofdm_profile_failures = {}
+
+        self.__entries = collections.deque()
+        self.__high_water_mark = None
+        self.__at_high_water_mark = set()
+        self.__ofdm_profile_failure_entries = {}
+        self.__profile_messages = {}
+
+    @property
+    def profile_messages(
+        self,
+    ) -> List[DownstreamProfileMessage | UpstreamProfileMessage]:
+        """The latest profile message per channel since the last reboot."""
+        return [message for message, _ in self.__profile_messages.values()]
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def ingest(self, log_lines: List[EventLogItem]) -> List[EventLogItem]:
+        """
+        Update the state for the current event log.
+
+        `log_lines` is sorted newest first (as returned by `modem_event_log`). Returns the
+        entries that were not seen before, oldest first.
+        """
+        new_entries = []
+        for line in log_lines:
+            if self.__high_water_mark is not None:
+                if line.time < self.__high_water_mark.time:
+                    break
+                if line in self.__at_high_water_mark:
+                    continue
+            new_entries.append(line)
+        new_entries.reverse()
+
+        if log_lines:
+            self.__expire(log_lines[-1])
+        else:
+            self.__expire(None)
+
+        for line in new_entries:
+            self.__add(line)
+
+        if len(self.__entries) != len(log_lines):
+            # Entries were inserted before the high-water mark (e.g. the modem clock
+            # changed). Rebuild the state from the full log.
+            LOG.info(
+                "Event log changed before the last processed entry, processing all %d entries",
+                len(log_lines),
+            )
+            previous = set(item for item, _ in self.__entries)
+            self.reset()
+            for line in reversed(log_lines):
+                self.__add(line)
+            return [line for line in reversed(log_lines) if line not in previous]
+
+        return new_entries
+
+    def __add(self, item: EventLogItem) -> None:
+        message = item.parse()
+        self.__entries.append((item, message))
+
+        if self.__high_water_mark is None or item.time > self.__high_water_mark.time:
+            self.__high_water_mark = item
+            self.__at_high_water_mark = set()
+        self.__at_high_water_mark.add(item)
+
+        self.priority_counts[item.priority] += 1
+        event = log_event(message)
+        if event:
+            self.event_counts[event] += 1
+
+        match message:
+            case RebootMessage():
+                self.reboot_count += 1
+                self.last_reboot = item
+                # only messages after the last reboot describe the current state
+                self.ofdm_profile_failures.clear()
+                self.__ofdm_profile_failure_entries.clear()
+                self.__profile_messages.clear()
+            case CMStatusMessageOFDM(
+                channel_id=channel_id, event_code=event_code, profile=profile
+            ) if event_code in (16, 24):
+                key = (channel_id, profile)
+                self.ofdm_profile_failures[key] = 1 if event_code == 16 else 0
+                self.__ofdm_profile_failure_entries[key] = item
+            case DownstreamProfileMessage() | UpstreamProfileMessage():
+                self.__profile_messages[profile_key(message)] = (message, item)
+
+    def __expire(self, oldest: Optional[EventLogItem]) -> None:
+        """Remove the entries older than `oldest` (all entries when it is None)."""
+        while self.__entries and (oldest is None or self.__entries[0][0] < oldest):
+            item, message = self.__entries.popleft()
+
+            self.priority_counts[item.priority] -= 1
+            if not self.priority_counts[item.priority]:
+                del self.priority_counts[item.priority]
+            event = log_event(message)
+            if event:
+                self.event_counts[event] -= 1
+                if not self.event_counts[event]:
+                    del self.event_counts[event]
+
+            match message:
+                case RebootMessage():
+                    self.reboot_count -= 1
+                case CMStatusMessageOFDM(channel_id=channel_id, profile=profile):
+                    key = (channel_id, profile)
+                    if self.__ofdm_profile_failure_entries.get(key) is item:
+                        del self.ofdm_profile_failures[key]
+                        del self.__ofdm_profile_failure_entries[key]
+                case DownstreamProfileMessage() | UpstreamProfileMessage():
+                    key = profile_key(message)
+                    if self.__profile_messages.get(key, (None, None))[1] is item:
+                        del self.__profile_messages[key]
+
+        if not self.__entries:
+            self.__high_water_mark = None
+            self.__at_high_water_mark = set()
@@ -1,35 +1,97 @@
 import asyncio
+import datetime
+import ipaddress
 import logging
 import os
 import time
-from typing import List, Set
+from collections import OrderedDict
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
 import aiohttp
 import click
 from aiohttp import web
 from prometheus_async import aio
-from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Info, Summary
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Summary
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
+from prometheus_client.registry import Collector
+from yarl import URL
 
 from sagemcom_f3896_client import templates
-from sagemcom_f3896_client.client import SagemcomModemClient, SagemcomModemSessionClient
+from sagemcom_f3896_client.archive import EventLogArchive
+from sagemcom_f3896_client.capture import CaptureJournal
+from sagemcom_f3896_client.client import (
+    DEFAULT_CACHE_TTL,
+    CombinedRequestHooks,
+    RequestHooks,
+    SagemcomModemClient,
+    SagemcomModemSessionClient,
+    build_session,
+)
+from sagemcom_f3896_client.collector import (
+    ModemCollector,
+    ModemMetricsSnapshot,
+    SessionStatistics,
+)
+from sagemcom_f3896_client.counters import (
+    ChannelCounters,
+    downstream_counters,
+    upstream_counters,
+)
+from sagemcom_f3896_client.event_log import EventLogIngester
 from sagemcom_f3896_client.exception import LoginFailedException
+from sagemcom_f3896_client.exposition import CachedExposition, exposition_response
+from sagemcom_f3896_client.history import (
+    DEFAULT_PERCENTILES,
+    ChannelHistory,
+    history_available,
+)
 from sagemcom_f3896_client.log_parser import (
-    CMStatusMessageOFDM,
-    DownstreamProfileMessage,
-    RebootMessage,
-    UpstreamProfileMessage,
+    PARSE_CACHE_SIZE,
     is_login_message,
+    parse_cache_info,
+    set_parse_cache_size,
 )
 from sagemcom_f3896_client.models import (
     EventLogItem,
     ModemDownstreamChannelResult,
+    ModemStateResult,
     ModemUpstreamChannelResult,
 )
 from sagemcom_f3896_client.profile_messages import ProfileMessageStore
+from sagemcom_f3896_client.request_metrics import PrometheusRequestHooks
 
 LOG = logging.getLogger(__name__)
 MODEM_LOG = logging.getLogger("modem.eventlog")
 
+"""The data sources of an update (methods of the client)."""
+DATA_SOURCES = {
+    "state": "system_state",
+    "system_info": "system_info",
+    "downstreams": "modem_downstreams",
+    "primary_downstream": "modem_primary_downstream",
+    "upstreams": "modem_upstreams",
+    "event_log": "modem_event_log",
+}
+"""
+Seconds between refreshes of the data sources of the exporter command. The system
+info only changes with a firmware update, and is refreshed after a reboot.
+"""
+DEFAULT_REFRESH_INTERVALS = {"system_info": 3600.0, "event_log": 60.0}
+
+"""Event log entries per page of the index, and per chunk of the streamed page."""
+INDEX_PAGE_SIZE = 100
+INDEX_CHUNK_SIZE = 50
+
 MODEM_METRICS_DURATION = Summary(
     "modem_metrics_processing_seconds", "Time spent processing modem metrics"
 )
@@ -41,12 +103,45 @@ MODEM_UPDATE_COUNT = Counter(
 MODEM_LAST_UPDATE = Gauge(
     "modem_last_update", "Timestamp of the last update from the modem.", ["status"]
 )
+MODEM_METRICS_AGE = Gauge(
+    "modem_metrics_age_seconds",
+    "Seconds since the modem metrics were last updated successfully (NaN before the first update).",
+)
+
+
+class ParseCacheCollector(Collector):
+    """Statistics of the log message parse cache."""
+
+    def collect(self) -> Iterable[Metric]:
+        info = parse_cache_info()
+
+        lookups = CounterMetricFamily(
+            "modem_log_parse_cache_lookups",
+            "Lookups in the log message parse cache",
+            labels=["result"],
+        )
+        lookups.add_metric(["hit"], info.hits)
+        lookups.add_metric(["miss"], info.misses)
+        yield lookups
+
+        yield GaugeMetricFamily(
+            "modem_log_parse_cache_size",
+            "Number of parsed log messages in the cache",
+            value=info.currsize,
+        )
+
+
+REGISTRY.register(ParseCacheCollector())
 
 
 class MetricUpdateFailedException(Exception):
     pass
 
 
+class TargetNotAllowedException(ValueError):
+    """A probe target that is not on the allow-list."""
+
+
 class Exporter:
     """Prometheus export for F3896"""
 
@@ -56,37 +151,115 @@ class Exporter:
 
     include_login_messages: bool = False
 
-    modem_downstreams: List[ModemDownstreamChannelResult] = []
-    modem_upstreams: List[ModemUpstreamChannelResult] = []
+    """Channels of the last update."""
+    modem_downstreams: List[ModemDownstreamChannelResult]
+    modem_upstreams: List[ModemUpstreamChannelResult]
 
     profile_messages: ProfileMessageStore
-    previous_logs: Set[EventLogItem] = set()
-
-    """The registry of metrics from the last fetch."""
-    registry: CollectorRegistry = CollectorRegistry()
+    """Per-target exporters for the `/probe` endpoint (multi-target mode)."""
+    probe_targets: Optional["ProbeTargetPool"] = None
+
+    event_log: EventLogIngester
+
+    """Metrics of the last update."""
+    collector: ModemCollector
+    """The registry of `collector`."""
+    registry: CollectorRegistry
+    """The rendered exposition of `registry`."""
+    exposition: CachedExposition
+    """
+    Request metrics of `client`, in `request_registry`: they change between updates,
+    so they are rendered for every scrape instead of being cached with `registry`.
+    """
+    request_metrics: PrometheusRequestHooks
+    request_registry: CollectorRegistry
 
     """A collection of storng references to tasks that run in the background that we do not want to be cancelled."""
-    background_tasks: Set[asyncio.Task] = set()
-
-    __metrics_updating_lock: asyncio.Lock = asyncio.Lock()
+    background_tasks: Set[asyncio.Task]
+
+    """Interval for polling the modem in the background. When not set, the modem is polled on every scrape."""
+    poll_interval: Optional[float] = None
+    """Monotonic time of the last successful update."""
+    last_update: Optional[float] = None
+    """Keep the modem session between updates instead of logging out after every update."""
+    persistent_session: bool = False
+    """Channel values of the last updates for `/api/history` (disabled when not set)."""
+    history: Optional[ChannelHistory] = None
+    """Archive of all event log entries, for `/api/logs` (disabled when not set)."""
+    archive: Optional[EventLogArchive] = None
+    """The event log of the last update for the index page, newest first."""
+    log_lines: Optional[List[EventLogItem]] = None
+    """Changes when `log_lines` changes."""
+    log_etag: Optional[str] = None
+    """
+    Seconds between refreshes per data source (see `DATA_SOURCES`). Other sources are
+    refreshed on every update. An update uses the last result of the other sources.
+    """
+    refresh_intervals: Dict[str, float]
+    """Counters and rates derived from the error and timeout counters of the channels."""
+    downstream_counters: ChannelCounters
+    upstream_counters: ChannelCounters
+
+    __metrics_updating_lock: asyncio.Lock
+    """data source -> (monotonic time, result) of the last refresh"""
+    __results: Dict[str, Tuple[float, Any]]
     __last_boot_time: float = 0
+    __poll_task: Optional[asyncio.Task] = None
 
     def __init__(
         self,
         client: SagemcomModemSessionClient,
         port: int,
         include_login_messages: bool = False,
+        probe_targets: Optional["ProbeTargetPool"] = None,
+        poll_interval: Optional[float] = None,
+        persistent_session: bool = False,
+        history_size: int = 0,
+        archive: Optional[EventLogArchive] = None,
+        refresh_intervals: Optional[Dict[str, float]] = None,
     ):
         self.client = client
         self.app = web.Application()
         self.port = port
         self.include_login_messages = include_login_messages
+        self.poll_interval = poll_interval
+        self.persistent_session = persistent_session
+
+        self.probe_targets = probe_targets
+        self.modem_downstreams = []
+        self.modem_upstreams = []
+        self.background_tasks = set()
+        self.refresh_intervals = refresh_intervals or {}
+        self.__results = {}
+        self.downstream_counters = ChannelCounters()
+        self.upstream_counters = ChannelCounters()
+        if history_size:
+            self.history = ChannelHistory(history_size)
+        self.archive = archive
 
         self.profile_messages = ProfileMessageStore()
+        self.event_log = EventLogIngester()
+        self.collector = ModemCollector()
+        self.registry = CollectorRegistry()
+        self.registry.register(self.collector)
+        self.request_registry = CollectorRegistry()
+        self.request_metrics = PrometheusRequestHooks(self.request_registry)
+        if type(self.client.hooks) is RequestHooks:
+            self.client.hooks = self.request_metrics
+        else:
+            # keep the hooks of the caller
+            self.client.hooks = CombinedRequestHooks(
+                self.client.hooks, self.request_metrics
+            )
+        self.exposition = CachedExposition(self.registry)
+        self.__metrics_updating_lock = asyncio.Lock()
 
         self.app.add_routes(
             [
                 web.get("/metrics", self.metrics),
+                web.get("/probe", self.probe),
+                web.get("/api/history", self.api_history),
+                web.get("/api/logs", self.api_logs),
                 web.get("/", self.index),
             ]
         )
@@ -100,87 +273,209 @@ class Exporter:
         site = web.TCPSite(runner, None, port=self.port)
 
         await site.start()
+        if self.poll_interval:
+            self.start_polling()
+
         while True:
             await asyncio.sleep(3600)
 
-    async def metrics(self, _: web.Request) -> web.Response:
-        """Gather metrics and return a built response"""
+    def start_polling(self) -> None:
+        """Start updating the metrics in the background every `poll_interval` seconds."""
+        assert self.poll_interval, "poll_interval is not set"
+        if not self.__poll_task:
+            self.__poll_task = asyncio.create_task(self.poll())
+
+    async def stop_polling(self) -> None:
+        if self.__poll_task:
+            self.__poll_task.cancel()
+            try:
+                await self.__poll_task
+            except asyncio.CancelledError:
+                pass
+            self.__poll_task = None
+
+    async def poll(self) -> None:
+        """Update the metrics forever, starting an update every `poll_interval` seconds."""
+        LOG.info("Polling modem every %.1fs", self.poll_interval)
+        while True:
+            t0 = time.monotonic()
+            try:
+                await self.refresh()
+            except Exception:
+                # keep polling, the previous metrics stay available
+                LOG.exception("Unexpected error while updating metrics")
+
+            await asyncio.sleep(max(0, self.poll_interval - (time.monotonic() - t0)))
+
+    async def refresh(self) -> bool:
+        """Update the metrics, waiting at most 10 seconds. Returns whether the update succeeded."""
         try:
             # update metrics and waith max 10 seconds
             async with asyncio.timeout(10):
                 await asyncio.shield(self.update_metrics())
+            return True
         except TimeoutError:
             LOG.info("Timeout when updating metrics - using old values")
             MODEM_UPDATE_COUNT.labels(status="timeout").inc()
             MODEM_LAST_UPDATE.labels(status="timeout").set_to_current_time()
         except MetricUpdateFailedException:
             pass
+        return False
+
+    async def metrics(self, request: web.Request) -> web.Response:
+        """Gather metrics and return a built response"""
+        # in polling mode, serve the last completed update
+        if not self.poll_interval:
+            await self.refresh()
+
+        MODEM_METRICS_AGE.set(
+            time.monotonic() - self.last_update if self.last_update else float("nan")
+        )
+        return exposition_response(
+            request, self.exposition, self.request_registry, REGISTRY
+        )
+
+    async def probe(self, request: web.Request) -> web.Response:
+        """Gather metrics for the modem in the `target` parameter (blackbox exporter style)."""
+        if self.probe_targets is None:
+            raise web.HTTPNotFound(text="Probe mode is not enabled")
 
-        # from aiohttp support in prometheus-async
-        generate, _ = aio.web._choose_generator("*/*")
-        # Join the two registries
-        # FIXME: Less hacky way of ensuring the content is OK
-        return web.Response(
-            body=generate(self.registry).decode("utf-8").strip()
-            + "\n"
-            + generate(REGISTRY).decode("utf-8")
+        target = request.query.get("target")
+        if not target:
+            raise web.HTTPBadRequest(text="Missing 'target' parameter")
+        try:
+            exporter = self.probe_targets.get(target)
+        except TargetNotAllowedException as e:
+            raise web.HTTPForbidden(text=str(e))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+
+        t0 = time.monotonic()
+        success = await exporter.refresh()
+
+        registry = CollectorRegistry()
+        Gauge(
+            "probe_success", "Whether the modem update succeeded", registry=registry
+        ).set(1 if success else 0)
+        Gauge(
+            "probe_duration_seconds",
+            "Duration of the modem update in seconds",
+            registry=registry,
+        ).set(time.monotonic() - t0)
+
+        return exposition_response(
+            request, exporter.exposition, exporter.request_registry, registry
         )
 
     @aio.time(MODEM_METRICS_DURATION)
     async def update_metrics(self) -> None:
-        """Update the metrics and store them in the registry."""
+        """Update the metrics and replace the snapshot of the collector."""
         if self.__metrics_updating_lock.locked():
             MODEM_UPDATE_COUNT.labels(status="locked").inc()
             MODEM_LAST_UPDATE.labels(status="locked").set_to_current_time()
             raise MetricUpdateFailedException("Metrics are already being updated")
 
         async with self.__metrics_updating_lock:
-            registry = CollectorRegistry()
-            # create metrics
-            # note: _info will be postfixed
-            metric_modem_info = Info("modem", "Modem information", registry=registry)
-            metric_modem_uptime = Gauge("modem_uptime", "Uptime", registry=registry)
-            metric_node_boot_time = Gauge(
-                "node_boot_time_seconds",
-                "Node boot time, in unixtime (shifts when clocks between host and modem skew more than 10s).",
-                registry=registry,
-            )
-
-            # gather metrics in parallel
             try:
-                state, system_info, _, _, _ = await asyncio.gather(
-                    self.client.system_state(),
-                    self.client.system_info(),
-                    self.__update_downstream_channel_metrics(registry),
-                    self.__update_upstream_channel_metrics(registry),
-                    self.__log_based_metrics(registry),
+                now = time.monotonic()
+                previous_state = self.__results.get("state")
+                refreshed = await self.__refresh_sources(
+                    [name for name in DATA_SOURCES if self.__is_due(name, now)]
                 )
 
-                metric_modem_info.info(
-                    {
-                        "mac": state.mac_address,
-                        "serial": state.serial_number,
-                        "software_version": system_info.software_version,
-                        "hardware_version": system_info.hardware_version,
-                        "boot_file_name": state.boot_file_name,
-                    }
-                )
+                state = self.__result("state")
+                rebooted = self.__rebooted(previous_state, self.__results["state"])
+                if rebooted:
+                    LOG.info("Modem rebooted, refreshing all data sources")
+                    # cached responses (e.g. the system info) are from before the
+                    # boot, also the ones that were served in this update
+                    stale = self.client.cache_ttl is not None
+                    self.client.clear_cache()
+                    refreshed.extend(
+                        await self.__refresh_sources(
+                            [
+                                name
+                                for name in DATA_SOURCES
+                                if name not in refreshed or (stale and name != "state")
+                            ]
+                        )
+                    )
 
-                metric_modem_uptime.set(state.up_time)
+                modem_downstreams = self.__result("downstreams")
+                modem_upstreams = self.__result("upstreams")
+                self.modem_downstreams = modem_downstreams
+                self.modem_upstreams = modem_upstreams
+                if self.history and "downstreams" in refreshed:
+                    self.history.add(time.time(), modem_downstreams, modem_upstreams)
+                last_reboot = self.event_log.last_reboot
+                await self.__process_event_log(
+                    self.__result("event_log") if "event_log" in refreshed else None
+                )
+                # a reboot entry that is newer than the last update, in case the
+                # uptime did not show it
+                state_fetched = self.__results["state"][0]
+                if (
+                    not rebooted
+                    and previous_state
+                    and self.event_log.last_reboot is not last_reboot
+                    and state.up_time <= state_fetched - previous_state[0] + 10
+                ):
+                    LOG.info("Modem reboot in the event log")
+                    self.client.clear_cache()
+                    rebooted = True
+                if rebooted:
+                    for counters in (self.downstream_counters, self.upstream_counters):
+                        counters.reboot(state_fetched - state.up_time)
+                if "downstreams" in refreshed:
+                    self.downstream_counters.update(
+                        self.__results["downstreams"][0],
+                        downstream_counters(modem_downstreams),
+                    )
+                if "upstreams" in refreshed:
+                    self.upstream_counters.update(
+                        self.__results["upstreams"][0],
+                        upstream_counters(modem_upstreams),
+                    )
 
                 # only update the boot time if it shifted more than 10s. This
                 # stabilizes the value.
                 boot_time = time.time() - state.up_time
                 if abs(boot_time - self.__last_boot_time) > 10:
                     self.__last_boot_time = boot_time
-                # the metrics in the registry get re-created every time => set
-                # the value every time.
-                metric_node_boot_time.set(self.__last_boot_time)
+
+                self.collector.snapshot = ModemMetricsSnapshot(
+                    state=state,
+                    system_info=self.__result("system_info"),
+                    boot_time=self.__last_boot_time,
+                    downstreams=tuple(modem_downstreams),
+                    primary_downstream_channel_id=self.__result(
+                        "primary_downstream"
+                    ).channel_id,
+                    upstreams=tuple(modem_upstreams),
+                    log_priority_counts=dict(self.event_log.priority_counts),
+                    reboot_count=self.event_log.reboot_count,
+                    log_event_counts=dict(self.event_log.event_counts),
+                    ofdm_profile_failures=dict(self.event_log.ofdm_profile_failures),
+                    profile_messages=tuple(self.profile_messages),
+                    session=SessionStatistics.build(self.client),
+                    downstream_counters=self.downstream_counters.values(),
+                    upstream_counters=self.upstream_counters.values(),
+                    counter_resets={
+                        reason: self.downstream_counters.resets[reason]
+                        + self.upstream_counters.resets[reason]
+                        for reason in self.downstream_counters.resets
+                    },
+                    source_ages={
+                        name: now - fetched
+                        for name, (fetched, _) in self.__results.items()
+                    },
+                )
+                self.exposition = CachedExposition(self.registry)
 
                 MODEM_UPDATE_COUNT.labels(status="success").inc()
                 MODEM_LAST_UPDATE.labels(status="success").set_to_current_time()
 
-                self.registry = registry
+                self.last_update = time.monotonic()
             except (
                 aiohttp.ClientResponseError,
                 aiohttp.client_exceptions.ClientConnectorError,
@@ -197,352 +492,383 @@ class Exporter:
 
                 raise MetricUpdateFailedException() from e
             finally:
-                # async logout so we do not block the web interface
-                # keep strong reference to task to prevent GC before it runs/finishes:
-                task = asyncio.create_task(self.client._logout())
-                task.add_done_callback(self.background_tasks.discard)
-                self.background_tasks.add(task)
-
-    async def __update_upstream_channel_metrics(self, registry: CollectorRegistry):
-        metric_upstream_frequency = Gauge(
-            "modem_upstream_frequency",
-            "Upstream frequency",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_upstream_locked = Gauge(
-            "modem_upstream_locked",
-            "Upstream locked",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_upstream_power = Gauge(
-            "modem_upstream_power",
-            "Upstream power",
-            ["channel", "channel_type"],
-            registry=registry,
+                if not self.persistent_session:
+                    # async logout so we do not block the web interface
+                    # keep strong reference to task to prevent GC before it runs/finishes:
+                    task = asyncio.create_task(self.client._logout())
+                    task.add_done_callback(self.background_tasks.discard)
+                    self.background_tasks.add(task)
+
+    @staticmethod
+    def __rebooted(
+        previous: Optional[Tuple[float, ModemStateResult]],
+        current: Tuple[float, ModemStateResult],
+    ) -> bool:
+        """
+        Whether the modem booted between two (monotonic time, state) results: the
+        uptime grew less than the time between them (10s margin: the uptime is in
+        seconds and the responses take time).
+        """
+        if previous is None or previous is current:
+            return False
+        (previous_time, previous_state), (current_time, state) = previous, current
+        return (
+            state.up_time + 10 < previous_state.up_time + current_time - previous_time
         )
 
-        # Technically a counter, but value of a counter can not be set
-        metric_upstream_timeouts = Gauge(
-            "modem_upstream_timeout_total",
-            "Upstream timeouts by type",
-            ["channel", "channel_type", "timeout_type"],
-            registry=registry,
-        )
+    def __is_due(self, name: str, now: float) -> bool:
+        last = self.__results.get(name)
+        return last is None or now - last[0] >= self.refresh_intervals.get(name, 0)
 
-        metric_upstream_atdma_info = Info(
-            "modem_upstream_atdma",
-            "Information on ATDMA channel",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_upstream_ofdma_info = Info(
-            "modem_upstream_ofdma",
-            "Information on OFDMA channel",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
+    def __result(self, name: str) -> Any:
+        last = self.__results.get(name)
+        return last[1] if last else None
 
-        self.modem_upstreams = await self.client.modem_upstreams()
-        for ch in self.modem_upstreams:
-            metric_upstream_frequency.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(ch.frequency)
-            metric_upstream_locked.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(1 if ch.lock_status else 0)
-            metric_upstream_power.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(ch.power)
-
-            metric_upstream_timeouts.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type, timeout_type="t3"
-            ).set(ch.t3_timeouts)
-            metric_upstream_timeouts.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type, timeout_type="t4"
-            ).set(ch.t4_timeouts)
-
-            match ch.channel_type:
-                case "atdma":
-                    metric_upstream_atdma_info.labels(
-                        channel=ch.channel_id, channel_type=ch.channel_type
-                    ).info(
-                        {
-                            "modulation": ch.modulation,
-                            "symbol_rate": str(ch.symbol_rate),
-                        }
-                    )
-                    metric_upstream_timeouts.labels(
-                        channel=ch.channel_id,
-                        channel_type=ch.channel_type,
-                        timeout_type="t1",
-                    ).set(ch.t1_timeouts)
-                    metric_upstream_timeouts.labels(
-                        channel=ch.channel_id,
-                        channel_type=ch.channel_type,
-                        timeout_type="t2",
-                    ).set(ch.t2_timeouts)
-                case "ofdma":
-                    metric_upstream_ofdma_info.labels(
-                        channel=ch.channel_id, channel_type=ch.channel_type
-                    ).info(
-                        {
-                            "modulation": ch.modulation,
-                            "channel_width_hz": str(ch.channel_width),
-                            "fft_type": ch.fft_type,
-                            "number_of_active_subcarriers": str(
-                                ch.number_of_active_subcarriers
-                            ),
-                        }
-                    )
-                case _:
-                    raise ValueError(f"Unknown channel type: {ch.channel_type}")
+    async def __refresh_sources(self, names: List[str]) -> List[str]:
+        """Fetch the data sources in parallel and keep the results. Returns the names."""
+        results = await asyncio.gather(
+            *(getattr(self.client, DATA_SOURCES[name])() for name in names)
+        )
+        fetched = time.monotonic()
+        for name, result in zip(names, results):
+            self.__results[name] = (fetched, result)
+        return names
 
-    async def __update_downstream_channel_metrics(
-        self, registry: CollectorRegistry
+    async def __process_event_log(
+        self, log_lines: Optional[List[EventLogItem]]
     ) -> None:
-        metric_downstream_frequency = Gauge(
-            "modem_downstream_frequency",
-            "Downstream frequency",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_downstream_rx_mer = Gauge(
-            "modem_downstream_rx_mer",
-            "Downstream RX MER",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_downstream_power = Gauge(
-            "modem_downstream_power",
-            "Downstream power",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_downstream_locked = Gauge(
-            "modem_downstream_locked",
-            "Downstream lock status",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
+        """
+        Update the state derived from the logs (`log_lines` is None when the log was
+        not refreshed in this update).
 
-        # Technically a counter, but counter value can not be set
-        metric_downstream_errors = Gauge(
-            "modem_downstream_errors_total",
-            "Downstream errors",
-            ["channel", "channel_type", "error_type"],
-            registry=registry,
+        This goes through some pain to keep all profile messages for channels that are still present. There are two reasons:
+          * The modem expires log entries after enough have been produced. The downstream message is rare in known setups, so that ends to be no longer be present otherwise.
+          * Channels that are no longer present should not keep their profile.
+        """
+        if log_lines is not None:
+            await self.__ingest_event_log(log_lines)
+
+        # state from the messages that apply to this power cycle.
+        self.profile_messages.add_many(self.event_log.profile_messages)
+        self.profile_messages.retain_channels(
+            (ch.channel_id for ch in self.modem_downstreams),
+            (ch.channel_id for ch in self.modem_upstreams),
         )
 
-        metric_downstream_qam_snr = Gauge(
-            "modem_downstream_qam_snr",
-            "Downstream SNR",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
-        metric_downstream_qam_info = Info(
-            "modem_downstream_qam",
-            "Downstream info",
-            ["channel", "channel_type"],
-            registry=registry,
+    async def __ingest_event_log(self, log_lines: List[EventLogItem]) -> None:
+        log_lines = [
+            line
+            for line in log_lines
+            if self.include_login_messages or not is_login_message(line)
+        ]
+        self.log_lines = log_lines
+        # new entries are added at the start, the modem expires the oldest entries
+        self.log_etag = '"%x"' % (
+            hash((len(log_lines), log_lines[0], log_lines[-1]) if log_lines else ())
+            & 0xFFFFFFFFFFFFFFFF
         )
 
-        metric_downstream_ofdm_info = Info(
-            "modem_downstream_ofdm",
-            "Downstream info",
-            ["channel", "channel_type"],
-            registry=registry,
-        )
+        # only the new log lines are parsed. Archive and print them.
+        new_lines = self.event_log.ingest(log_lines)
+        if self.archive is not None and new_lines:
+            # after a restart, lines that were archived before are not printed again
+            new_lines = await asyncio.to_thread(self.archive.add, new_lines)
+        for msg in new_lines:
+            MODEM_LOG.info(
+                "%s [%s]: %s", msg.time.isoformat(), msg.priority, msg.message
+            )
 
-        self.modem_downstreams, primary_downstream = await asyncio.gather(
-            self.client.modem_downstreams(), self.client.modem_primary_downstream()
+    async def api_history(self, request: web.Request) -> web.Response:
+        """
+        Aggregates of the channel values of the last updates.
+
+        Parameters: `direction` (downstream, upstream; default: both), `channel`
+        (repeatable), `percentile` (repeatable, default 50 and 95) and `samples`
+        (include the values of every update).
+        """
+        if self.history is None:
+            raise web.HTTPNotFound(text="History is not enabled (--history-size)")
+
+        try:
+            directions = request.query.getall("direction", ["downstream", "upstream"])
+            channel_ids = [int(ch) for ch in request.query.getall("channel", [])]
+            percentiles = [
+                float(p)
+                for p in request.query.getall("percentile", DEFAULT_PERCENTILES)
+            ]
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if any(d not in ("downstream", "upstream") for d in directions):
+            raise web.HTTPBadRequest(text="Invalid direction")
+        if any(not 0 <= p <= 100 for p in percentiles):
+            raise web.HTTPBadRequest(text="Percentiles must be between 0 and 100")
+        include_samples = request.query.get("samples", "false").lower() in (
+            "1",
+            "true",
         )
 
-        for ch in self.modem_downstreams:
-            metric_downstream_frequency.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(ch.frequency)
-            metric_downstream_rx_mer.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(ch.rx_mer)
-            metric_downstream_power.labels(
-                channel=ch.channel_id, channel_type=ch.channel_type
-            ).set(ch.power)
-            metric_downstream_locked.labels(
-                channel=ch.channel_id,
-                channel_type=ch.channel_type,
-            ).set(ch.lock_status)
-
-            metric_downstream_errors.labels(
-                channel=ch.channel_id,
-                channel_type=ch.channel_type,
-                error_type="corrected",
-            ).set(ch.corrected_errors)
-            metric_downstream_errors.labels(
-                channel=ch.channel_id,
-                channel_type=ch.channel_type,
-                error_type="uncorrected",
-            ).set(ch.uncorrected_errors)
-
-            match ch.channel_type:
-                case "sc_qam":
-                    metric_downstream_qam_snr.labels(
-                        channel=ch.channel_id, channel_type=ch.channel_type
-                    ).set(ch.snr)
-                    metric_downstream_qam_info.labels(
-                        channel=ch.channel_id,
-                        channel_type=ch.channel_type,
-                    ).info(
-                        {
-                            "modulation": ch.modulation,
-                            "primary": (
-                                "true"
-                                if ch.channel_id == primary_downstream.channel_id
-                                else "false"
-                            ),
-                        }
-                    )
-                case "ofdm":
-                    metric_downstream_ofdm_info.labels(
-                        channel=ch.channel_id, channel_type=ch.channel_type
-                    ).info(
-                        {
-                            "modulation": ch.modulation,
-                            "channel_width_hz": str(ch.channel_width),
-                            "fft_type": ch.fft_type,
-                            "number_of_active_subcarriers": str(
-                                ch.number_of_active_subcarriers
-                            ),
-                        }
-                    )
-                case _:
-                    raise ValueError("Unknown downstream type %s" % ch.channel_type)
+        return web.json_response(
+            {
+                direction: getattr(self.history, direction).summary(
+                    channel_ids or None, percentiles, include_samples
+                )
+                for direction in directions
+            }
+        )
 
-    async def __log_based_metrics(self, registry: CollectorRegistry) -> None:
+    async def api_logs(self, request: web.Request) -> web.Response:
         """
-        Gather metrics from the logs.
+        Archived event log entries, newest first.
 
-        This goes through some pain to keep all profile messages for channels that are still present. There are two reasons:
-          * The modem expires log entries after enough have been produced. The downstream message is rare in known setups, so that ends to be no longer be present otherwise.
-          * We do not use the regular registry, and using that would mean explicitly deleting no longer present channels their profile
+        Parameters: `since` and `until` (ISO 8601), `priority` (repeatable), `limit`
+        (default 100) and `offset`.
         """
-        metric_channel_profile = Gauge(
-            "modem_channel_profile",
-            "Profile assigned to channel",
-            ["direction", "channel_id", "slot"],
-            registry=registry,
-        )
-        metric_ds_ofdm_profile_failure = Gauge(
-            "modem_cmstatus_info",
-            "FEC errors were over limit on one of the assigned downstream OFDM profiles of a channel",
-            ["channel_id", "profile", "type"],
-            registry=registry,
-        )
-        # Actually a Counter, but Counter would get a non-sensical (beccuse we recreate every request)
-        # _created metric.
-        metric_log_reboots = Gauge(
-            "modem_reboot_count",
-            "Number of reboots in modem log",
-            registry=registry,
+        if self.archive is None:
+            raise web.HTTPNotFound(text="Event log archive is not enabled")
+
+        try:
+            since, until = (
+                (
+                    datetime.datetime.fromisoformat(request.query[name]).astimezone()
+                    if name in request.query
+                    else None
+                )
+                for name in ("since", "until")
+            )
+            limit = int(request.query.get("limit", 100))
+            offset = int(request.query.get("offset", 0))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if limit < 1 or offset < 0:
+            raise web.HTTPBadRequest(text="limit must be positive, offset not negative")
+
+        entries = await asyncio.to_thread(
+            self.archive.query,
+            since=since,
+            until=until,
+            priorities=request.query.getall("priority", None),
+            limit=limit,
+            offset=offset,
         )
-        metric_log_by_priority = Gauge(
-            "modem_log_count", "Number of log messages", ["priority"], registry=registry
+        return web.json_response(
+            [
+                {
+                    "time": entry.time.isoformat(),
+                    "priority": entry.priority,
+                    "message": entry.message,
+                }
+                for entry in entries
+            ]
         )
 
-        log_lines = await self.client.modem_event_log()
-        log_lines = [
-            line
-            for line in log_lines
-            if self.include_login_messages or not is_login_message(line)
+    async def index(self, request: web.Request) -> web.StreamResponse:
+        """
+        Serve an index page with the event log of the last update, newest first.
+
+        Parameters: `limit` (default 100), `offset` and `priority` (repeatable). The
+        page is streamed and has an ETag: it is not sent again until the log changed.
+        """
+        try:
+            limit = int(request.query.get("limit", INDEX_PAGE_SIZE))
+            offset = int(request.query.get("offset", 0))
+        except ValueError as e:
+            raise web.HTTPBadRequest(text=str(e))
+        if limit < 1 or offset < 0:
+            raise web.HTTPBadRequest(text="limit must be positive, offset not negative")
+        priorities = request.query.getall("priority", [])
+
+        if self.log_lines is None:
+            # nothing was polled yet
+            await self.refresh()
+        log_lines, etag = self.log_lines, self.log_etag
+        if log_lines is None:
+            raise web.HTTPServiceUnavailable(text="The event log was not read yet")
+
+        if any(tag.value == etag.strip('"') for tag in request.if_none_match or ()):
+            return web.Response(status=304, headers={"ETag": etag})
+
+        entries = [
+            line for line in log_lines if not priorities or line.priority in priorities
         ]
-        for line in log_lines:
-            metric_log_by_priority.labels(priority=line.priority).inc()
+        page = entries[offset : offset + limit]
+
+        response = web.StreamResponse(headers={"ETag": etag})
+        response.content_type = "text/html"
+        response.charset = "utf-8"
+        response.enable_chunked_encoding()
+        await response.prepare(request)
+
+        await response.write(templates.index_head(limit).encode("utf-8"))
+        for idx in range(0, len(page), INDEX_CHUNK_SIZE):
+            rows = templates.format_log_entries(page[idx : idx + INDEX_CHUNK_SIZE])
+            await response.write("".join(rows).encode("utf-8"))
+        await response.write(
+            templates.index_tail(limit, offset, priorities, len(entries)).encode(
+                "utf-8"
+            )
+        )
+        await response.write_eof()
+        return response
+
+
+class ProbeTargetPool:
+    """
+    Exporters for the targets of the `/probe` endpoint.
+
+    Every target gets its own session client, registry, profile store and event log
+    state. All clients share one HTTP session. When more than `max_targets` targets
+    are probed, the least recently probed target is dropped (and logged out).
+
+    The password is sent to every target, so only the hosts in `allowed_targets`
+    (host names, IP addresses or networks such as `10.0.0.0/24`) can be probed.
+    """
+
+    password: str
+    """Host names (lower case) and networks that can be probed."""
+    allowed_hosts: FrozenSet[str]
+    allowed_networks: Tuple[ipaddress.IPv4Network | ipaddress.IPv6Network, ...]
+    timeout: int
+    max_targets: int
+    include_login_messages: bool
+    persistent_session: bool
+    token_refresh_after: Optional[float]
+    keep_alive: bool
+    pool_size: int
+    cache_ttl: Optional[Dict[str, float]]
+    refresh_intervals: Optional[Dict[str, float]]
+
+    __session: Optional[aiohttp.ClientSession] = None
+    __targets: OrderedDict[str, Exporter]
 
-        # print the new log message
-        current_messages = set(log_lines)
-        new_messages = current_messages - self.previous_logs
-        for msg in sorted(new_messages):
-            MODEM_LOG.info(
-                "%s [%s]: %s", msg.time.isoformat(), msg.priority, msg.message
+    def __init__(
+        self,
+        password: str,
+        allowed_targets: Iterable[str],
+        timeout: int = 15,
+        max_targets: int = 1024,
+        include_login_messages: bool = False,
+        persistent_session: bool = False,
+        token_refresh_after: Optional[float] = None,
+        keep_alive: bool = False,
+        pool_size: int = 4,
+        cache_ttl: Optional[Dict[str, float]] = None,
+        refresh_intervals: Optional[Dict[str, float]] = None,
+    ) -> None:
+        self.password = password
+        hosts, networks = set(), []
+        for allowed in allowed_targets:
+            try:
+                networks.append(ipaddress.ip_network(allowed, strict=False))
+            except ValueError:
+                hosts.add(allowed.lower())
+        self.allowed_hosts = frozenset(hosts)
+        self.allowed_networks = tuple(networks)
+        self.timeout = timeout
+        self.max_targets = max_targets
+        self.include_login_messages = include_login_messages
+        self.persistent_session = persistent_session
+        self.token_refresh_after = token_refresh_after
+        self.keep_alive = keep_alive
+        self.pool_size = pool_size
+        self.cache_ttl = cache_ttl
+        self.refresh_intervals = refresh_intervals
+
+        self.__targets = OrderedDict()
+        self.__background_tasks: Set[asyncio.Task] = set()
+
+    @staticmethod
+    def normalize_target(target: str) -> str:
+        """Normalize a target to a base URL, e.g. `192.168.100.1` -> `http://192.168.100.1`."""
+        if "://" not in target:
+            target = f"http://{target}"
+        url = URL(target)
+        if url.scheme not in ("http", "https") or not url.host:
+            raise ValueError(f"Invalid target: {target}")
+
+        return str(url).rstrip("/")
+
+    def is_allowed(self, base_url: str) -> bool:
+        """Whether the host of a normalized target is on the allow-list."""
+        host = URL(base_url).host
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return host.lower() in self.allowed_hosts
+        return any(address in network for network in self.allowed_networks)
+
+    def get(self, target: str) -> Exporter:
+        """Get (or create) the exporter for a target."""
+        base_url = self.normalize_target(target)
+        if not self.is_allowed(base_url):
+            raise TargetNotAllowedException(f"Target is not allowed: {base_url}")
+
+        exporter = self.__targets.get(base_url)
+        if exporter:
+            self.__targets.move_to_end(base_url)
+            return exporter
+
+        if not self.__session:
+            self.__session = build_session(
+                self.timeout, keep_alive=self.keep_alive, pool_size=self.pool_size
             )
-        self.previous_logs = current_messages
-
-        # parse the log lines
-        log_messages = [line.parse() for line in reversed(log_lines)]
-
-        # count reboots and find the last, so we only parse messages
-        # that apply to this power cycle.
-        last_reboot_idx = 0
-        for idx, message in enumerate(log_messages):
-            match message:
-                case RebootMessage(reason=_):
-                    metric_log_reboots.inc()
-                    last_reboot_idx = idx
-
-        for message in log_messages[last_reboot_idx:]:
-            # Process the first downstream and upstream messages
-            match message:
-                case CMStatusMessageOFDM(
-                    channel_id=channel_id,
-                    ds_id=_,
-                    event_code=event_code,
-                    profile=profile,
-                ):
-                    if event_code in (16, 24):
-                        value = 1 if event_code == 16 else 0
-
-                        metric_ds_ofdm_profile_failure.labels(
-                            channel_id=channel_id,
-                            profile=profile,
-                            type="ofdm_profile_failure",
-                        ).set(value)
-                case DownstreamProfileMessage():
-                    self.profile_messages.add(message)
-                case UpstreamProfileMessage():
-                    self.profile_messages.add(message)
-
-        self.profile_messages.update_for_channels(
-            self.modem_downstreams, self.modem_upstreams
+
+        LOG.info("Adding probe target %s", base_url)
+        exporter = Exporter(
+            SagemcomModemSessionClient(
+                self.__session,
+                base_url,
+                self.password,
+                token_refresh_after=self.token_refresh_after,
+                cache_ttl=self.cache_ttl,
+            ),
+            port=0,
+            include_login_messages=self.include_login_messages,
+            persistent_session=self.persistent_session,
+            refresh_intervals=self.refresh_intervals,
         )
+        self.__targets[base_url] = exporter
 
-        for message in self.profile_messages:
-            match message:
-                case DownstreamProfileMessage(
-                    channel_id=channel_id,
-                    previous_profile=_,
-                    profile=profile,
-                ):
-                    for idx, profile in enumerate(profile):
-                        metric_channel_profile.labels(
-                            direction="downstream",
-                            channel_id=channel_id,
-                            slot=str(idx + 1),
-                        ).set(profile)
-                case UpstreamProfileMessage(
-                    channel_id=channel_id,
-                    previous_profile=_,
-                    profile=profile,
-                ):
-                    for idx, profile in enumerate(profile):
-                        metric_channel_profile.labels(
-                            direction="upstream",
-                            channel_id=channel_id,
-                            slot=str(idx + 1),
-                        ).set(profile)
-
-    async def index(self, _: web.Request) -> str:
-        """Serve an index page."""
-        logs = [
-            line
-            for line in await self.client.modem_event_log()
-            if self.include_login_messages or not is_login_message(line)
-        ]
+        while len(self.__targets) > self.max_targets:
+            dropped_url, dropped = self.__targets.popitem(last=False)
+            LOG.info("Dropping least recently probed target %s", dropped_url)
+            task = asyncio.create_task(dropped.client._logout())
+            task.add_done_callback(self.__background_tasks.discard)
+            self.__background_tasks.add(task)
+
+        return exporter
+
+    def __len__(self) -> int:
+        return len(self.__targets)
 
-        return web.Response(
-            text=templates.index_template(logs),
-            content_type="text/html",
+    async def close(self) -> None:
+        """Log out of all targets and close the shared session."""
+        await asyncio.gather(
+            *(exporter.client._logout() for exporter in self.__targets.values()),
+            return_exceptions=True,
         )
+        self.__targets.clear()
+
+        if self.__session:
+            await self.__session.close()
+            self.__session = None
+
+
+def parse_refresh_intervals(
+    ctx: click.Context, param: click.Parameter, values: Iterable[str]
+) -> Dict[str, float]:
+    """`source=seconds` options, on top of `DEFAULT_REFRESH_INTERVALS`."""
+    intervals = dict(DEFAULT_REFRESH_INTERVALS)
+    for value in values:
+        source, _, seconds = value.partition("=")
+        if source not in DATA_SOURCES:
+            raise click.BadParameter(
+                f"unknown data source {source!r} (one of {', '.join(DATA_SOURCES)})"
+            )
+        try:
+            intervals[source] = float(seconds)
+        except ValueError:
+            raise click.BadParameter(f"expected {source}=<seconds>, got {value!r}")
+    return intervals
 
 
 @click.command()
@@ -555,14 +881,110 @@ class Exporter:
 )
 @click.option("--include-login-messages", is_flag=True, default=False)
 @click.option("-p", "--port", default=8080, help="Port to listen on")
+@click.option(
+    "--poll-interval",
+    default=0.0,
+    help="Poll the modem in the background every N seconds and serve the last result on /metrics (0: poll on every scrape)",
+)
+@click.option(
+    "--refresh-interval",
+    "refresh_intervals",
+    multiple=True,
+    callback=parse_refresh_intervals,
+    metavar="SOURCE=SECONDS",
+    help=f"Refresh a data source of the modem at most every N seconds, updates use its last result ({', '.join(DATA_SOURCES)}; default: "
+    + ", ".join(f"{k}={v:g}" for k, v in DEFAULT_REFRESH_INTERVALS.items())
+    + ", the others on every update)",
+)
+@click.option(
+    "--persistent-session/--no-persistent-session",
+    default=False,
+    help="Keep the modem session between updates instead of logging out after every update",
+)
+@click.option(
+    "--token-refresh-after",
+    default=240.0,
+    help="With a persistent session: refresh the session token when it is older than N seconds",
+)
+@click.option(
+    "--keep-alive/--no-keep-alive",
+    default=False,
+    help="Re-use connections to the modem instead of opening a connection per request",
+)
+@click.option(
+    "--keep-alive-pool-size",
+    default=4,
+    help="With --keep-alive: maximum number of connections per modem",
+)
+@click.option(
+    "--response-cache/--no-response-cache",
+    default=False,
+    help="Cache the static system info and share the event log between the index page and metrics, share concurrent identical requests",
+)
+@click.option(
+    "--capture-journal",
+    type=click.Path(dir_okay=False),
+    help="Write all requests to the modem and the responses to this journal (credentials are redacted, gzip compressed when the name ends in .gz)",
+)
+@click.option(
+    "--history-size",
+    default=0,
+    help="Keep the channel values of the last N updates for /api/history (requires numpy, 0: disabled)",
+)
+@click.option(
+    "--event-log-archive",
+    type=click.Path(dir_okay=False),
+    default=None,
+    help="Archive all event log entries in this SQLite database (served on /api/logs)",
+)
+@click.option(
+    "--parse-cache-size",
+    default=PARSE_CACHE_SIZE,
+    help="Number of parsed log messages to cache",
+)
+@click.option(
+    "--probe-allow",
+    multiple=True,
+    metavar="HOST_OR_CIDR",
+    help="Enable /probe?target= for this host name, IP address or network (repeatable). The modem password is sent to the targets.",
+)
+@click.option(
+    "--max-probe-targets",
+    default=1024,
+    help="Maximum number of modems kept for the /probe?target= endpoint",
+)
 @click.option(
     "--password",
     default=os.environ.get("MODEM_PASSWORD", ""),
     help="Password - default from MODEM_PASSWORD",
 )
 def main(
-    verbose, port: int, password: str, base_url: str, include_login_messages: bool
+    verbose,
+    port: int,
+    password: str,
+    base_url: str,
+    include_login_messages: bool,
+    max_probe_targets: int,
+    probe_allow: Sequence[str],
+    poll_interval: float,
+    refresh_intervals: Dict[str, float],
+    persistent_session: bool,
+    token_refresh_after: float,
+    keep_alive: bool,
+    keep_alive_pool_size: int,
+    response_cache: bool,
+    capture_journal: Optional[str],
+    history_size: int,
+    event_log_archive: Optional[str],
+    parse_cache_size: int,
 ):
+    if history_size and not history_available():
+        raise click.UsageError(
+            "--history-size requires numpy "
+            "(pip install sagemcom-f3896-client[history])"
+        )
+
+    set_parse_cache_size(parse_cache_size)
     asyncio.run(
         async_main(
             verbose,
@@ -570,21 +992,98 @@ def main(
             password,
             base_url,
             include_login_messages=include_login_messages,
+            max_probe_targets=max_probe_targets,
+            probe_allow=probe_allow,
+            poll_interval=poll_interval,
+            refresh_intervals=refresh_intervals,
+            persistent_session=persistent_session,
+            token_refresh_after=token_refresh_after,
+            keep_alive=keep_alive,
+            keep_alive_pool_size=keep_alive_pool_size,
+            response_cache=response_cache,
+            capture_journal=capture_journal,
+            history_size=history_size,
+            event_log_archive=event_log_archive,
         )
     )
 
 
 async def async_main(
-    verbose, port: int, password: str, base_url: str, include_login_messages: bool
+    verbose,
+    port: int,
+    password: str,
+    base_url: str,
+    include_login_messages: bool,
+    max_probe_targets: int = 1024,
+    probe_allow: Sequence[str] = (),
+    poll_interval: float = 0,
+    refresh_intervals: Optional[Dict[str, float]] = None,
+    persistent_session: bool = False,
+    token_refresh_after: float = 240,
+    keep_alive: bool = False,
+    keep_alive_pool_size: int = 4,
+    response_cache: bool = False,
+    capture_journal: Optional[str] = None,
+    history_size: int = 0,
+    event_log_archive: Optional[str] = None,
 ):
     if verbose > 0:
         import logging
 
         logging.basicConfig(level=logging.DEBUG)
 
-    async with SagemcomModemClient(base_url, password) as client:
-        exporter = Exporter(client, port, include_login_messages=include_login_messages)
-        await exporter.run()
+    # only refresh tokens proactively when the session is kept
+    token_refresh_after = token_refresh_after if persistent_session else None
+
+    cache_ttl = DEFAULT_CACHE_TTL if response_cache else None
+    archive = EventLogArchive(event_log_archive) if event_log_archive else None
+    capture = CaptureJournal(capture_journal) if capture_journal else None
+    # probe mode sends the password to the targets: only with an allow-list
+    probe_targets = (
+        ProbeTargetPool(
+            password,
+            probe_allow,
+            max_targets=max_probe_targets,
+            include_login_messages=include_login_messages,
+            persistent_session=persistent_session,
+            token_refresh_after=token_refresh_after,
+            keep_alive=keep_alive,
+            pool_size=keep_alive_pool_size,
+            cache_ttl=cache_ttl,
+            refresh_intervals=refresh_intervals,
+        )
+        if probe_allow
+        else None
+    )
+    try:
+        async with SagemcomModemClient(
+            base_url,
+            password,
+            token_refresh_after=token_refresh_after,
+            keep_alive=keep_alive,
+            pool_size=keep_alive_pool_size,
+            cache_ttl=cache_ttl,
+            capture=capture,
+        ) as client:
+            exporter = Exporter(
+                client,
+                port,
+                include_login_messages=include_login_messages,
+                probe_targets=probe_targets,
+                poll_interval=poll_interval or None,
+                persistent_session=persistent_session,
+                history_size=history_size,
+                archive=archive,
+                refresh_intervals=refresh_intervals,
+            )
+            await exporter.run()
+    finally:
+        if probe_targets is not None:
+            await probe_targets.close()
+        if archive is not None:
+            archive.close()
+        if capture is not None:
+            capture.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+import gzip
+from typing import Callable, Dict, Tuple
+
+from aiohttp import web
+from prometheus_client.exposition import choose_encoder
+from prometheus_client.registry import Collector
+
+"""Compression level of the gzip encoded exposition."""
+GZIP_LEVEL = 6
+
+OPENMETRICS_EOF = b"# EOF\n"
+
+Encoder = Callable[[Collector], bytes]
+
+
+def accepts_gzip(accept_encoding: str | None) -> bool:
+    """Whether the `Accept-Encoding` header allows a gzip encoded response."""
+    for coding in (accept_encoding or "").split(","):
+        name, *params = coding.split(";")
+        if name.strip().lower() not in ("gzip", "*"):
+            continue
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    if float(value) == 0:
+                        break
+                except ValueError:
+                    break
+        else:
+            return True
+    return False
+
+
+def is_openmetrics(content_type: str) -> bool:
+    return content_type.startswith("application/openmetrics-text")
+
+
+def encode(
+    encoder: Encoder, content_type: str, collector: Collector, last: bool
+) -> bytes:
+    """
+    Render a collector. In the OpenMetrics format only the last part of a response may
+    contain the `# EOF` marker.
+    """
+    body = encoder(collector)
+    if not last and is_openmetrics(content_type) and body.endswith(OPENMETRICS_EOF):
+        return body[: -len(OPENMETRICS_EOF)]
+    return body
+
+
+class CachedExposition:
+    """
+    The exposition of a registry that is not changed after it is complete (the
+    registry of one update).
+
+    Every format (content type) and encoding is rendered once, on the first request
+    for it. The cached part is always the start of a response: it does not contain the
+    OpenMetrics `# EOF` marker.
+    """
+
+    collector: Collector
+    """(content type, gzip) -> body"""
+    __rendered: Dict[Tuple[str, bool], bytes]
+
+    def __init__(self, collector: Collector) -> None:
+        self.collector = collector
+        self.__rendered = {}
+
+    def render(self, encoder: Encoder, content_type: str, gzipped: bool) -> bytes:
+        key = (content_type, gzipped)
+        body = self.__rendered.get(key)
+        if body is None:
+            if gzipped:
+                body = gzip.compress(
+                    self.render(encoder, content_type, False), GZIP_LEVEL
+                )
+            else:
+                body = encode(encoder, content_type, self.collector, last=False)
+            self.__rendered[key] = body
+        return body
+
+
+def exposition_response(
+    request: web.Request, cached: CachedExposition, *collectors: Collector
+) -> web.Response:
+    """
+    Build the response for a scrape: the cached exposition followed by the
+    `collectors`, which are rendered for every request.
+
+    The format is negotiated on the `Accept` header. When the client accepts gzip, the
+    response is gzip encoded: concatenated gzip members are a valid gzip stream, so the
+    cached part is compressed only once.
+    """
+    encoder, content_type = choose_encoder(request.headers.get("Accept", ""))
+    gzipped = accepts_gzip(request.headers.get("Accept-Encoding"))
+
+    parts = [cached.render(encoder, content_type, gzipped)]
+    for idx, collector in enumerate(collectors):
+        body = encode(encoder, content_type, collector, last=idx == len(collectors) - 1)
+        parts.append(gzip.compress(body, GZIP_LEVEL) if gzipped else body)
+
+    headers = {"Content-Type": content_type, "Vary": "Accept, Accept-Encoding"}
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    return web.Response(body=b"".join(parts), headers=headers)
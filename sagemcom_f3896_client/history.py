@@ -0,0 +1,206 @@
+"""
+Fixed-size history of the channel values of the last updates.
+
+Requires numpy (optional dependency). Every direction has one preallocated array per
+field, with a row per channel and a column per update. The columns are used as a
+ring buffer, so memory does not grow with uptime.
+"""
+
+import logging
+import warnings
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from sagemcom_f3896_client.models import (
+    ModemDownstreamChannelResult,
+    ModemUpstreamChannelResult,
+)
+
+LOG = logging.getLogger(__name__)
+
+DOWNSTREAM_FIELDS = ["power", "rx_mer", "snr", "corrected_errors", "uncorrected_errors"]
+UPSTREAM_FIELDS = ["power", "t3_timeouts", "t4_timeouts"]
+
+DEFAULT_PERCENTILES = (50.0, 95.0)
+
+
+def history_available() -> bool:
+    """Whether numpy is installed."""
+    return np is not None
+
+
+class ChannelRingBuffer:
+    """
+    The last `size` values of `fields` for at most `max_channels` channels.
+
+    Channels get a row on first sight. When all rows are used, the row of the channel
+    that was seen least recently is re-used. A channel that is missing in an update
+    has NaN for that update.
+    """
+
+    size: int
+    max_channels: int
+    fields: List[str]
+    """Number of updates added (the next column is `count % size`)."""
+    count: int = 0
+
+    """Unix time of every column."""
+    times: "np.ndarray"
+    """field -> (max_channels, size) array"""
+    values: Dict[str, "np.ndarray"]
+    """channel id -> row"""
+    rows: Dict[int, int]
+    """Update count at which a row was last written."""
+    last_seen: "np.ndarray"
+
+    def __init__(self, fields: List[str], size: int, max_channels: int = 64) -> None:
+        if np is None:
+            raise RuntimeError(
+                "numpy is required for the channel history "
+                "(pip install sagemcom-f3896-client[history])"
+            )
+        if size < 1 or max_channels < 1:
+            raise ValueError("size and max_channels must be positive")
+
+        self.size = size
+        self.max_channels = max_channels
+        self.fields = fields
+
+        self.times = np.full(size, np.nan)
+        self.values = {field: np.full((max_channels, size), np.nan) for field in fields}
+        self.rows = {}
+        self.last_seen = np.full(max_channels, -1, dtype=np.int64)
+
+    def __row(self, channel_id: int) -> int:
+        row = self.rows.get(channel_id)
+        if row is not None:
+            return row
+
+        if len(self.rows) < self.max_channels:
+            row = len(self.rows)
+        else:
+            row = int(np.argmin(self.last_seen))
+            evicted = next(ch for ch, r in self.rows.items() if r == row)
+            LOG.info(
+                "Channel history is full, dropping channel %d for channel %d",
+                evicted,
+                channel_id,
+            )
+            del self.rows[evicted]
+            for values in self.values.values():
+                values[row, :] = np.nan
+
+        self.rows[channel_id] = row
+        return row
+
+    def add(self, timestamp: float, channels: Iterable[object]) -> None:
+        """Add the values of one update."""
+        column = self.count % self.size
+        self.times[column] = timestamp
+        for values in self.values.values():
+            values[:, column] = np.nan
+
+        for ch in channels:
+            row = self.__row(ch.channel_id)
+            self.last_seen[row] = self.count
+            for field, values in self.values.items():
+                value = getattr(ch, field, None)
+                if value is not None:
+                    values[row, column] = value
+
+        self.count += 1
+
+    @property
+    def samples(self) -> int:
+        return min(self.count, self.size)
+
+    def __chronological(self) -> "np.ndarray":
+        """Column indices from the oldest to the newest update."""
+        if self.count <= self.size:
+            return np.arange(self.count)
+        return (np.arange(self.size) + self.count) % self.size
+
+    def summary(
+        self,
+        channel_ids: Optional[Sequence[int]] = None,
+        percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+        include_samples: bool = False,
+    ) -> Dict:
+        """
+        Aggregates of every field per channel, computed for all channels at once.
+
+        Values that are not known are None (null in JSON).
+        """
+        channels = sorted(
+            (ch, row)
+            for ch, row in self.rows.items()
+            if channel_ids is None or ch in channel_ids
+        )
+        result = {
+            "samples": self.samples,
+            "channels": {str(ch): {} for ch, _ in channels},
+        }
+        if not channels or not self.samples:
+            return result
+
+        rows = np.array([row for _, row in channels])
+        columns = self.__chronological()
+        if include_samples:
+            result["times"] = self.times[columns].tolist()
+
+        with warnings.catch_warnings():
+            # channels without values for a field (e.g. SNR of OFDM channels)
+            warnings.simplefilter("ignore", RuntimeWarning)
+            for field, values in self.values.items():
+                window = values[np.ix_(rows, columns)]
+                aggregates = {
+                    "min": np.nanmin(window, axis=1),
+                    "max": np.nanmax(window, axis=1),
+                    "last": window[:, -1],
+                }
+                if percentiles:
+                    for percentile, column in zip(
+                        percentiles,
+                        np.nanpercentile(window, percentiles, axis=1),
+                    ):
+                        aggregates[f"p{percentile:g}"] = column
+
+                for idx, (ch, _) in enumerate(channels):
+                    field_result = {
+                        name: _to_json(column[idx])
+                        for name, column in aggregates.items()
+                    }
+                    if include_samples:
+                        field_result["values"] = [_to_json(v) for v in window[idx]]
+                    result["channels"][str(ch)][field] = field_result
+
+        return result
+
+
+def _to_json(value: float) -> Optional[float]:
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+class ChannelHistory:
+    """History of the downstream and upstream channels."""
+
+    downstream: ChannelRingBuffer
+    upstream: ChannelRingBuffer
+
+    def __init__(self, size: int, max_channels: int = 64) -> None:
+        self.downstream = ChannelRingBuffer(DOWNSTREAM_FIELDS, size, max_channels)
+        self.upstream = ChannelRingBuffer(UPSTREAM_FIELDS, size, max_channels)
+
+    def add(
+        self,
+        timestamp: float,
+        downstreams: Iterable[ModemDownstreamChannelResult],
+        upstreams: Iterable[ModemUpstreamChannelResult],
+    ) -> None:
+        self.downstream.add(timestamp, downstreams)
+        self.upstream.add(timestamp, upstreams)
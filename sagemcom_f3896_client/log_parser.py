@@ -1,6 +1,7 @@
+import functools
 import re
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Callable, Dict, List, Literal, Optional, Sequence, Tuple
 
 
 @dataclass(eq=True, frozen=True)
@@ -36,11 +37,40 @@ class RebootMessage:
     reason: str
 
 
+@dataclass(eq=True, frozen=True)
+class T3TimeoutMessage:
+    """No ranging response received from the CMTS (T3 time-out)."""
+
+    ranging: Literal["initial", "unicast_maintenance"]
+
+
+@dataclass(eq=True, frozen=True)
+class ConsecutiveT3TimeoutsMessage:
+    """Ranging on an upstream channel timed out multiple times in a row."""
+
+    channel_id: int
+    count: int
+
+
+@dataclass(eq=True, frozen=True)
+class MDDTimeoutMessage:
+    """No MAC Domain Descriptor received in time."""
+
+
+@dataclass(eq=True, frozen=True)
+class RangingFailureMessage:
+    """Unicast maintenance ranging failed after all retries."""
+
+
 ParsedMessage = (
     CMStatusMessageOFDM
     | DownstreamProfileMessage
     | UpstreamProfileMessage
     | RebootMessage
+    | T3TimeoutMessage
+    | ConsecutiveT3TimeoutsMessage
+    | MDDTimeoutMessage
+    | RangingFailureMessage
 )
 
 
@@ -54,6 +84,137 @@ CM_STATUS_OFDM_RE = re.compile(
     r"^CM-STATUS message sent. Event Type Code: (?P<event_code>\d+); Chan ID: (?P<channel_id>\d+); DSID: (?P<ds_id>(\d+|N/A)); MAC Addr: N/A; OFDM/OFDMA Profile ID: (?P<profile>\d+).;.*$"
 )
 REBOOT_RE = re.compile(r"^Cable Modem Reboot because of - (?P<message>.*)$")
+T3_TIMEOUT_RE = re.compile(
+    r"^(?P<ranging>No Ranging Response received|Started Unicast Maintenance Ranging - No Response received) - T3 time-out(;.*)?$"
+)
+CONSECUTIVE_T3_TIMEOUTS_RE = re.compile(
+    r"^(?P<count>\d+) consecutive T3 timeouts while trying to range on upstream channel (?P<channel_id>\d+)(;.*)?$"
+)
+MDD_TIMEOUT_RE = re.compile(r"^MDD message timeout(;.*)?$")
+RANGING_FAILURE_RE = re.compile(
+    r"^Unicast Maintenance Ranging attempted - No response - Retries exhausted(;.*)?$"
+)
+
+
+@dataclass(frozen=True)
+class MessageType:
+    """
+    A type of log message: messages that start with one of `prefixes` and match
+    `pattern` are parsed by `build`.
+    """
+
+    name: str
+    pattern: re.Pattern
+    prefixes: Tuple[str, ...]
+    build: Callable[[re.Match], ParsedMessage]
+
+
+"""Registered message types, in the order in which they are tried."""
+MESSAGE_TYPES: List[MessageType] = []
+"""First character of a message -> the message types with a prefix starting with it."""
+_MESSAGE_TYPES_BY_FIRST_CHAR: Dict[str, List[MessageType]] = {}
+
+
+def register_message_type(name: str, pattern: re.Pattern, prefixes: Sequence[str]):
+    """
+    Register a builder for the messages matching `pattern`.
+
+    `prefixes` are the literal starts of the matching messages: a message is only
+    matched against the patterns of the types with a prefix of the message, so most
+    messages are tried against one pattern or none. The builder gets the match.
+    """
+
+    def decorator(build: Callable[[re.Match], ParsedMessage]):
+        message_type = MessageType(name, pattern, tuple(prefixes), build)
+        MESSAGE_TYPES.append(message_type)
+        for first_char in {prefix[0] for prefix in message_type.prefixes}:
+            _MESSAGE_TYPES_BY_FIRST_CHAR.setdefault(first_char, []).append(message_type)
+        return build
+
+    return decorator
+
+
+def _parse_profile(value: Optional[str]) -> Optional[Tuple[int, ...]]:
+    return tuple(map(int, value.split())) if value else None
+
+
+@register_message_type("cm_status_ofdm", CM_STATUS_OFDM_RE, ["CM-STATUS message sent."])
+def _build_cm_status_ofdm(match: re.Match) -> CMStatusMessageOFDM:
+    return CMStatusMessageOFDM(
+        channel_id=int(match.group("channel_id")),
+        ds_id=int(match.group("ds_id")) if match.group("ds_id") != "N/A" else None,
+        event_code=int(match.group("event_code")),
+        profile=int(match.group("profile")),
+    )
+
+
+@register_message_type("ds_profile", DS_PROFILE_RE, ["DS profile assignment change."])
+def _build_ds_profile(match: re.Match) -> DownstreamProfileMessage:
+    return DownstreamProfileMessage(
+        channel_id=int(match.group("channel_id")),
+        previous_profile=_parse_profile(match.group("previous_profile")),
+        profile=_parse_profile(match.group("profile")),
+    )
+
+
+@register_message_type("us_profile", US_PROFILE_RE, ["US profile assignment change."])
+def _build_us_profile(match: re.Match) -> UpstreamProfileMessage:
+    return UpstreamProfileMessage(
+        channel_id=int(match.group("channel_id")),
+        previous_profile=_parse_profile(match.group("previous_profile")),
+        profile=_parse_profile(match.group("profile")),
+    )
+
+
+@register_message_type("reboot", REBOOT_RE, ["Cable Modem Reboot because of - "])
+def _build_reboot(match: re.Match) -> RebootMessage:
+    return RebootMessage(reason=match.group("message"))
+
+
+@register_message_type(
+    "t3_timeout",
+    T3_TIMEOUT_RE,
+    [
+        "No Ranging Response received",
+        "Started Unicast Maintenance Ranging - No Response received",
+    ],
+)
+def _build_t3_timeout(match: re.Match) -> T3TimeoutMessage:
+    return T3TimeoutMessage(
+        ranging=(
+            "initial"
+            if match.group("ranging").startswith("No Ranging")
+            else "unicast_maintenance"
+        )
+    )
+
+
+# starts with the number of timeouts
+@register_message_type(
+    "consecutive_t3_timeouts", CONSECUTIVE_T3_TIMEOUTS_RE, list("0123456789")
+)
+def _build_consecutive_t3_timeouts(match: re.Match) -> ConsecutiveT3TimeoutsMessage:
+    return ConsecutiveT3TimeoutsMessage(
+        channel_id=int(match.group("channel_id")), count=int(match.group("count"))
+    )
+
+
+@register_message_type("mdd_timeout", MDD_TIMEOUT_RE, ["MDD message timeout"])
+def _build_mdd_timeout(_: re.Match) -> MDDTimeoutMessage:
+    return MDDTimeoutMessage()
+
+
+@register_message_type(
+    "ranging_failure",
+    RANGING_FAILURE_RE,
+    ["Unicast Maintenance Ranging attempted - No response"],
+)
+def _build_ranging_failure(_: re.Match) -> RangingFailureMessage:
+    return RangingFailureMessage()
+
+
+# Default number of parsed messages that are cached
+PARSE_CACHE_SIZE = 1024
 
 
 def is_login_message(item) -> bool:
@@ -61,42 +222,33 @@ def is_login_message(item) -> bool:
 
 
 def parse_message(message: str) -> Optional[ParsedMessage]:
-    """Parse a message in the modem log"""
-    match = CM_STATUS_OFDM_RE.match(message)
-    if match:
-        ds_id = match.group("ds_id")
-
-        return CMStatusMessageOFDM(
-            channel_id=int(match.group("channel_id")),
-            ds_id=int(ds_id) if ds_id != "N/A" else None,
-            event_code=int(match.group("event_code")),
-            profile=int(match.group("profile")),
-        )
-    match = DS_PROFILE_RE.match(message)
-    if match:
-        return DownstreamProfileMessage(
-            channel_id=int(match.group("channel_id")),
-            previous_profile=(
-                tuple(map(int, match.group("previous_profile").split()))
-                if match.group("previous_profile")
-                else None
-            ),
-            profile=tuple(map(int, match.group("profile").split())),
-        )
+    """
+    Parse a message in the modem log.
+
+    Results are cached by message text (least recently used messages are evicted).
+    The parsed messages are frozen, so they can be shared.
+    """
+    return _cached_parse_message(message)
+
+
+def set_parse_cache_size(maxsize: Optional[int]) -> None:
+    """Set the number of parsed messages to cache (None: unbounded, 0: disabled). Clears the cache."""
+    global _cached_parse_message
+    _cached_parse_message = functools.lru_cache(maxsize=maxsize)(_parse_message)
 
-    match = US_PROFILE_RE.match(message)
-    if match:
-        return UpstreamProfileMessage(
-            channel_id=int(match.group("channel_id")),
-            previous_profile=(
-                tuple(map(int, match.group("previous_profile").split()))
-                if match.group("previous_profile")
-                else None
-            ),
-            profile=tuple(map(int, match.group("profile").split())),
-        )
 
-    match = REBOOT_RE.match(message)
-    if match:
-        return RebootMessage(reason=match.group("message"))
+def parse_cache_info() -> functools._CacheInfo:
+    """Hits, misses, maximum and current size of the parse cache."""
+    return _cached_parse_message.cache_info()
+
+
+def _parse_message(message: str) -> Optional[ParsedMessage]:
+    for message_type in _MESSAGE_TYPES_BY_FIRST_CHAR.get(message[:1], ()):
+        if message.startswith(message_type.prefixes):
+            match = message_type.pattern.match(message)
+            if match:
+                return message_type.build(match)
     return None
+
+
+_cached_parse_message = functools.lru_cache(maxsize=PARSE_CACHE_SIZE)(_parse_message)
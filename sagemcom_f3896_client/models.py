@@ -1,7 +1,8 @@
+import dataclasses
 import datetime
 import logging
 from dataclasses import dataclass
-from typing import Dict, List, Literal
+from typing import Any, Dict, List, Literal, Mapping, Optional, Tuple
 
 from sagemcom_f3896_client.log_parser import ParsedMessage, parse_message
 
@@ -36,7 +37,7 @@ class UserTokenResult:
         )
 
 
-@dataclass(order=True, frozen=True)
+@dataclass(order=True, frozen=True, slots=True)
 class EventLogItem:
     """Event log elements.
 
@@ -60,7 +61,7 @@ class EventLogItem:
         return parse_message(self.message)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ModemStateResult:
     boot_file_name: str
     docsis_version: str
@@ -87,7 +88,7 @@ class ModemStateResult:
         )
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemDownstreamChannelResult:
     channel_type: Literal["ofdm", "sc_qam"] = "ofdm"
     channel_id: int
@@ -100,7 +101,7 @@ class ModemDownstreamChannelResult:
     uncorrected_errors: int
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemQAMDownstreamChannelResult(ModemDownstreamChannelResult):
     # in DB (int)
     snr: int
@@ -122,7 +123,7 @@ class ModemQAMDownstreamChannelResult(ModemDownstreamChannelResult):
         )
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemOFDMDownstreamChannelResult(ModemDownstreamChannelResult):
     """In hz"""
 
@@ -150,7 +151,7 @@ class ModemOFDMDownstreamChannelResult(ModemDownstreamChannelResult):
         )
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemUpstreamChannelResult:
     channel_type: Literal["atdma", "ofdma"]
     channel_id: int
@@ -165,7 +166,7 @@ class ModemUpstreamChannelResult:
     t4_timeouts: int
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemATDMAUpstreamChannelResult(ModemUpstreamChannelResult):
     symbol_rate: int
     t1_timeouts: int
@@ -188,7 +189,7 @@ class ModemATDMAUpstreamChannelResult(ModemUpstreamChannelResult):
         )
 
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, frozen=True, slots=True)
 class ModemOFDMAUpstreamChannelResult(ModemUpstreamChannelResult):
     channel_width: float
     fft_type: Literal["2K", "4K"]
@@ -212,7 +213,7 @@ class ModemOFDMAUpstreamChannelResult(ModemUpstreamChannelResult):
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class ModemServiceFlowResult:
     # https://www.rfc-editor.org/rfc/rfc4323
     id: int
@@ -244,7 +245,7 @@ class ModemServiceFlowResult:
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class SystemInfoResult:
     model_name: str
     software_version: str
@@ -259,7 +260,7 @@ class SystemInfoResult:
         )
 
 
-@dataclass
+@dataclass(frozen=True)
 class SystemProvisioningResponse:
     provisioning_mode: Literal["enable", "disable"]
     mac_address: str
@@ -272,3 +273,53 @@ class SystemProvisioningResponse:
             mac_address=body["provisioning"]["macAddress"],
             ds_lite_enabled=body["provisioning"]["dsLite"]["enable"],
         )
+
+
+@dataclass(frozen=True)
+class ModemSnapshot:
+    """
+    The state of the modem, fetched concurrently by `SagemcomModemSessionClient.snapshot`.
+
+    Immutable: the results are frozen, the collections are tuples and a read-only
+    mapping.
+    """
+
+    """When the fetch started (UTC)."""
+    time: datetime.datetime
+    state: ModemStateResult
+    system_info: SystemInfoResult
+    downstreams: Tuple[
+        ModemQAMDownstreamChannelResult | ModemOFDMDownstreamChannelResult, ...
+    ]
+    primary_downstream: ModemQAMDownstreamChannelResult
+    upstreams: Tuple[
+        ModemATDMAUpstreamChannelResult | ModemOFDMAUpstreamChannelResult, ...
+    ]
+    service_flows: Tuple[ModemServiceFlowResult, ...]
+    provisioning: SystemProvisioningResponse
+    """Newest first. None when the event log was not fetched."""
+    event_log: Optional[Tuple[EventLogItem, ...]]
+    """Part of the snapshot -> seconds the request took (including a login)."""
+    latencies: Mapping[str, float]
+
+    def to_json(self) -> Dict[str, Any]:
+        """The snapshot as a JSON-serializable dict (times in ISO 8601)."""
+        return {
+            field.name: _to_json(getattr(self, field.name))
+            for field in dataclasses.fields(self)
+        }
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if dataclasses.is_dataclass(value):
+        return {
+            field.name: _to_json(getattr(value, field.name))
+            for field in dataclasses.fields(value)
+        }
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    if isinstance(value, Mapping):
+        return {k: _to_json(v) for k, v in value.items()}
+    return value
@@ -1,5 +1,5 @@
 import logging
-from typing import List, Set
+from typing import Dict, Iterable, Iterator, Literal, Tuple
 
 from sagemcom_f3896_client.log_parser import (
     DownstreamProfileMessage,
@@ -13,37 +13,48 @@ from sagemcom_f3896_client.models import (
 LOG = logging.getLogger(__name__)
 
 
+ProfileMessage = DownstreamProfileMessage | UpstreamProfileMessage
+"""(direction, channel_id)"""
+ProfileKey = Tuple[Literal["downstream", "upstream"], int]
+
+
+def profile_key(message: ProfileMessage) -> ProfileKey:
+    direction = (
+        "downstream" if isinstance(message, DownstreamProfileMessage) else "upstream"
+    )
+    return (direction, message.channel_id)
+
+
 class ProfileMessageStore:
-    """Keep track of profile messages for channels that are still present"""
+    """Keep track of the latest profile message per channel, for channels that are still present"""
 
-    _messages: Set[DownstreamProfileMessage | UpstreamProfileMessage]
+    _messages: Dict[ProfileKey, ProfileMessage]
 
     def __init__(self):
-        self._messages = set()
+        self._messages = {}
 
     def update_for_channels(
         self,
-        ds_channels: List[ModemDownstreamChannelResult],
-        us_channels: List[ModemUpstreamChannelResult],
+        ds_channels: Iterable[ModemDownstreamChannelResult],
+        us_channels: Iterable[ModemUpstreamChannelResult],
     ) -> int:
-        ds_channels_ids = frozenset(c.channel_id for c in ds_channels)
-        us_channel_ids = frozenset(c.channel_id for c in us_channels)
-
-        removed = []
-        for message in list(self._messages):
-            match message:
-                case DownstreamProfileMessage(
-                    channel_id=channel_id
-                ) if channel_id not in ds_channels_ids:
-                    removed.append(message)
-                case UpstreamProfileMessage(
-                    channel_id=channel_id
-                ) if channel_id not in us_channel_ids:
-                    removed.append(message)
-
-        # do not remove while iterating
-        for message in removed:
-            self._messages.remove(message)
+        """Remove the messages for channels that are not present. Returns the number of removed messages."""
+        return self.retain_channels(
+            (c.channel_id for c in ds_channels), (c.channel_id for c in us_channels)
+        )
+
+    def retain_channels(
+        self, ds_channel_ids: Iterable[int], us_channel_ids: Iterable[int]
+    ) -> int:
+        """Only keep the messages for these channels. Returns the number of removed messages."""
+        present = {
+            "downstream": frozenset(ds_channel_ids),
+            "upstream": frozenset(us_channel_ids),
+        }
+        removed = [key for key in self._messages if key[1] not in present[key[0]]]
+
+        for key in removed:
+            message = self._messages.pop(key)
             LOG.info(
                 "Dropping profile message for no longer present channel %d (previous profile: %s, new: %s)",
                 message.channel_id,
@@ -53,22 +64,29 @@ class ProfileMessageStore:
 
         return len(removed)
 
-    def add(self, message: DownstreamProfileMessage | UpstreamProfileMessage):
-        """Add a messsage, removing a message of that type for that channel if present."""
-        for existing in list(self._messages):
-            if existing.channel_id == message.channel_id and isinstance(
-                message, type(existing)
-            ):
-                self._messages.remove(existing)
+    def add(self, message: ProfileMessage) -> None:
+        """Add a messsage, replacing the message of that type for that channel if present."""
+        self._messages[profile_key(message)] = message
 
-        return self._messages.add(message)
+    def add_many(self, messages: Iterable[ProfileMessage]) -> None:
+        """Add messages in order: the last message for a channel is kept."""
+        self._messages.update((profile_key(message), message) for message in messages)
 
-    def remove(self, message: DownstreamProfileMessage | UpstreamProfileMessage):
+    def remove(self, message: ProfileMessage) -> None:
         """Remove a message."""
-        self._messages.remove(message)
+        key = profile_key(message)
+        if self._messages.get(key) != message:
+            raise KeyError(message)
+        del self._messages[key]
+
+    def __contains__(self, message: object) -> bool:
+        return (
+            isinstance(message, (DownstreamProfileMessage, UpstreamProfileMessage))
+            and self._messages.get(profile_key(message)) == message
+        )
 
-    def __iter__(self):
-        return iter(self._messages)
+    def __iter__(self) -> Iterator[ProfileMessage]:
+        return iter(self._messages.values())
 
-    def __len__(self):
+    def __len__(self) -> int:
         return len(self._messages)
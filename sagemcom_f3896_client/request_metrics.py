@@ -0,0 +1,65 @@
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram
+
+from sagemcom_f3896_client.client import RequestHooks
+
+"""Buckets (seconds) for requests to the modem: most take 0.1-2s, the client gives up after 15s."""
+REQUEST_DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+"""A login takes a few seconds on the F3896."""
+LOGIN_DURATION_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 10.0, 15.0, 30.0)
+
+
+class PrometheusRequestHooks(RequestHooks):
+    """
+    Request metrics of a session client, by endpoint, method and status.
+
+    Use one instance per modem: the metrics have no label for the modem.
+    """
+
+    request_duration: Histogram
+    requests_in_flight: Gauge
+    request_timeouts: Counter
+    login_duration: Histogram
+
+    def __init__(self, registry: CollectorRegistry = REGISTRY) -> None:
+        self.request_duration = Histogram(
+            "modem_client_request_duration_seconds",
+            "Duration of requests to the modem, until the response body was read",
+            ["endpoint", "method", "status"],
+            buckets=REQUEST_DURATION_BUCKETS,
+            registry=registry,
+        )
+        self.requests_in_flight = Gauge(
+            "modem_client_requests_in_flight",
+            "Requests to the modem that did not finish yet",
+            ["endpoint", "method"],
+            registry=registry,
+        )
+        self.request_timeouts = Counter(
+            "modem_client_request_timeouts",
+            "Requests to the modem that timed out",
+            ["endpoint", "method"],
+            registry=registry,
+        )
+        self.login_duration = Histogram(
+            "modem_client_login_duration_seconds",
+            "Duration of logins to the modem",
+            ["result"],
+            buckets=LOGIN_DURATION_BUCKETS,
+            registry=registry,
+        )
+
+    def request_started(self, method: str, endpoint: str) -> None:
+        self.requests_in_flight.labels(endpoint, method).inc()
+
+    def request_finished(
+        self, method: str, endpoint: str, status: int | str, duration: float
+    ) -> None:
+        self.requests_in_flight.labels(endpoint, method).dec()
+        self.request_duration.labels(endpoint, method, str(status)).observe(duration)
+        if status == "timeout":
+            self.request_timeouts.labels(endpoint, method).inc()
+
+    def login_finished(self, duration: float, success: bool) -> None:
+        self.login_duration.labels("success" if success else "failure").observe(
+            duration
+        )
@@ -1,21 +1,34 @@
-from typing import List
+import html
+from typing import Iterable, Iterator, List, Sequence
+from urllib.parse import urlencode
 
-from sagemcom_f3896_client.log_parser import ParsedMessage
 from sagemcom_f3896_client.models import EventLogItem
 
+PRIORITIES = ["alert", "critical", "error", "warning", "notice"]
 
-def format_log_entries(logs: List[ParsedMessage]):
+
+def format_log_entries(logs: Iterable[EventLogItem]) -> Iterator[str]:
     for entry in logs:
         yield f"{' ' * 8}<tr><td>{entry.time.ctime()}</td><td>"
         if entry.priority == "error":
-            yield f"<emph>{entry.priority}</emph>"
+            yield f"<emph>{html.escape(entry.priority)}</emph>"
         else:
-            yield entry.priority
+            yield html.escape(entry.priority)
+
+        yield f"</td><td>{html.escape(entry.message)}</td></tr>\n"
+
 
-        yield f"</td><td>{entry.message}</td></tr>"
+def page_url(limit: int, offset: int, priorities: Sequence[str]) -> str:
+    query = [("limit", limit), ("offset", offset)]
+    query.extend(("priority", priority) for priority in priorities)
+    return html.escape(f"/?{urlencode(query)}")
 
 
-def index_template(logs: List[EventLogItem]) -> str:
+def index_head(limit: int) -> str:
+    filters = " ".join(
+        f'<a href="{page_url(limit, 0, [priority])}">{priority}</a>'
+        for priority in PRIORITIES
+    )
     return f"""<html>
             <head><title>Sagemcom F3896</title></head>
             <style>
@@ -43,16 +56,36 @@ def index_template(logs: List[EventLogItem]) -> str:
             <body>
                 <h1>SagemCom F3896</h1>
                 <p><a href="/metrics">Metrics</a></p>
+                <p>Priority: <a href="{page_url(limit, 0, [])}">all</a> {filters}</p>
                 <p>
                 <table>
                     <thead>
                     <tr><td>Time</td><td>Priority</td><td>Message</td></tr>
-                    </thread>
+                    </thead>
                     <tbody>
-                    {''.join(list(format_log_entries(logs)))}
-                    </tbody>
+"""
+
+
+def index_tail(limit: int, offset: int, priorities: Sequence[str], total: int) -> str:
+    links: List[str] = []
+    if offset > 0:
+        links.append(
+            f'<a href="{page_url(limit, max(0, offset - limit), priorities)}">newer</a>'
+        )
+    if offset + limit < total:
+        links.append(
+            f'<a href="{page_url(limit, offset + limit, priorities)}">older</a>'
+        )
+
+    shown = (
+        f"{offset + 1}-{min(offset + limit, total)} of {total}"
+        if offset < total
+        else f"0 of {total}"
+    )
+    return f"""                    </tbody>
                 </table>
                 </p>
+                <p>{shown} {' '.join(links)}</p>
                 <p>
                     <small>F3896 exporter <a href="https://github.com/ties/sagemcom-f3896-py">github.com/ties/sagemcom-f3896-py</a></small>
                 </p>
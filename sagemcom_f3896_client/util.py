@@ -1,13 +1,15 @@
 import logging
 import os
+from typing import Optional
 
 from sagemcom_f3896_client import SagemcomModemClient
 
 LOG = logging.getLogger(__name__)
 
 
-def build_client(*args, **kwargs):
-    modem_url = os.environ.get("MODEM_URL", None)
+def build_client(*args, base_url: Optional[str] = None, **kwargs):
+    """A client for `base_url` (default: `MODEM_URL`) with the password from `MODEM_PASSWORD`."""
+    modem_url = base_url or os.environ.get("MODEM_URL", None)
     if not modem_url:
         LOG.debug("MODEM_URL environment variable is not set, using default")
         modem_url = "http://192.168.100.1"
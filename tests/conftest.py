@@ -1,32 +1,61 @@
 import logging
 import os
+from typing import Tuple
 
 import aiohttp
 import pytest
+import pytest_asyncio
+from aiohttp.test_utils import TestServer
 
 from sagemcom_f3896_client.client import SagemcomModemSessionClient
+from tests.fake_modem import FakeModem
 
 LOG = logging.getLogger(__name__)
 
+FAKE_MODEM_PASSWORD = "fake-modem-password"
+
+
+@pytest.fixture
+def fake_modem() -> FakeModem:
+    """A fake modem that serves the recorded responses."""
+    return FakeModem.recorded(password=FAKE_MODEM_PASSWORD)
+
+
+@pytest_asyncio.fixture
+async def fake_modem_url(fake_modem: FakeModem):
+    """Base URL of `fake_modem`, served while the test runs."""
+    async with TestServer(fake_modem.app) as server:
+        yield str(server.make_url("/")).rstrip("/")
+
 
 @pytest.fixture
-def client(event_loop):
+def modem_settings(request, monkeypatch) -> Tuple[str, str]:
     """
-    Build a client using settings from environment variable, without requiring a context manager.
+    URL and password of the modem under test, also set as `MODEM_URL` and
+    `MODEM_PASSWORD`. A real modem when the `MODEM_PASSWORD` environment variable is
+    set, the fake modem otherwise.
     """
-    modem_url = os.environ.get("MODEM_URL", None)
-    if not modem_url:
-        LOG.info("MODEM_URL environment variable is not set, using default")
-        modem_url = "http://192.168.100.1"
+    if os.environ.get("MODEM_PASSWORD"):
+        modem_url = os.environ.get("MODEM_URL", None)
+        if not modem_url:
+            LOG.info("MODEM_URL environment variable is not set, using default")
+            modem_url = "http://192.168.100.1"
+        return modem_url, os.environ["MODEM_PASSWORD"]
 
-    modem_password = os.environ.get("MODEM_PASSWORD")
-    assert modem_password, "MODEM_PASSWORD environment variable is not set"
+    modem_url = request.getfixturevalue("fake_modem_url")
+    monkeypatch.setenv("MODEM_URL", modem_url)
+    monkeypatch.setenv("MODEM_PASSWORD", FAKE_MODEM_PASSWORD)
+    return modem_url, FAKE_MODEM_PASSWORD
 
-    async def sessio():
-        return aiohttp.ClientSession()
 
-    session = event_loop.run_until_complete(sessio())
-    client = SagemcomModemSessionClient(session, modem_url, modem_password)
-    yield client
+@pytest_asyncio.fixture
+async def client(modem_settings: Tuple[str, str]):
+    """
+    Build a client for the modem under test, without requiring a context manager.
+    """
+    modem_url, modem_password = modem_settings
+    async with aiohttp.ClientSession() as session:
+        client = SagemcomModemSessionClient(session, modem_url, modem_password)
+        yield client
 
-    event_loop.run_until_complete(client._logout())
+        await client._logout()
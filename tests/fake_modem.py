@@ -0,0 +1,361 @@
+"""
+A minimal stand-in for the F3896 REST API.
+
+Serves the endpoints used by the client: synthetic channels and event log with
+configurable sizes, or the recorded responses in `tests/fixtures`
+(`FakeModem.recorded()`). Latency, dropped connections and error responses can be
+injected. Every endpoint is available both on `/rest/v1/...` and on
+`/<modem>/rest/v1/...` so one server can play the role of many modems (use
+`http://host:port/<modem>` as base URL).
+"""
+
+import asyncio
+import collections
+import datetime
+import itertools
+import json
+import pathlib
+import time
+import weakref
+from typing import Deque, Dict, List, Optional, Set
+
+from aiohttp import web
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+LOG_MESSAGES = [
+    "Cable Modem Reboot because of - Reboot UI",
+    "REGISTRATION COMPLETE - Waiting for Operational status",
+    "DS profile assignment change. DS Chan ID: 32; Previous Profile: ; New Profile: 1 2 3.;CM-MAC=44:05:a5:a5:a5:4a;CMTS-MAC=00:01:5c:de:ad:be;CM-QOS=1.1;CM-VER=3.1;",
+    "US profile assignment change. US Chan ID: 9; Previous Profile: 9 13; New Profile: 10 13.;CM-MAC=44:05:a5:a5:a5:4a;CMTS-MAC=00:01:5c:de:ad:be;CM-QOS=1.1;CM-VER=3.1;",
+    "CM-STATUS message sent. Event Type Code: 16; Chan ID: 33; DSID: N/A; MAC Addr: N/A; OFDM/OFDMA Profile ID: 3.;CM-MAC=44:05:a5:a5:a5:4a;CMTS-MAC=00:01:5c:de:ad:be;CM-QOS=1.1;CM-VER=3.1;",
+    "No Ranging Response received - T3 time-out;CM-MAC=44:05:a5:a5:a5:4a;CMTS-MAC=00:01:5c:de:ad:be;CM-QOS=1.1;CM-VER=3.1;",
+    "16 consecutive T3 timeouts while trying to range on upstream channel 8;CM-MAC=44:05:a5:a5:a5:4a;CMTS-MAC=00:01:5c:de:ad:be;CM-QOS=1.1;CM-VER=3.1;",
+    "MDD message timeout;CM-MAC=44:05:3f:92:a2:4a;CMTS-MAC=00:01:5c:aa:8a:4b;CM-QOS=1.1;CM-VER=3.1;",
+]
+PRIORITIES = [
+    "notice",
+    "critical",
+    "notice",
+    "notice",
+    "warning",
+    "critical",
+    "critical",
+    "critical",
+]
+
+
+def downstream_channels(qam_channels: int = 31, ofdm_channels: int = 1) -> List[Dict]:
+    channels = [
+        {
+            "channelType": "sc_qam",
+            "channelId": idx + 1,
+            "frequency": 114_000_000 + idx * 8_000_000,
+            "power": 4.5,
+            "modulation": "qam_256",
+            "snr": 40,
+            "rxMer": 40,
+            "correctedErrors": 100 * idx,
+            "uncorrectedErrors": idx,
+            "lockStatus": True,
+        }
+        for idx in range(qam_channels)
+    ]
+    channels.extend(
+        {
+            "channelType": "ofdm",
+            "channelId": qam_channels + idx + 1,
+            "channelWidth": 94_000_000,
+            "fftType": "4K",
+            "numberOfActiveSubCarriers": 1880,
+            "modulation": "qam_4096",
+            "firstActiveSubcarrier": 135 + idx * 96,
+            "lockStatus": True,
+            "rxMer": 420,
+            "power": 51,
+            "correctedErrors": 123456,
+            "uncorrectedErrors": 0,
+        }
+        for idx in range(ofdm_channels)
+    )
+    return channels
+
+
+def upstream_channels(atdma_channels: int = 4, ofdma_channels: int = 1) -> List[Dict]:
+    channels = [
+        {
+            "channelType": "atdma",
+            "channelId": idx + 1,
+            "lockStatus": True,
+            "power": 44.5,
+            "modulation": "qam_64",
+            "frequency": 30_800_000 + idx * 6_400_000,
+            "symbolRate": 5120,
+            "t1Timeout": 0,
+            "t2Timeout": 0,
+            "t3Timeout": idx,
+            "t4Timeout": 0,
+        }
+        for idx in range(atdma_channels)
+    ]
+    channels.extend(
+        {
+            "channelType": "ofdma",
+            "channelId": atdma_channels + idx + 1,
+            "firstActiveSubcarrier": 29,
+            "lockStatus": True,
+            "power": 440,
+            "modulation": "qam_256",
+            "channelWidth": 44_400_000,
+            "fftType": "2K",
+            "numberOfActiveSubCarriers": 888,
+            "t3Timeout": 2,
+            "t4Timeout": 0,
+        }
+        for idx in range(ofdma_channels)
+    )
+    return channels
+
+
+def event_log(lines: int = 100) -> List[Dict]:
+    start = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    messages = itertools.cycle(zip(LOG_MESSAGES, PRIORITIES))
+    return [
+        {
+            "time": (start + datetime.timedelta(seconds=idx)).isoformat(),
+            "priority": priority,
+            "message": message,
+        }
+        for idx, (message, priority) in zip(range(lines), messages)
+    ]
+
+
+def load_fixture(name: str) -> Dict:
+    """A recorded response body from `tests/fixtures`."""
+    with (FIXTURES / f"{name}.json").open() as f:
+        return json.load(f)
+
+
+def recorded_event_log(now: Optional[datetime.datetime] = None) -> List[Dict]:
+    """The recorded event log, shifted so the newest entry was logged at `now` (default: a minute ago)."""
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(
+            minutes=1
+        )
+    entries = load_fixture("eventlog")["eventlog"]
+    times = [datetime.datetime.fromisoformat(e["time"]) for e in entries]
+    shift = now - max(times)
+    return [
+        {**entry, "time": (time + shift).replace(microsecond=0).isoformat()}
+        for entry, time in zip(entries, times)
+    ]
+
+
+class FakeModem:
+    """aiohttp application that answers like a (very fast) F3896."""
+
+    app: web.Application
+    """Password that is accepted on login (any password when not set)."""
+    password: Optional[str] = None
+    login_count: int = 0
+    reboot_count: int = 0
+    """Tokens that are currently valid."""
+    tokens: Set[str]
+    """Open sessions (tokens) after which new sessions are refused (no limit when not set)."""
+    max_sessions: Optional[int] = None
+    """path -> HTTP status codes to answer with instead of the response."""
+    errors: Dict[str, Deque[int]]
+
+    def __init__(
+        self,
+        qam_channels: int = 31,
+        ofdm_channels: int = 1,
+        atdma_channels: int = 4,
+        ofdma_channels: int = 1,
+        log_lines: int = 100,
+        latency: float = 0.0,
+        connect_latency: float = 0.0,
+        password: Optional[str] = None,
+        max_sessions: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.password = password
+        self.max_sessions = max_sessions
+        # connections that served a request, to simulate a slow connection setup
+        self.connections = weakref.WeakSet()
+        # close the connection instead of answering for the next n requests
+        self.drop_connections = 0
+        # path -> number of requests
+        self.requests = collections.Counter()
+        self.errors = collections.defaultdict(collections.deque)
+        self.downstreams = downstream_channels(qam_channels, ofdm_channels)
+        self.upstreams = upstream_channels(atdma_channels, ofdma_channels)
+        self.eventlog = event_log(log_lines)
+        self.login_count = 0
+        self.token_count = 0
+        self.tokens = set()
+
+        self.cablemodem = load_fixture("state")["cablemodem"]
+        self.boot_time = time.monotonic() - self.cablemodem["upTime"]
+        self.info = load_fixture("system_info")
+        self.service_flows = load_fixture("serviceflows")
+        self.registration = load_fixture("registration")
+        self.provisioning = load_fixture("provisioning")
+
+        self.app = web.Application(middlewares=[self.delay])
+        routes = {
+            ("POST", "rest/v1/user/login"): self.login,
+            ("POST", "rest/v1/user/{user_id}/tokens"): self.create_token,
+            ("DELETE", "rest/v1/user/{user_id}/token/{token}"): self.delete_token,
+            ("GET", "rest/v1/system/info"): self.system_info,
+            ("POST", "rest/v1/system/reboot"): self.reboot,
+            ("GET", "rest/v1/system/gateway/provisioning"): self.system_provisioning,
+            ("POST", "rest/v1/echo"): self.echo,
+            ("GET", "rest/v1/cablemodem/state_"): self.state,
+            ("GET", "rest/v1/cablemodem/downstream"): self.downstream,
+            ("GET", "rest/v1/cablemodem/downstream/primary_"): self.primary_downstream,
+            ("GET", "rest/v1/cablemodem/upstream"): self.upstream,
+            ("GET", "rest/v1/cablemodem/eventlog"): self.event_log,
+            ("GET", "rest/v1/cablemodem/serviceflows"): self.service_flows_,
+            ("GET", "rest/v1/cablemodem/registration"): self.registration_,
+        }
+        for (method, path), handler in routes.items():
+            self.app.router.add_route(method, f"/{path}", handler)
+            self.app.router.add_route(method, f"/{{modem}}/{path}", handler)
+
+    @staticmethod
+    def recorded(**kwargs) -> "FakeModem":
+        """A modem that serves the recorded channels and event log of `tests/fixtures`."""
+        modem = FakeModem(**kwargs)
+        modem.downstreams = load_fixture("downstream")["downstream"]["channels"]
+        modem.upstreams = load_fixture("upstream")["upstream"]["channels"]
+        modem.eventlog = recorded_event_log()
+        return modem
+
+    def inject_error(self, path: str, status: int = 500, count: int = 1) -> None:
+        """Answer the next `count` requests for `path` (e.g. `/rest/v1/system/info`) with `status`."""
+        self.errors[path].extend([status] * count)
+
+    @web.middleware
+    async def delay(self, request: web.Request, handler) -> web.StreamResponse:
+        """Simulate the response time of the embedded web server."""
+        self.requests[request.path] += 1
+        if self.drop_connections:
+            self.drop_connections -= 1
+            request.transport.close()
+            raise web.HTTPServiceUnavailable()
+
+        if request.transport not in self.connections:
+            self.connections.add(request.transport)
+            if self.connect_latency:
+                await asyncio.sleep(self.connect_latency)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        path = request.match_info.route.resource.canonical.removeprefix("/{modem}")
+        errors = self.errors.get(path)
+        if errors:
+            return web.json_response({"error": "injected"}, status=errors.popleft())
+        return await handler(request)
+
+    def new_token(self) -> str:
+        if self.max_sessions is not None and len(self.tokens) >= self.max_sessions:
+            raise web.HTTPTooManyRequests(text="Too many sessions")
+        self.token_count += 1
+        token = f"token-{self.token_count}"
+        self.tokens.add(token)
+        return token
+
+    def check_token(self, request: web.Request) -> None:
+        authorization = request.headers.get("Authorization", "")
+        if authorization.removeprefix("Bearer ") not in self.tokens:
+            raise web.HTTPUnauthorized()
+
+    async def check_password(self, request: web.Request) -> None:
+        body = await request.json()
+        if self.password is not None and body.get("password") != self.password:
+            raise web.HTTPUnauthorized()
+
+    async def login(self, request: web.Request) -> web.Response:
+        await self.check_password(request)
+        self.login_count += 1
+        return web.json_response(
+            {
+                "created": {
+                    "token": self.new_token(),
+                    "userLevel": "admin",
+                    "userId": 3,
+                }
+            },
+            status=201,
+        )
+
+    async def create_token(self, request: web.Request) -> web.Response:
+        await self.check_password(request)
+        return web.json_response(
+            {"created": {"token": self.new_token(), "userLevel": "admin"}}, status=201
+        )
+
+    async def delete_token(self, request: web.Request) -> web.Response:
+        self.check_token(request)
+        self.tokens.discard(request.match_info["token"])
+        return web.Response(status=204)
+
+    async def system_info(self, request: web.Request) -> web.Response:
+        self.check_token(request)
+        return web.json_response(self.info)
+
+    async def reboot(self, request: web.Request) -> web.Response:
+        """Reboot instantly: sessions are gone, the uptime restarts and the reboot is logged."""
+        self.check_token(request)
+        self.reboot_count += 1
+        self.tokens.clear()
+        self.boot_time = time.monotonic()
+        self.eventlog.append(
+            {
+                "time": datetime.datetime.now(datetime.timezone.utc)
+                .replace(microsecond=0)
+                .isoformat(),
+                "priority": "critical",
+                "message": "Cable Modem Reboot because of - Reboot UI",
+            }
+        )
+        return web.json_response({"accepted": True})
+
+    async def system_provisioning(self, _: web.Request) -> web.Response:
+        return web.json_response(self.provisioning)
+
+    async def echo(self, request: web.Request) -> web.Response:
+        return web.json_response(await request.json())
+
+    async def state(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {
+                "cablemodem": {
+                    **self.cablemodem,
+                    "serialNumber": request.match_info.get(
+                        "modem", self.cablemodem["serialNumber"]
+                    ),
+                    "upTime": int(time.monotonic() - self.boot_time),
+                }
+            }
+        )
+
+    async def downstream(self, _: web.Request) -> web.Response:
+        return web.json_response({"downstream": {"channels": self.downstreams}})
+
+    async def primary_downstream(self, _: web.Request) -> web.Response:
+        return web.json_response({"channel": self.downstreams[0]})
+
+    async def upstream(self, _: web.Request) -> web.Response:
+        return web.json_response({"upstream": {"channels": self.upstreams}})
+
+    async def event_log(self, _: web.Request) -> web.Response:
+        return web.json_response({"eventlog": self.eventlog})
+
+    async def service_flows_(self, _: web.Request) -> web.Response:
+        return web.json_response(self.service_flows)
+
+    async def registration_(self, _: web.Request) -> web.Response:
+        return web.json_response(self.registration)
@@ -0,0 +1,57 @@
+import datetime
+
+from sagemcom_f3896_client.archive import EventLogArchive
+from tests.test_event_log import START, item
+
+
+def test_archive__deduplicates(tmp_path):
+    archive = EventLogArchive(tmp_path / "log.db")
+    log = [item(0, "a"), item(1, "b"), item(1, "c", "error")]
+
+    assert archive.add(log) == log
+    # overlapping batch: only the new entry is added
+    assert archive.add(log[1:] + [item(2, "d")]) == [item(2, "d")]
+    assert len(archive) == 4
+    archive.close()
+
+    # entries are kept after re-opening the archive
+    archive = EventLogArchive(tmp_path / "log.db")
+    assert archive.add(log) == []
+    assert archive.query() == sorted(log + [item(2, "d")], reverse=True)
+    archive.close()
+
+
+def test_archive__query(tmp_path):
+    archive = EventLogArchive(tmp_path / "log.db")
+    archive.add(
+        [
+            item(idx, f"message {idx}", "error" if idx % 3 == 0 else "notice")
+            for idx in range(10)
+        ]
+    )
+
+    since = START + datetime.timedelta(seconds=2)
+    until = START + datetime.timedelta(seconds=7)
+    assert [entry.message for entry in archive.query(since=since, until=until)] == [
+        "message 6",
+        "message 5",
+        "message 4",
+        "message 3",
+        "message 2",
+    ]
+    assert [entry.message for entry in archive.query(priorities=["error"])] == [
+        "message 9",
+        "message 6",
+        "message 3",
+        "message 0",
+    ]
+    assert [entry.message for entry in archive.query(limit=2, offset=1)] == [
+        "message 8",
+        "message 7",
+    ]
+
+    # time zone of the modem is kept
+    entry = archive.query(limit=1)[0]
+    assert entry.time == START + datetime.timedelta(seconds=9)
+    assert entry.time.utcoffset() == datetime.timedelta(0)
+    archive.close()
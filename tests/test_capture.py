@@ -0,0 +1,109 @@
+import gzip
+import time
+
+import aiohttp
+import pytest
+
+from sagemcom_f3896_client.capture import CaptureJournal, ReplaySession, read_journal
+from sagemcom_f3896_client.client import SagemcomModemClient, SagemcomModemSessionClient
+from sagemcom_f3896_client.exporter import Exporter
+from tests.conftest import FAKE_MODEM_PASSWORD
+from tests.fake_modem import FakeModem
+
+
+@pytest.mark.asyncio
+async def test_capture__redacts_credentials(
+    fake_modem: FakeModem, fake_modem_url: str, tmp_path
+):
+    path = tmp_path / "journal.jsonl.gz"
+    journal = CaptureJournal(path)
+    fake_modem.inject_error("/rest/v1/cablemodem/upstream", status=500)
+
+    async with SagemcomModemClient(
+        fake_modem_url, FAKE_MODEM_PASSWORD, capture=journal
+    ) as client:
+        await client.system_info()
+        await client.user_tokens(3, FAKE_MODEM_PASSWORD)
+        downstreams = await client.modem_downstreams()
+        with pytest.raises(aiohttp.ClientResponseError):
+            await client.modem_upstreams()
+    journal.close()
+
+    raw = gzip.decompress(path.read_bytes()).decode("utf-8")
+    assert FAKE_MODEM_PASSWORD not in raw
+    assert "token-" not in raw
+
+    entries = read_journal(path)
+    assert [(e["method"], e["endpoint"], e["status"]) for e in entries] == [
+        ("POST", "/rest/v1/user/login", 201),
+        ("GET", "/rest/v1/system/info", 200),
+        ("POST", "/rest/v1/user/{user_id}/tokens", 201),
+        ("GET", "/rest/v1/cablemodem/downstream", 200),
+        ("GET", "/rest/v1/cablemodem/upstream", 500),
+        ("DELETE", "/rest/v1/user/{user_id}/token/{token}", 204),
+    ]
+    assert entries[0]["request"] == {"password": "<redacted>"}
+    assert entries[0]["response"]["created"]["token"] == "<redacted>"
+    assert len(entries[3]["response"]["downstream"]["channels"]) == len(downstreams)
+    assert all(e["duration"] >= 0 and e["t"] >= 0 for e in entries)
+
+
+@pytest.mark.asyncio
+async def test_replay__update_metrics(
+    fake_modem: FakeModem, fake_modem_url: str, tmp_path
+):
+    path = tmp_path / "journal.jsonl"
+    journal = CaptureJournal(path)
+    async with aiohttp.ClientSession() as session:
+        exporter = Exporter(
+            SagemcomModemSessionClient(
+                session, fake_modem_url, FAKE_MODEM_PASSWORD, capture=journal
+            ),
+            port=0,
+            persistent_session=True,
+        )
+        await exporter.update_metrics()
+        recorded = exporter.collector.snapshot
+    journal.close()
+
+    replay = ReplaySession.from_journal(path, speed=0)
+    exporter = Exporter(
+        SagemcomModemSessionClient(replay, "http://replay", "unused"),
+        port=0,
+        persistent_session=True,
+    )
+    # the responses are replayed from the start when they run out
+    for _ in range(3):
+        await exporter.update_metrics()
+
+    replayed = exporter.collector.snapshot
+    assert replayed.downstreams == recorded.downstreams
+    assert replayed.upstreams == recorded.upstreams
+    assert replayed.log_priority_counts == recorded.log_priority_counts
+    assert replay.count == 1 + 3 * 6
+
+
+@pytest.mark.asyncio
+async def test_replay__speed():
+    entries = [
+        {
+            "t": 0.0,
+            "method": "GET",
+            "endpoint": "/rest/v1/cablemodem/state_",
+            "status": 200,
+            "duration": 0.5,
+            "request": None,
+            "response": {},
+        }
+    ]
+    replay = ReplaySession(entries, speed=10)
+    t0 = time.monotonic()
+    async with replay.request("GET", "http://replay/rest/v1/cablemodem/state_") as resp:
+        assert resp.status == 200
+        assert await resp.read() == b"{}"
+    assert 0.04 < time.monotonic() - t0 < 0.4
+
+    with pytest.raises(aiohttp.ClientResponseError) as e:
+        async with replay.request("GET", "http://replay/rest/v1/system/info"):
+            pass
+    assert e.value.status == 404
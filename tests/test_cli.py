@@ -0,0 +1,91 @@
+import json
+
+import click
+import pytest
+from click.testing import CliRunner
+
+from sagemcom_f3896_client.cli import (
+    WatchScreen,
+    cli,
+    print_snapshots,
+    watch_channels,
+    watch_lines,
+)
+from sagemcom_f3896_client.models import (
+    ModemATDMAUpstreamChannelResult,
+    ModemQAMDownstreamChannelResult,
+)
+from tests.fake_modem import FakeModem, downstream_channels, upstream_channels
+
+
+def test_watch_screen__redraws_changed_lines():
+    screen = WatchScreen(interactive=True)
+    assert screen.render(["a", "b", "c"]) == "a\nb\nc\n"
+    # only the second line, two lines up from the cursor
+    assert screen.render(["a", "x", "c"]) == "\x1b[2F\x1b[2Kx\x1b[2E"
+    assert screen.render(["a", "x", "c"]) == ""
+    # a channel was added: clear and draw all lines
+    assert screen.render(["a", "x", "c", "d"]) == "\x1b[3F\x1b[Ja\nx\nc\nd\n"
+
+    screen = WatchScreen(interactive=False)
+    screen.render(["a", "b"])
+    assert screen.render(["a", "c"]) == "c\n"
+
+
+def test_watch_lines__deltas():
+    before = ModemQAMDownstreamChannelResult.build(downstream_channels(2, 0)[1])
+    after = ModemQAMDownstreamChannelResult.build(
+        {**downstream_channels(2, 0)[1], "power": 5.0, "correctedErrors": 150}
+    )
+    upstream = ModemATDMAUpstreamChannelResult.build(upstream_channels(1, 0)[0])
+    previous = {("sc_qam", 2): before, ("atdma", 1): upstream}
+
+    lines = watch_lines([after], [upstream], previous)
+    assert click.unstyle(lines[1]).split() == [
+        "sc_qam", "2", "122000000", "5.0", "+0.5", "40", "locked", "150", "+50", "1"
+    ]  # fmt: skip
+    # counters going up are red, other changes yellow
+    assert click.style("     +50", fg="red") in lines[1]
+    assert click.style("    +0.5", fg="yellow") in lines[1]
+    # unchanged values have no delta
+    assert click.unstyle(lines[3]).split()[-2:] == ["0", "0"]
+
+
+@pytest.mark.asyncio
+async def test_watch__one_session(
+    modem_settings, fake_modem: FakeModem, capsys: pytest.CaptureFixture
+):
+    await watch_channels(interval=0, count=3, interactive=False)
+    assert fake_modem.requests["/rest/v1/cablemodem/downstream"] == 3
+    # the channels do not require a login, the connections are re-used
+    assert fake_modem.login_count == 0
+    assert len(fake_modem.connections) <= 3
+
+    lines = click.unstyle(capsys.readouterr().out).splitlines()
+    # the channel tables once, then only the status line when it changed
+    tables = 1 + len(fake_modem.downstreams) + 1 + len(fake_modem.upstreams)
+    assert 1 + tables <= len(lines) <= 3 + tables
+    assert sum(1 for line in lines if line.startswith("atdma    1 ")) == 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot__ndjson(modem_settings, capsys: pytest.CaptureFixture):
+    modem_url, _ = modem_settings
+    # an unused port: the modem is not reachable
+    targets = [modem_url, "http://127.0.0.1:9"]
+    assert not await print_snapshots(targets, output_format="ndjson")
+
+    documents = {
+        document["url"]: document
+        for document in map(json.loads, capsys.readouterr().out.splitlines())
+    }
+    assert documents.keys() == set(targets)
+    assert documents[modem_url]["state"]["status"] == "operational"
+    assert documents[modem_url]["event_log"] is None
+    assert "error" in documents["http://127.0.0.1:9"]
+
+
+def test_snapshot__max_concurrency_validated():
+    result = CliRunner().invoke(cli, ["snapshot", "--max-concurrency", "0"])
+    assert result.exit_code == 2
+    assert "--max-concurrency" in result.output
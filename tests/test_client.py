@@ -1,5 +1,7 @@
 import collections
+import dataclasses
 import datetime
+import json
 import logging
 import random
 
@@ -7,13 +9,11 @@ import pytest
 from pytest import LogCaptureFixture
 
 from sagemcom_f3896_client import SagemcomModemSessionClient
-from tests.util import requires_modem_password
 
 logging.basicConfig(level=logging.DEBUG)
 LOG = logging.getLogger(__name__)
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_echo(client: SagemcomModemSessionClient, caplog: LogCaptureFixture):
     caplog.set_level(logging.DEBUG)
@@ -24,7 +24,6 @@ async def test_echo(client: SagemcomModemSessionClient, caplog: LogCaptureFixtur
     assert echoed["value"] == randint
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_modem_state(
     client: SagemcomModemSessionClient, caplog: LogCaptureFixture
@@ -36,7 +35,6 @@ async def test_modem_state(
     assert state.status == "operational"
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_event_log(client: SagemcomModemSessionClient, caplog: LogCaptureFixture):
     caplog.set_level(logging.DEBUG)
@@ -55,7 +53,6 @@ async def test_event_log(client: SagemcomModemSessionClient, caplog: LogCaptureF
         assert (now - elem.time) < datetime.timedelta(days=365)
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_modem_service_flows(
     client: SagemcomModemSessionClient, caplog: LogCaptureFixture
@@ -74,7 +71,6 @@ async def test_modem_service_flows(
         assert flow.schedule_type is not None
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_modem_downstreams(
     client: SagemcomModemSessionClient, caplog: LogCaptureFixture
@@ -112,7 +108,6 @@ async def test_modem_downstreams(
                 raise ValueError(f"unknown channel_type: {ds.channel_type}")
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_modem_upstreams(
     client: SagemcomModemSessionClient, caplog: LogCaptureFixture
@@ -144,7 +139,6 @@ async def test_modem_upstreams(
                 raise ValueError(f"unknown channel_type: {us.channel_type}")
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_primary_downstream(
     client: SagemcomModemSessionClient, caplog: LogCaptureFixture
@@ -158,7 +152,6 @@ async def test_primary_downstream(
     assert downstream in all_downstreams
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_system_info(
     client: SagemcomModemSessionClient, caplog: pytest.LogCaptureFixture
@@ -169,7 +162,6 @@ async def test_system_info(
     assert "F3896" in info.model_name
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
 async def test_system_provisioning(
     client: SagemcomModemSessionClient, caplog: pytest.LogCaptureFixture
@@ -179,3 +171,40 @@ async def test_system_provisioning(
     provision_status = await client.system_provisioning()
     assert provision_status.provisioning_mode == "disable"
     assert len(list(filter(":".__eq__, provision_status.mac_address))) == 5
+
+
+@pytest.mark.asyncio
+async def test_snapshot(client: SagemcomModemSessionClient):
+    snapshot = await client.snapshot(event_log=True)
+
+    assert snapshot.state.status == "operational"
+    assert snapshot.primary_downstream.channel_id in [
+        ch.channel_id for ch in snapshot.downstreams
+    ]
+    assert snapshot.upstreams and snapshot.event_log
+    assert set(snapshot.latencies) == {
+        "state",
+        "system_info",
+        "downstreams",
+        "primary_downstream",
+        "upstreams",
+        "service_flows",
+        "provisioning",
+        "event_log",
+    }
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.state = None
+    # the snapshot is immutable all the way down
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.state.status = "rebooting"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        snapshot.downstreams[0].power = 0.0
+    with pytest.raises(TypeError):
+        snapshot.latencies["state"] = 0.0
+
+    document = json.loads(json.dumps(snapshot.to_json()))
+    assert document["state"]["serial_number"] == snapshot.state.serial_number
+    assert datetime.datetime.fromisoformat(document["time"]) == snapshot.time
+
+    with pytest.raises(ValueError):
+        await client.snapshot(max_concurrency=0)
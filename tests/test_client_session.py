@@ -1,8 +1,18 @@
 import asyncio
+import json
 
+import aiohttp
 import pytest
+from aiohttp.test_utils import TestServer
 
-from sagemcom_f3896_client.client import SagemcomModemClient
+from sagemcom_f3896_client.client import (
+    RequestHooks,
+    SagemcomModemClient,
+    SagemcomModemSessionClient,
+    build_session,
+)
+from tests.conftest import FAKE_MODEM_PASSWORD
+from tests.fake_modem import FakeModem
 
 
 @pytest.mark.asyncio
@@ -24,3 +34,312 @@ async def test_connect_non_existent_host__login_required():
         ) as client:
             # unreachable IP so this is safe
             await client.system_reboot()
+
+
+@pytest.mark.asyncio
+async def test_session__reauthenticates_rejected_token():
+    modem = FakeModem()
+
+    async with TestServer(modem.app) as server, aiohttp.ClientSession() as session:
+        client = SagemcomModemSessionClient(session, str(server.make_url("/")), "pw")
+
+        await client.system_info()
+        assert client.login_count == 1
+        assert client.token_age >= 0
+
+        # the modem forgets the session, e.g. after a reboot
+        modem.tokens.clear()
+        await client.system_info()
+        assert client.login_count == 2
+        assert client.reauth_count == 1
+        assert client.last_reauth_duration > 0
+
+        await client._logout()
+        assert client.token_age is None
+
+
+@pytest.mark.asyncio
+async def test_session__refreshes_token_before_expiry():
+    # the sessions of replaced tokens must be closed
+    modem = FakeModem(max_sessions=2)
+
+    async with TestServer(modem.app) as server, aiohttp.ClientSession() as session:
+        client = SagemcomModemSessionClient(
+            session, str(server.make_url("/")), "pw", token_refresh_after=60
+        )
+
+        await client.system_info()
+        await client.system_info()
+        token = client.authorization.token
+        assert client.token_refresh_count == 0
+
+        # pretend the token is old
+        client.authorization_time -= 120
+        await client.system_info()
+
+        assert client.login_count == 1
+        assert client.token_refresh_count == 1
+        assert client.authorization.token != token
+        assert client.token_age < 60
+
+        for _ in range(3):
+            client.authorization_time -= 120
+            await client.system_info()
+        assert client.token_refresh_count == 4
+        assert client.login_count == 1
+        assert modem.tokens == {client.authorization.token}
+
+        await client._logout()
+        assert not modem.tokens
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("status", [200, 500])
+async def test_session__failed_token_refresh_logs_in(status: int):
+    # an unexpected response (200) or an error: the old session is still closed
+    modem = FakeModem(max_sessions=2)
+
+    async with TestServer(modem.app) as server, aiohttp.ClientSession() as session:
+        client = SagemcomModemSessionClient(
+            session, str(server.make_url("/")), "pw", token_refresh_after=60
+        )
+        for _ in range(3):
+            await client.system_info()
+            client.authorization_time -= 120
+            modem.inject_error("/rest/v1/user/{user_id}/tokens", status=status)
+
+        assert client.token_refresh_count == 0
+        assert client.login_count == 3
+        assert modem.tokens == {client.authorization.token}
+
+
+@pytest.mark.asyncio
+async def test_keep_alive__reuses_connections():
+    modem = FakeModem()
+
+    async with TestServer(modem.app) as server:
+        async with build_session(5, keep_alive=True, pool_size=1) as session:
+            client = SagemcomModemSessionClient(
+                session, str(server.make_url("/")), "pw"
+            )
+            for _ in range(5):
+                await client.system_state()
+
+            assert client.connections_created == 1
+            assert client.connections_reused == 4
+            assert client.connection_reuse_ratio == 0.8
+
+            # the modem closes the connection: the GET is retried
+            modem.drop_connections = 1
+            state = await client.system_state()
+            assert state.status == "operational"
+
+        async with build_session(5) as session:
+            client = SagemcomModemSessionClient(
+                session, str(server.make_url("/")), "pw"
+            )
+            for _ in range(3):
+                await client.system_state()
+
+            assert client.connections_created == 3
+            assert client.connection_reuse_ratio == 0.0
+
+
+@pytest.mark.asyncio
+async def test_json_loads__custom_decoder():
+    modem = FakeModem(qam_channels=2, ofdm_channels=1)
+    decoded = []
+
+    def loads(body: bytes) -> object:
+        decoded.append(body)
+        return json.loads(body)
+
+    async with TestServer(modem.app) as server:
+        async with build_session(5) as session:
+            client = SagemcomModemSessionClient(
+                session, str(server.make_url("/")), "pw", json_loads=loads
+            )
+            channels = await client.modem_downstreams()
+
+    assert len(channels) == 3
+    assert len(decoded) == 1
+    assert isinstance(decoded[0], bytes)
+
+
+@pytest.mark.asyncio
+async def test_cache__coalesces_and_expires():
+    modem = FakeModem(latency=0.05)
+
+    async with TestServer(modem.app) as server:
+        async with build_session(5) as session:
+            client = SagemcomModemSessionClient(
+                session,
+                str(server.make_url("/")),
+                "pw",
+                cache_ttl={"/rest/v1/system/info": 60.0},
+            )
+            await client._login()
+
+            # concurrent identical requests share one request to the modem
+            states = await asyncio.gather(*[client.system_state() for _ in range(5)])
+            assert all(state == states[0] for state in states)
+            assert modem.requests["/rest/v1/cablemodem/state_"] == 1
+            assert client.cache_misses == 1
+            assert client.cache_coalesced == 4
+
+            # system info is served from the cache until it expires
+            for _ in range(3):
+                await client.system_info()
+            assert modem.requests["/rest/v1/system/info"] == 1
+            assert client.cache_hits == 2
+
+            # uncached paths are requested again
+            await client.system_state()
+            assert modem.requests["/rest/v1/cablemodem/state_"] == 2
+
+            client.clear_cache()
+            await client.system_info()
+            assert modem.requests["/rest/v1/system/info"] == 2
+
+
+@pytest.mark.asyncio
+async def test_cache__disabled_by_default():
+    modem = FakeModem()
+
+    async with TestServer(modem.app) as server:
+        async with build_session(5) as session:
+            client = SagemcomModemSessionClient(
+                session, str(server.make_url("/")), "pw"
+            )
+            await client._login()
+            await asyncio.gather(*[client.system_info() for _ in range(3)])
+
+    assert modem.requests["/rest/v1/system/info"] == 3
+    assert client.cache_hits == client.cache_misses == client.cache_coalesced == 0
+
+
+class RecordingHooks(RequestHooks):
+    def __init__(self):
+        self.started = []
+        self.finished = []
+        self.logins = []
+
+    def request_started(self, method, endpoint):
+        self.started.append((method, endpoint))
+
+    def request_finished(self, method, endpoint, status, duration):
+        assert duration >= 0
+        self.finished.append((method, endpoint, status))
+
+    def login_finished(self, duration, success):
+        self.logins.append(success)
+
+
+@pytest.mark.asyncio
+async def test_hooks__requests_and_timeouts():
+    modem = FakeModem()
+    hooks = RecordingHooks()
+
+    async with TestServer(modem.app) as server:
+        async with build_session(0.2) as session:
+            client = SagemcomModemSessionClient(
+                session, str(server.make_url("/")), "pw", hooks=hooks
+            )
+            await client.system_info()
+            await client._logout()
+
+            modem.latency = 0.5
+            with pytest.raises(asyncio.TimeoutError):
+                await client.system_state()
+
+    assert hooks.logins == [True]
+    # ids and tokens are not part of the endpoint
+    assert hooks.finished == [
+        ("POST", "/rest/v1/user/login", 201),
+        ("GET", "/rest/v1/system/info", 200),
+        ("DELETE", "/rest/v1/user/{user_id}/token/{token}", 204),
+        ("GET", "/rest/v1/cablemodem/state_", "timeout"),
+    ]
+    assert hooks.started == [(m, e) for m, e, _ in hooks.finished]
+
+
+@pytest.mark.asyncio
+async def test_fake_modem__injected_errors(fake_modem: FakeModem, fake_modem_url: str):
+    fake_modem.inject_error("/rest/v1/cablemodem/downstream", status=503, count=2)
+
+    async with SagemcomModemClient(fake_modem_url, FAKE_MODEM_PASSWORD) as client:
+        for _ in range(2):
+            with pytest.raises(aiohttp.ClientResponseError) as e:
+                await client.modem_downstreams()
+            assert e.value.status == 503
+
+        assert len(await client.modem_downstreams()) == 34
+
+
+@pytest.mark.asyncio
+async def test_fake_modem__reboot(fake_modem: FakeModem, fake_modem_url: str):
+    async with SagemcomModemClient(fake_modem_url, FAKE_MODEM_PASSWORD) as client:
+        assert (await client.system_state()).up_time > 3600
+        assert await client.system_reboot()
+        assert fake_modem.reboot_count == 1
+
+        assert (await client.system_state()).up_time < 10
+        log = await client.modem_event_log()
+        assert log[0].message == "Cable Modem Reboot because of - Reboot UI"
+        # the session is gone after the reboot
+        await client.system_info()
+        assert client.login_count == 2
+
+
+@pytest.mark.asyncio
+async def test_modem_client__per_instance_session(
+    fake_modem: FakeModem, fake_modem_url: str
+):
+    first = SagemcomModemClient(fake_modem_url, FAKE_MODEM_PASSWORD)
+    second = SagemcomModemClient(fake_modem_url, FAKE_MODEM_PASSWORD)
+
+    async with first as first_client:
+        async with second as second_client:
+            assert first_client is not second_client
+            await second_client.system_info()
+
+            with pytest.raises(RuntimeError):
+                async with second:
+                    pass
+
+        # leaving the second client does not close the session of the first
+        assert not first.session.closed
+        await first_client.system_info()
+
+    assert fake_modem.login_count == 2
+
+
+class InFlightHooks(RequestHooks):
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def request_started(self, method, endpoint):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def request_finished(self, method, endpoint, status, duration):
+        self.in_flight -= 1
+
+
+@pytest.mark.asyncio
+async def test_snapshot__concurrency_cap():
+    modem = FakeModem(latency=0.05)
+    hooks = InFlightHooks()
+
+    async with TestServer(modem.app) as server:
+        async with SagemcomModemClient(
+            str(server.make_url("/")), "pw", hooks=hooks
+        ) as client:
+            snapshot = await client.snapshot(event_log=True, max_concurrency=2)
+
+    assert hooks.max_in_flight == 2
+    assert len(snapshot.event_log) == len(modem.eventlog)
+    # the login is part of the system info
+    assert snapshot.latencies["system_info"] >= 2 * 0.05
+    assert all(latency >= 0.05 for latency in snapshot.latencies.values())
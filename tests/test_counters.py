@@ -0,0 +1,66 @@
+from sagemcom_f3896_client.counters import ChannelCounters
+
+KEY = ("1", "sc_qam", "corrected")
+OTHER = ("2", "sc_qam", "corrected")
+
+
+def test_counters__monotonic_with_rates():
+    counters = ChannelCounters()
+    counters.update(100.0, [(KEY, 114_000_000, 50)])
+    # the first value is the total, without a rate
+    assert counters.values() == {KEY: (50, None)}
+
+    counters.update(110.0, [(KEY, 114_000_000, 80)])
+    assert counters.values() == {KEY: (80, 3.0)}
+    assert counters.resets == {"reboot": 0, "channel_change": 0, "decrease": 0}
+
+
+def test_counters__resets():
+    counters = ChannelCounters()
+    counters.update(100.0, [(KEY, 114_000_000, 50), (OTHER, 122_000_000, 10)])
+
+    # the counter went down: counted from zero
+    counters.update(110.0, [(KEY, 114_000_000, 20), (OTHER, 122_000_000, 10)])
+    assert counters.values() == {KEY: (70, 2.0), OTHER: (10, 0.0)}
+
+    # the channel id moved to another frequency
+    counters.update(120.0, [(KEY, 130_000_000, 30), (OTHER, 122_000_000, 10)])
+    assert counters.totals[KEY] == 100
+    assert counters.resets == {"reboot": 0, "channel_change": 1, "decrease": 1}
+
+    # after a reboot, all counters restart: the rate only covers the uptime
+    counters.reboot(125.0)
+    counters.update(130.0, [(KEY, 130_000_000, 40), (OTHER, 122_000_000, 5)])
+    assert counters.values() == {KEY: (140, 8.0), OTHER: (15, 1.0)}
+    assert counters.resets["reboot"] == 2
+
+    # channels that are gone are not reported, the reboot is only applied once
+    counters.update(140.0, [(KEY, 130_000_000, 50)])
+    assert counters.values() == {KEY: (150, 1.0)}
+    assert counters.resets["reboot"] == 2
+
+
+def test_counters__channel_flaps():
+    counters = ChannelCounters(grace_period=60)
+    counters.update(100.0, [(KEY, 114_000_000, 50), (OTHER, 122_000_000, 10)])
+    counters.update(110.0, [(KEY, 114_000_000, 60)])
+    assert counters.values() == {KEY: (60, 1.0)}
+
+    # the channel is back for the next update: its counter continues, the rate
+    # covers the time since it was last seen
+    counters.update(120.0, [(KEY, 114_000_000, 70), (OTHER, 122_000_000, 30)])
+    assert counters.values() == {KEY: (70, 1.0), OTHER: (30, 1.0)}
+    assert counters.resets == {"reboot": 0, "channel_change": 0, "decrease": 0}
+
+    # gone for longer than the grace period: the channel starts again
+    counters.update(150.0, [(KEY, 114_000_000, 70)])
+    counters.update(190.0, [(KEY, 114_000_000, 70)])
+    counters.update(200.0, [(KEY, 114_000_000, 70), (OTHER, 122_000_000, 35)])
+    assert counters.values()[OTHER] == (35, None)
+
+    # missing during a reboot: the channel starts again
+    counters.update(210.0, [(KEY, 114_000_000, 70)])
+    counters.reboot(215.0)
+    counters.update(220.0, [(KEY, 114_000_000, 5)])
+    counters.update(230.0, [(KEY, 114_000_000, 5), (OTHER, 122_000_000, 3)])
+    assert counters.values() == {KEY: (75, 0.0), OTHER: (3, None)}
@@ -0,0 +1,159 @@
+import collections
+import datetime
+import random
+from typing import List
+
+from sagemcom_f3896_client.event_log import EventLogIngester, log_event
+from sagemcom_f3896_client.log_parser import (
+    CMStatusMessageOFDM,
+    DownstreamProfileMessage,
+    RebootMessage,
+    UpstreamProfileMessage,
+)
+from sagemcom_f3896_client.models import EventLogItem
+from tests.test_log_parser import LOG_MESSAGES
+
+START = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def item(offset: int, message: str, priority: str = "notice") -> EventLogItem:
+    return EventLogItem(
+        time=START + datetime.timedelta(seconds=offset),
+        priority=priority,
+        message=message,
+    )
+
+
+def modem_log(items: List[EventLogItem]) -> List[EventLogItem]:
+    """Newest first, like the client returns it."""
+    return sorted(items, reverse=True)
+
+
+def full_state(log_lines: List[EventLogItem]):
+    """The state as computed by processing the whole log."""
+    messages = [line.parse() for line in reversed(log_lines)]
+    last_reboot_idx = 0
+    for idx, message in enumerate(messages):
+        if isinstance(message, RebootMessage):
+            last_reboot_idx = idx
+
+    ofdm = {}
+    profiles = {}
+    for message in messages[last_reboot_idx:]:
+        match message:
+            case CMStatusMessageOFDM(
+                channel_id=channel_id, event_code=event_code, profile=profile
+            ) if event_code in (16, 24):
+                ofdm[(channel_id, profile)] = 1 if event_code == 16 else 0
+            case DownstreamProfileMessage() | UpstreamProfileMessage():
+                profiles[(type(message), message.channel_id)] = message
+
+    return (
+        collections.Counter(line.priority for line in log_lines),
+        sum(1 for message in messages if isinstance(message, RebootMessage)),
+        ofdm,
+        set(profiles.values()),
+        collections.Counter(
+            log_event(message) for message in messages if log_event(message)
+        ),
+    )
+
+
+def ingester_state(ingester: EventLogIngester):
+    return (
+        ingester.priority_counts,
+        ingester.reboot_count,
+        ingester.ofdm_profile_failures,
+        set(ingester.profile_messages),
+        ingester.event_counts,
+    )
+
+
+def test_ingest__only_returns_new_entries():
+    ingester = EventLogIngester()
+    log = [item(0, "a"), item(1, "b"), item(1, "c", "error")]
+
+    assert ingester.ingest(modem_log(log)) == sorted(log)
+    assert ingester.ingest(modem_log(log)) == []
+    assert ingester.priority_counts == {"notice": 2, "error": 1}
+
+    # new entry at the time of the newest entry, and the oldest entry expired
+    log = log[1:] + [item(1, "d"), item(2, "e")]
+    assert ingester.ingest(modem_log(log)) == [item(1, "d"), item(2, "e")]
+    assert ingester.priority_counts == {"notice": 3, "error": 1}
+    assert len(ingester) == 4
+
+
+def test_ingest__reboot_resets_channel_state():
+    ingester = EventLogIngester()
+    ds_profile = LOG_MESSAGES[24]
+    ofdm_failure = LOG_MESSAGES[18]
+    reboot = LOG_MESSAGES[31]
+
+    ingester.ingest(modem_log([item(0, ds_profile), item(1, ofdm_failure)]))
+    assert ingester.ofdm_profile_failures == {(33, 3): 1}
+    assert len(ingester.profile_messages) == 1
+
+    ingester.ingest(
+        modem_log([item(0, ds_profile), item(1, ofdm_failure), item(2, reboot)])
+    )
+    assert ingester.reboot_count == 1
+    assert ingester.ofdm_profile_failures == {}
+    assert ingester.profile_messages == []
+
+    # reboot expires
+    ingester.ingest(modem_log([]))
+    assert ingester.reboot_count == 0
+    assert len(ingester) == 0
+
+
+def test_ingest__counts_events():
+    ingester = EventLogIngester()
+    log = [item(idx, message) for idx, message in enumerate(LOG_MESSAGES[:10])]
+
+    ingester.ingest(modem_log(log))
+    assert ingester.event_counts == {
+        ("mdd_timeout", ""): 1,
+        ("t3_timeout_initial", ""): 1,
+        ("t3_timeout_unicast_maintenance", ""): 1,
+        ("consecutive_t3_timeouts", "0"): 1,
+        ("ranging_failure", ""): 1,
+    }
+
+    ingester.ingest(modem_log(log[7:]))
+    assert ingester.event_counts == {
+        ("t3_timeout_unicast_maintenance", ""): 1,
+        ("consecutive_t3_timeouts", "0"): 1,
+        ("ranging_failure", ""): 1,
+    }
+
+
+def test_ingest__clock_change_rebuilds_state():
+    ingester = EventLogIngester()
+    log = [item(10, "a"), item(11, "b")]
+    ingester.ingest(modem_log(log))
+
+    # an entry that is older than the newest entry, but newer than the oldest
+    log.append(item(10, "c"))
+    assert ingester.ingest(modem_log(log)) == [item(10, "c")]
+    assert ingester.priority_counts == {"notice": 3}
+
+
+def test_ingest__matches_full_processing():
+    """Compare with processing the full log on a sliding window over the sample messages."""
+    rng = random.Random(42)
+    messages = [
+        item(idx // 2, rng.choice(LOG_MESSAGES), rng.choice(["notice", "error"]))
+        for idx in range(1000)
+    ]
+    ingester = EventLogIngester()
+
+    start = 0
+    end = 0
+    while end < len(messages):
+        end += rng.randint(0, 20)
+        start = max(start, end - rng.randint(10, 200))
+        log = modem_log(messages[start:end])
+
+        ingester.ingest(log)
+        assert ingester_state(ingester) == full_state(log)
@@ -0,0 +1,642 @@
+import asyncio
+import contextlib
+import dataclasses
+import time
+
+import aiohttp
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from sagemcom_f3896_client.archive import EventLogArchive
+from sagemcom_f3896_client.client import (
+    DEFAULT_CACHE_TTL,
+    RequestHooks,
+    SagemcomModemClient,
+    SagemcomModemSessionClient,
+    build_connector,
+)
+from sagemcom_f3896_client.exporter import (
+    DEFAULT_REFRESH_INTERVALS,
+    Exporter,
+    ProbeTargetPool,
+)
+from tests.fake_modem import FakeModem
+
+
+@pytest.mark.asyncio
+async def test_probe_targets():
+    modem = FakeModem(qam_channels=3, ofdm_channels=1)
+    pool = ProbeTargetPool("password", ["127.0.0.1"])
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            probe_targets=pool,
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            targets = [str(modem_server.make_url(f"/modem{idx}")) for idx in range(3)]
+            for target in targets:
+                resp = await http.get("/probe", params={"target": target})
+                assert resp.status == 200
+                body = await resp.text()
+
+                assert "probe_success 1.0" in body
+                assert (
+                    'modem_downstream_frequency{channel="4",channel_type="ofdm"}'
+                    in body
+                )
+                # every target has its own state
+                serial = target.rsplit("/", 1)[1]
+                assert f'serial="{serial}"' in body
+
+            assert len(pool) == 3
+            # one login per update: the session is logged out afterwards.
+            assert modem.login_count == 3
+
+            # scrape again while the session of the previous scrape is logged out
+            for _ in range(2):
+                resp = await http.get("/probe", params={"target": targets[0]})
+                assert resp.status == 200
+                assert "probe_success 1.0" in await resp.text()
+
+            resp = await http.get("/probe")
+            assert resp.status == 400
+            resp = await http.get("/probe", params={"target": "ftp://192.0.2.1"})
+            assert resp.status == 400
+            # the password is only sent to allowed targets
+            resp = await http.get("/probe", params={"target": "http://192.0.2.1"})
+            assert resp.status == 403
+            assert len(pool) == 3
+
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_probe_targets__evicts_least_recently_used():
+    pool = ProbeTargetPool("password", ["192.0.2.0/24"], max_targets=2)
+
+    first = pool.get("192.0.2.1")
+    pool.get("192.0.2.2")
+    # access the first target again, so the second target is dropped
+    assert pool.get("http://192.0.2.1/") is first
+    pool.get("192.0.2.3")
+
+    assert len(pool) == 2
+    assert pool.get("192.0.2.1") is first
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_probe__disabled_by_default():
+    async with aiohttp.ClientSession() as session:
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, "http://192.0.2.1", "pw"), port=0
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get("/probe", params={"target": "http://192.0.2.2"})
+            assert resp.status == 404
+
+
+def test_probe_target_allow_list():
+    pool = ProbeTargetPool("password", ["10.0.0.0/24", "Modem.example.org", "::1"])
+    assert pool.is_allowed("http://10.0.0.7")
+    assert pool.is_allowed("https://modem.example.org:8443")
+    assert pool.is_allowed("http://[::1]")
+    assert not pool.is_allowed("http://10.0.1.7")
+    assert not pool.is_allowed("http://attacker.example.org")
+    with pytest.raises(ValueError):
+        pool.get("http://169.254.169.254")
+
+
+def test_probe_target_normalization():
+    assert ProbeTargetPool.normalize_target("192.168.100.1") == "http://192.168.100.1"
+    assert (
+        ProbeTargetPool.normalize_target("https://modem.example.org/")
+        == "https://modem.example.org"
+    )
+    with pytest.raises(ValueError):
+        ProbeTargetPool.normalize_target("http://")
+
+
+@pytest.mark.asyncio
+async def test_background_polling():
+    # slow modem: scrapes should not wait for it
+    modem = FakeModem(latency=0.2)
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            poll_interval=60,
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            # no update yet: the scrape does not block, the age is unknown
+            resp = await http.get("/metrics")
+            body = await resp.text()
+            assert "modem_metrics_age_seconds NaN" in body
+            assert "modem_downstream_frequency" not in body
+            assert modem.login_count == 0
+
+            exporter.start_polling()
+            while not exporter.last_update:
+                await asyncio.sleep(0.05)
+
+            t0 = time.monotonic()
+            resp = await http.get("/metrics")
+            body = await resp.text()
+            assert time.monotonic() - t0 < 0.2
+            assert "modem_downstream_frequency" in body
+            assert "modem_metrics_age_seconds NaN" not in body
+            assert modem.login_count == 1
+
+            await exporter.stop_polling()
+
+
+@pytest.mark.asyncio
+async def test_persistent_session():
+    modem = FakeModem()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            for _ in range(3):
+                resp = await http.get("/metrics")
+                assert resp.status == 200
+
+            body = await resp.text()
+            assert modem.login_count == 1
+            assert "modem_session_login_count 1.0" in body
+            assert "modem_session_token_age_seconds NaN" not in body
+
+
+@pytest.mark.asyncio
+async def test_consecutive_scrapes__session_logged_out():
+    modem = FakeModem()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=False,
+        )
+        # the logout after an update runs in the background, while the next update
+        # already uses the session
+        assert [await exporter.refresh() for _ in range(3)] == [True] * 3
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            for _ in range(2):
+                resp = await http.get("/metrics")
+                assert resp.status == 200
+
+        await asyncio.gather(*exporter.background_tasks)
+        assert not modem.tokens
+
+
+@pytest.mark.asyncio
+async def test_metrics__snapshot():
+    modem = FakeModem(qam_channels=2, ofdm_channels=1, atdma_channels=1)
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+        )
+        # nothing is collected before the first update
+        assert list(exporter.collector.collect()) == []
+
+        await exporter.update_metrics()
+        snapshot = exporter.collector.snapshot
+        assert len(snapshot.downstreams) == 3
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            snapshot.reboot_count = 0
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get("/metrics")
+            body = await resp.text()
+
+        assert (
+            'modem_downstream_errors_total{channel="2",channel_type="sc_qam",error_type="corrected"} 100.0'
+            in body
+        )
+        assert (
+            'modem_upstream_timeout_total{channel="1",channel_type="atdma",timeout_type="t1"}'
+            in body
+        )
+        assert 'modem_downstream_qam_info{channel="1",channel_type="sc_qam"' in body
+        # the snapshot of the last update is replaced, the collector is kept
+        assert exporter.collector.snapshot is not snapshot
+
+
+@pytest.mark.asyncio
+async def test_api_history():
+    pytest.importorskip("numpy")
+    modem = FakeModem(qam_channels=2, ofdm_channels=1)
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        client = SagemcomModemSessionClient(
+            session, str(modem_server.make_url("/")), "pw"
+        )
+        async with TestClient(TestServer(Exporter(client, port=0).app)) as http:
+            resp = await http.get("/api/history")
+            assert resp.status == 404
+
+        exporter = Exporter(client, port=0, persistent_session=True, history_size=10)
+        for _ in range(3):
+            await exporter.update_metrics()
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get(
+                "/api/history",
+                params=[("direction", "downstream"), ("percentile", "99")],
+            )
+            assert resp.status == 200
+            body = await resp.json()
+
+            assert list(body) == ["downstream"]
+            assert body["downstream"]["samples"] == 3
+            assert set(body["downstream"]["channels"]) == {"1", "2", "3"}
+            assert body["downstream"]["channels"]["1"]["power"]["p99"] == 4.5
+            # OFDM channels have no SNR
+            assert body["downstream"]["channels"]["3"]["snr"]["min"] is None
+
+            resp = await http.get("/api/history", params={"percentile": "101"})
+            assert resp.status == 400
+
+
+@pytest.mark.asyncio
+async def test_api_logs(tmp_path):
+    modem = FakeModem(log_lines=20)
+    archive = EventLogArchive(tmp_path / "log.db")
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+            archive=archive,
+        )
+        await exporter.update_metrics()
+        await exporter.update_metrics()
+        assert len(archive) == 20
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get(
+                "/api/logs", params={"priority": "critical", "limit": "3"}
+            )
+            assert resp.status == 200
+            entries = await resp.json()
+            assert len(entries) == 3
+            assert all(entry["priority"] == "critical" for entry in entries)
+            assert entries[0]["time"] > entries[1]["time"]
+
+            resp = await http.get("/api/logs", params={"since": "yesterday"})
+            assert resp.status == 400
+            for params in ({"limit": "-1"}, {"limit": "0"}, {"offset": "-5"}):
+                resp = await http.get("/api/logs", params=params)
+                assert resp.status == 400
+
+    archive.close()
+
+
+@pytest.mark.asyncio
+async def test_metrics__request_metrics():
+    modem = FakeModem(qam_channels=2, ofdm_channels=1)
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        # the scrape updates the metrics
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get("/metrics")
+            body = await resp.text()
+
+    assert (
+        'modem_client_request_duration_seconds_count{endpoint="/rest/v1/cablemodem/downstream",method="GET",status="200"} 1.0'
+        in body
+    )
+    assert (
+        'modem_client_request_duration_seconds_count{endpoint="/rest/v1/user/login",method="POST",status="201"} 1.0'
+        in body
+    )
+    assert 'modem_client_login_duration_seconds_count{result="success"} 1.0' in body
+    assert (
+        'modem_client_requests_in_flight{endpoint="/rest/v1/system/info",method="GET"} 0.0'
+        in body
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics__request_metrics_are_live():
+    modem = FakeModem()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            # serve the last update, without polling
+            poll_interval=60,
+            persistent_session=True,
+        )
+        await exporter.update_metrics()
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            await http.get("/metrics")
+            # a request after the update is in the next scrape of the same update
+            await exporter.client.system_info()
+            body = await (await http.get("/metrics")).text()
+
+    assert (
+        'modem_client_request_duration_seconds_count{endpoint="/rest/v1/system/info",method="GET",status="200"} 2.0'
+        in body
+    )
+
+
+class CountingHooks(RequestHooks):
+    def __init__(self):
+        self.requests = 0
+
+    def request_finished(self, method, endpoint, status, duration):
+        self.requests += 1
+
+
+@pytest.mark.asyncio
+async def test_metrics__request_metrics_keep_client_hooks():
+    modem = FakeModem()
+    hooks = CountingHooks()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(
+                session, str(modem_server.make_url("/")), "pw", hooks=hooks
+            ),
+            port=0,
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            body = await (await http.get("/metrics")).text()
+
+    assert hooks.requests == sum(modem.requests.values())
+    assert (
+        'modem_client_request_duration_seconds_count{endpoint="/rest/v1/cablemodem/downstream",method="GET",status="200"} 1.0'
+        in body
+    )
+
+
+@pytest.mark.asyncio
+async def test_index__paginated_from_last_update():
+    modem = FakeModem(log_lines=30)
+    modem.eventlog[0]["message"] = "<script>alert(1)</script>"
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        async with TestClient(TestServer(exporter.app)) as http:
+            # the first page view updates, later views use the last update
+            resp = await http.get("/")
+            assert resp.status == 200
+            body = await resp.text()
+            etag = resp.headers["ETag"]
+            assert "<script>" not in body
+            assert "&lt;script&gt;alert(1)&lt;/script&gt;" in body
+            requests = modem.requests["/rest/v1/cablemodem/eventlog"]
+
+            resp = await http.get("/", headers={"If-None-Match": etag})
+            assert resp.status == 304
+            assert modem.requests["/rest/v1/cablemodem/eventlog"] == requests
+
+            resp = await http.get(
+                "/", params=[("limit", 5), ("offset", 2), ("priority", "critical")]
+            )
+            body = await resp.text()
+            critical = [e for e in exporter.log_lines if e.priority == "critical"]
+            assert body.count("<tr><td>") - 1 == 5
+            assert f"3-7 of {len(critical)}" in body
+            assert "notice</td>" not in body
+
+            resp = await http.get("/", params={"limit": "x"})
+            assert resp.status == 400
+
+            # a new entry changes the ETag
+            modem.eventlog.append(
+                {
+                    "time": "2024-02-01T00:00:00+00:00",
+                    "priority": "notice",
+                    "message": "new",
+                }
+            )
+            await exporter.update_metrics()
+            resp = await http.get("/", headers={"If-None-Match": etag})
+            assert resp.status == 200
+            assert resp.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_many_modems__update_in_parallel():
+    """Exporters of many modems in one event loop, sharing one connector."""
+    modem_count = 20
+    modem = FakeModem(qam_channels=2, ofdm_channels=1, latency=0.05)
+
+    async with TestServer(modem.app) as modem_server:
+        # all modems are on one host here: 30 connections per host
+        connector = build_connector()
+        clients = [
+            SagemcomModemClient(
+                str(modem_server.make_url(f"/modem{idx}")), "pw", connector=connector
+            )
+            for idx in range(modem_count)
+        ]
+        async with contextlib.AsyncExitStack() as stack:
+            exporters = [
+                Exporter(await stack.enter_async_context(client), port=0)
+                for client in clients
+            ]
+            for idx, exporter in enumerate(exporters[:2]):
+                # per-instance state
+                exporter.modem_downstreams.append(idx)
+            assert exporters[0].modem_downstreams == [0]
+            assert exporters[0].background_tasks is not exporters[1].background_tasks
+
+            t0 = time.monotonic()
+            await asyncio.gather(*(exporter.update_metrics() for exporter in exporters))
+            # the login and the gets of all modems overlap
+            assert time.monotonic() - t0 < modem_count * 0.05
+
+            for idx, exporter in enumerate(exporters):
+                assert exporter.client.login_count == 1
+                assert exporter.collector.snapshot.state.serial_number == f"modem{idx}"
+                assert len(exporter.modem_downstreams) == 3
+            assert modem.login_count == modem_count
+
+            # logouts of the updates
+            await asyncio.gather(*exporters[0].background_tasks)
+
+        # the sessions are closed with the clients, the shared connector is kept
+        assert all(client.session is None for client in clients)
+        assert not connector.closed
+        await connector.close()
+
+
+@pytest.mark.asyncio
+async def test_refresh_intervals__tiered_polling():
+    modem = FakeModem(qam_channels=2, ofdm_channels=1)
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+            refresh_intervals={"system_info": 3600, "event_log": 60},
+        )
+        for _ in range(10):
+            await exporter.update_metrics()
+
+        assert modem.requests["/rest/v1/cablemodem/state_"] == 10
+        assert modem.requests["/rest/v1/cablemodem/downstream"] == 10
+        assert modem.requests["/rest/v1/system/info"] == 1
+        assert modem.requests["/rest/v1/cablemodem/eventlog"] == 1
+        # the results of the slow tiers are merged into every update
+        snapshot = exporter.collector.snapshot
+        assert snapshot.system_info.software_version
+        assert snapshot.source_ages["system_info"] > snapshot.source_ages["state"]
+        assert len(exporter.log_lines) > 0
+
+        # a reboot (the uptime went down) refreshes the other sources in the same update
+        modem.boot_time = time.monotonic()
+        await exporter.update_metrics()
+        assert modem.requests["/rest/v1/system/info"] == 2
+        assert modem.requests["/rest/v1/cablemodem/eventlog"] == 2
+        assert modem.requests["/rest/v1/cablemodem/state_"] == 11
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("refresh_intervals", [None, DEFAULT_REFRESH_INTERVALS])
+async def test_refresh_intervals__reboot_bypasses_response_cache(refresh_intervals):
+    modem = FakeModem()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(
+                session,
+                str(modem_server.make_url("/")),
+                "pw",
+                cache_ttl=DEFAULT_CACHE_TTL,
+            ),
+            port=0,
+            persistent_session=True,
+            refresh_intervals=refresh_intervals,
+        )
+        await exporter.update_metrics()
+        await exporter.update_metrics()
+        # the system info is served from the response cache
+        assert modem.requests["/rest/v1/system/info"] == 1
+
+        # the modem rebooted with new firmware
+        modem.info = {"info": {**modem.info["info"], "softwareVersion": "after-reboot"}}
+        modem.boot_time = time.monotonic()
+        await exporter.update_metrics()
+
+        assert modem.requests["/rest/v1/system/info"] == 2
+        snapshot = exporter.collector.snapshot
+        assert snapshot.system_info.software_version == "after-reboot"
+
+
+@pytest.mark.asyncio
+async def test_channel_counters__reset_on_reboot():
+    modem = FakeModem(
+        qam_channels=2, ofdm_channels=0, atdma_channels=1, ofdma_channels=0
+    )
+    # the modem just booted: the uptime alone does not show a second reboot
+    modem.boot_time = time.monotonic()
+
+    async with (
+        TestServer(modem.app) as modem_server,
+        aiohttp.ClientSession() as session,
+    ):
+        exporter = Exporter(
+            SagemcomModemSessionClient(session, str(modem_server.make_url("/")), "pw"),
+            port=0,
+            persistent_session=True,
+        )
+        key = ("2", "sc_qam", "corrected")
+        await exporter.update_metrics()
+        assert exporter.collector.snapshot.downstream_counters[key] == (100, None)
+
+        modem.downstreams[1]["correctedErrors"] = 150
+        await exporter.update_metrics()
+        total, rate = exporter.collector.snapshot.downstream_counters[key]
+        assert total == 150 and rate > 0
+
+        # the reboot is in the event log, the counters restart
+        modem.downstreams[1]["correctedErrors"] = 20
+        modem.eventlog.append(
+            {
+                "time": "2030-01-01T00:00:00+00:00",
+                "priority": "critical",
+                "message": "Cable Modem Reboot because of - Reboot UI",
+            }
+        )
+        await exporter.update_metrics()
+        snapshot = exporter.collector.snapshot
+        assert snapshot.downstream_counters[key][0] == 170
+        # 2 downstream and 4 upstream counters
+        assert snapshot.counter_resets["reboot"] == 2 * 2 + 4
+        assert snapshot.counter_resets["decrease"] == 0
+
+        async with TestClient(TestServer(exporter.app)) as http:
+            resp = await http.get("/metrics")
+            body = await resp.text()
+        assert (
+            'modem_downstream_channel_errors_total{channel="2",channel_type="sc_qam",error_type="corrected"} 170.0'
+            in body
+        )
+        assert 'modem_upstream_channel_timeout_rate{channel="1"' in body
+        assert 'modem_channel_counter_resets_total{reason="reboot"}' in body
@@ -0,0 +1,77 @@
+import gzip
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+from prometheus_client import CollectorRegistry, Gauge
+
+from sagemcom_f3896_client.exposition import (
+    CachedExposition,
+    accepts_gzip,
+    exposition_response,
+)
+
+OPENMETRICS = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def test_accepts_gzip():
+    assert accepts_gzip("gzip")
+    assert accepts_gzip("deflate, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip(None)
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip;q=invalid")
+
+
+def test_cached_exposition__renders_once():
+    registry = CollectorRegistry()
+    gauge = Gauge("modem_value", "Value", registry=registry)
+    exposition = CachedExposition(registry)
+
+    calls = []
+
+    def encoder(collector):
+        calls.append(collector)
+        return b"modem_value 1.0\n"
+
+    body = exposition.render(encoder, "text/plain", False)
+    gauge.set(2)
+    assert exposition.render(encoder, "text/plain", False) is body
+    assert gzip.decompress(exposition.render(encoder, "text/plain", True)) == body
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_exposition_response():
+    cached = CollectorRegistry()
+    Gauge("modem_value", "Value", registry=cached).set(1)
+    live = CollectorRegistry()
+    Gauge("live_value", "Value", registry=live).set(2)
+    exposition = CachedExposition(cached)
+
+    async def handler(request: web.Request) -> web.Response:
+        return exposition_response(request, exposition, live)
+
+    app = web.Application()
+    app.router.add_get("/metrics", handler)
+
+    async with TestClient(TestServer(app)) as http:
+        resp = await http.get("/metrics", headers={"Accept-Encoding": "identity"})
+        assert resp.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert "Content-Encoding" not in resp.headers
+        body = await resp.text()
+        assert "modem_value 1.0\n" in body
+        assert body.endswith("live_value 2.0\n")
+
+        resp = await http.get(
+            "/metrics",
+            headers={"Accept": OPENMETRICS, "Accept-Encoding": "gzip"},
+        )
+        assert resp.headers["Content-Type"].startswith("application/openmetrics-text")
+        assert resp.headers["Content-Encoding"] == "gzip"
+        # decompressed by the client: one EOF marker, at the end
+        body = await resp.text()
+        assert "modem_value 1.0\n" in body
+        assert body.count("# EOF") == 1
+        assert body.endswith("live_value 2.0\n# EOF\n")
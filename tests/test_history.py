@@ -0,0 +1,60 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+
+from sagemcom_f3896_client.history import ChannelRingBuffer
+
+np = pytest.importorskip("numpy")
+
+
+@dataclass
+class Channel:
+    channel_id: int
+    power: float
+    snr: Optional[int] = None
+
+
+def test_ring_buffer__keeps_last_updates():
+    buffer = ChannelRingBuffer(["power", "snr"], size=3)
+
+    for idx in range(5):
+        buffer.add(1000 + idx, [Channel(1, idx), Channel(2, 10 * idx, snr=40)])
+
+    assert buffer.samples == 3
+    summary = buffer.summary(percentiles=[50], include_samples=True)
+    assert summary["times"] == [1002, 1003, 1004]
+
+    power = summary["channels"]["1"]["power"]
+    assert power["values"] == [2, 3, 4]
+    assert (power["min"], power["max"], power["last"], power["p50"]) == (2, 4, 4, 3)
+    assert summary["channels"]["2"]["power"]["max"] == 40
+
+    # no values: null
+    assert summary["channels"]["1"]["snr"]["max"] is None
+    assert summary["channels"]["2"]["snr"]["min"] == 40
+
+
+def test_ring_buffer__missing_channel():
+    buffer = ChannelRingBuffer(["power"], size=4)
+    buffer.add(0, [Channel(1, 1), Channel(2, 1)])
+    buffer.add(1, [Channel(1, 2)])
+
+    summary = buffer.summary(channel_ids=[2], include_samples=True)
+    assert list(summary["channels"]) == ["2"]
+    assert summary["channels"]["2"]["power"]["values"] == [1, None]
+    assert summary["channels"]["2"]["power"]["last"] is None
+
+
+def test_ring_buffer__bounded_channels():
+    buffer = ChannelRingBuffer(["power"], size=2, max_channels=2)
+    buffer.add(0, [Channel(1, 1), Channel(2, 2)])
+    buffer.add(1, [Channel(2, 2), Channel(3, 3)])
+
+    # the channel that was seen least recently is replaced
+    assert set(buffer.rows) == {2, 3}
+    assert buffer.values["power"].shape == (2, 2)
+    assert buffer.summary(include_samples=True)["channels"]["3"]["power"]["values"] == [
+        None,
+        3,
+    ]
@@ -1,11 +1,19 @@
 from typing import Set
 
 from sagemcom_f3896_client.log_parser import (
+    MESSAGE_TYPES,
+    PARSE_CACHE_SIZE,
     CMStatusMessageOFDM,
+    ConsecutiveT3TimeoutsMessage,
     DownstreamProfileMessage,
+    MDDTimeoutMessage,
+    RangingFailureMessage,
     RebootMessage,
+    T3TimeoutMessage,
     UpstreamProfileMessage,
+    parse_cache_info,
     parse_message,
+    set_parse_cache_size,
 )
 
 LOG_MESSAGES = [
@@ -123,3 +131,47 @@ def test_log_parser_integration_test():
     assert DownstreamProfileMessage in types
     assert UpstreamProfileMessage in types
     assert RebootMessage in types
+    assert T3TimeoutMessage in types
+    assert ConsecutiveT3TimeoutsMessage in types
+    assert MDDTimeoutMessage in types
+    assert RangingFailureMessage in types
+
+
+def test_log_parser__timeouts():
+    assert parse_message(LOG_MESSAGES[6]) == T3TimeoutMessage(ranging="initial")
+    assert parse_message(LOG_MESSAGES[9]) == T3TimeoutMessage(
+        ranging="unicast_maintenance"
+    )
+    assert parse_message(LOG_MESSAGES[15]) == ConsecutiveT3TimeoutsMessage(
+        channel_id=8, count=16
+    )
+    assert parse_message(LOG_MESSAGES[3]) == MDDTimeoutMessage()
+    assert parse_message(LOG_MESSAGES[8]) == RangingFailureMessage()
+    # not a message about a timeout
+    assert parse_message("Honoring MDD; IP provisioning mode = IPv4") is None
+
+
+def test_message_types__prefixes():
+    """Every message that matches the pattern of a type starts with one of its prefixes."""
+    for message_type in MESSAGE_TYPES:
+        for message in LOG_MESSAGES:
+            if message_type.pattern.match(message):
+                assert message.startswith(message_type.prefixes), message_type.name
+
+
+def test_parse_cache():
+    set_parse_cache_size(4)
+    try:
+        first = parse_message(LOG_MESSAGES[18])
+        assert parse_message(LOG_MESSAGES[18]) is first
+        assert parse_cache_info().hits == 1
+        assert parse_cache_info().misses == 1
+
+        # least recently used message is evicted
+        for message in LOG_MESSAGES[0:4]:
+            parse_message(message)
+        assert parse_cache_info().currsize == 4
+        assert parse_message(LOG_MESSAGES[18]) == first
+        assert parse_cache_info().misses == 6
+    finally:
+        set_parse_cache_size(PARSE_CACHE_SIZE)
@@ -5,15 +5,13 @@ import pytest
 from sagemcom_f3896_client.client import SagemcomModemClient
 from sagemcom_f3896_client.exception import LoginFailedException
 from sagemcom_f3896_client.util import build_client
-from tests.util import requires_modem_password
 
 logging.basicConfig(level=logging.DEBUG)
 LOG = logging.getLogger(__name__)
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
-async def test_login_logout(caplog):
+async def test_login_logout(modem_settings, caplog):
     caplog.set_level(logging.DEBUG)
 
     async with build_client() as client:
@@ -21,21 +19,18 @@ async def test_login_logout(caplog):
         assert client.authorization.token is not None
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
-async def test_login__failure_error(caplog):
+async def test_login__failure_error(modem_settings, caplog):
     caplog.set_level(logging.DEBUG)
+    modem_url, _ = modem_settings
 
     with pytest.raises(LoginFailedException):
-        async with SagemcomModemClient(
-            "http://192.168.100.1", password="DEADBEEF"
-        ) as client:
+        async with SagemcomModemClient(modem_url, password="DEADBEEF") as client:
             await client._login()
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
-async def test_create_tokens__not_logged_in(caplog):
+async def test_create_tokens__not_logged_in(modem_settings, caplog):
     """Implicitly logs in because it's an authenticated endpoint."""
     caplog.set_level(logging.DEBUG)
 
@@ -47,9 +42,8 @@ async def test_create_tokens__not_logged_in(caplog):
         assert token.token is not None
 
 
-@requires_modem_password()
 @pytest.mark.asyncio
-async def test_create_tokens__logged_in(caplog):
+async def test_create_tokens__logged_in(modem_settings, caplog):
     caplog.set_level(logging.DEBUG)
 
     client_wrapper = build_client()
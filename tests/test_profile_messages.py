@@ -89,3 +89,28 @@ def test_profile_messages():
     # With no channels, it should be empty
     assert store.update_for_channels([], []) == 1
     assert len(store) == 0
+
+
+def test_profile_messages__bulk():
+    store = ProfileMessageStore()
+
+    store.add_many(
+        [
+            ds_message(1, [1, 2], None),
+            ds_message(2, [1], None),
+            us_message(1, [9]),
+            # the last message for a channel wins
+            ds_message(1, [2], [1, 2]),
+        ]
+    )
+    assert len(store) == 3
+    assert ds_message(1, [2], [1, 2]) in store
+    assert ds_message(1, [1, 2], None) not in store
+    assert "not a message" not in store
+
+    # channel ids are per direction
+    assert store.retain_channels([1], [2]) == 2
+    assert list(store) == [ds_message(1, [2], [1, 2])]
+
+    store.remove(ds_message(1, [2], [1, 2]))
+    assert len(store) == 0